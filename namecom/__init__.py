@@ -10,6 +10,17 @@ License: MIT
 
 from . import exceptions
 from .auth import Auth
+from .cache import AvailabilityCache, ConditionalCache, MemoryCacheBackend, NegativeCache, ReadCache, SQLiteCacheBackend
+from .circuit_breaker import CircuitBreaker
+from .concurrency import AdaptiveLimiter
+from .profiling import Profiler
+from .rate_limit import RateLimitStatus
+from .replay import Recorder, Replayer
+from .sampling import CallSampler
+from .timeouts import Deadline
+from .tracing import JsonlFileSink, RingBufferSink, Tracer, correlation_id
+from .transport import MemoryTransport, RequestsTransport, Transport
+from .utils import make_session
 from . import result_models
 from .data_models import (
     Contact,
@@ -18,6 +29,7 @@ from .data_models import (
     Domain,
     DomainSearchResult,
     EmailForwarding,
+    FrozenModel,
     Record,
     Transfer,
     URLForwarding,
@@ -32,3 +44,5 @@ from .api import (
     URLForwardingApi,
     VanityNameserverApi,
 )
+from .account import AccountReader
+from .change_feed import ChangeEvent, ChangeFeed
@@ -0,0 +1,160 @@
+"""
+namecom: account.py
+
+Implements AccountReader which reads per-domain resources
+of many domains concurrently.
+
+Tianhong Chu [https://github.com/CtheSky]
+License: MIT
+"""
+
+from .api import DnsApi, DnssecApi, DomainApi, EmailForwardingApi, URLForwardingApi, VanityNameserverApi
+from .concurrency import DEFAULT_MAX_WORKERS, concurrent_map
+from .data_models import Domain
+from .result_models import ListDomainsResult
+from .timeouts import Deadline
+from .utils import make_session
+
+__all__ = ['AccountReader']
+
+# kind -> (api class, list method name, result attribute)
+_KINDS = {
+    'records': (DnsApi, 'list_records', 'records'),
+    'dnssecs': (DnssecApi, 'list_dnssecs', 'dnssecs'),
+    'email_forwardings': (EmailForwardingApi, 'list_email_forwardings', 'email_forwardings'),
+    'url_forwardings': (URLForwardingApi, 'list_url_forwardings', 'url_forwardings'),
+    'vanity_nameservers': (VanityNameserverApi, 'list_vanity_nameservers', 'vanityNameservers'),
+}
+
+
+class AccountReader(object):
+    """
+    The class reads records, DNSSEC keys and forwardings of many domains concurrently.
+
+    All domains share one thread pool and the client settings (limiter, circuit breaker,
+    timeout, deadline, ...) passed at construction. Unless a session or transport is given, the
+    requests of each read share a pooled session sized to the thread pool, closed when the read
+    finishes. Results are streamed as
+    `(domainName, models)` tuples as they complete, all pages of each domain included.
+
+    Example:
+        reader = AccountReader(auth, limiter=AdaptiveLimiter())
+        for domainName, records in reader.iter_records():
+            ...
+    """
+
+    def __init__(self, auth, use_test_env=False, max_workers=None, **kwargs):
+        """
+        Parameters
+        ----------
+        auth : :class:`~namecom.Auth`
+            http authentication to use
+
+        use_test_env : bool
+            whether runs in test environment
+
+        max_workers : int
+            size of the shared thread pool, defaults to the limiter's max_limit
+
+        kwargs :
+            optional client settings, see :class:`~namecom.api._ApiBase`
+        """
+        self.auth = auth
+        self.use_test_env = use_test_env
+        if isinstance(kwargs.get('deadline'), (int, float)):
+            kwargs['deadline'] = Deadline(kwargs['deadline'])
+        self.settings = kwargs
+
+        limiter = kwargs.get('limiter')
+        if max_workers is None:
+            max_workers = limiter.max_limit if limiter is not None else DEFAULT_MAX_WORKERS
+        self.max_workers = max_workers
+
+    def iter_domain_names(self, domains=None):
+        """Returns a generator of domain names.
+
+        Parameters
+        ----------
+        domains : iterable of string or :class:`~namecom.Domain`, or :class:`~namecom.result_models.ListDomainsResult`
+            domains to read, None for all domains in the account
+        """
+        return self._domain_names(domains, self.settings)
+
+    def _domain_names(self, domains, settings):
+        if domains is None:
+            api = DomainApi(self.auth, self.use_test_env, **settings)
+            domains = api._iter_pages(api.list_domains, 'domains')
+        elif isinstance(domains, ListDomainsResult):
+            domains = domains.domains
+
+        for domain in domains:
+            yield domain.domainName if isinstance(domain, Domain) else domain
+
+    def fetch(self, kind, domains=None, ordered=False, errors=None):
+        """Reads all models of a kind for each domain concurrently.
+
+        Parameters
+        ----------
+        kind : string
+            one of 'records', 'dnssecs', 'email_forwardings', 'url_forwardings', 'vanity_nameservers'
+
+        domains : iterable of string or :class:`~namecom.Domain`, or :class:`~namecom.result_models.ListDomainsResult`
+            domains to read, None for all domains in the account
+
+        ordered : bool
+            yields in input order if True, otherwise as completed
+
+        errors : dict
+            if given, failed domains are stored as domainName -> exception and skipped,
+            otherwise the first failure is raised
+
+        Returns
+        -------
+        generator of (domainName, [] models) tuples
+        """
+        api_class, list_method, attr = _KINDS[kind]
+        settings = self.settings
+        session = None
+        if settings.get('session') is None and settings.get('transport') is None:
+            session = make_session(self.max_workers)
+            settings = dict(settings, session=session)
+
+        def read(domainName):
+            api = api_class(domainName, self.auth, self.use_test_env, **settings)
+            return list(api._iter_pages(getattr(api, list_method), attr))
+
+        try:
+            for _, domainName, models, error in concurrent_map(read, self._domain_names(domains, settings),
+                                                               self.max_workers, ordered):
+                if error is not None:
+                    if errors is None:
+                        raise error
+                    errors[domainName] = error
+                    continue
+                yield domainName, models
+        finally:
+            if session is not None:
+                session.close()
+
+    def iter_records(self, domains=None, ordered=False, errors=None):
+        """Yields (domainName, [] :class:`~namecom.Record`) tuples, see :meth:`fetch`."""
+        return self.fetch('records', domains, ordered, errors)
+
+    def iter_dnssecs(self, domains=None, ordered=False, errors=None):
+        """Yields (domainName, [] :class:`~namecom.DNSSEC`) tuples, see :meth:`fetch`."""
+        return self.fetch('dnssecs', domains, ordered, errors)
+
+    def iter_email_forwardings(self, domains=None, ordered=False, errors=None):
+        """Yields (domainName, [] :class:`~namecom.EmailForwarding`) tuples, see :meth:`fetch`."""
+        return self.fetch('email_forwardings', domains, ordered, errors)
+
+    def iter_url_forwardings(self, domains=None, ordered=False, errors=None):
+        """Yields (domainName, [] :class:`~namecom.URLForwarding`) tuples, see :meth:`fetch`."""
+        return self.fetch('url_forwardings', domains, ordered, errors)
+
+    def iter_vanity_nameservers(self, domains=None, ordered=False, errors=None):
+        """Yields (domainName, [] :class:`~namecom.VanityNameserver`) tuples, see :meth:`fetch`.
+
+        The listing omits the IP addresses of nameservers.
+        """
+        return self.fetch('vanity_nameservers', domains, ordered, errors)
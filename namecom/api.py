@@ -10,15 +10,26 @@ License: MIT
 __all__ = ['DnsApi', 'DnssecApi', 'DomainApi', 'EmailForwardingApi', 'TransferApi', 'URLForwardingApi',
            'VanityNameserverApi']
 
+import copy
+import time
+
 import requests
 
 from . import exceptions
 from .utils import *
 from .result_models import *
+from .concurrency import DEFAULT_MAX_WORKERS, concurrent_map
+from .sync import SyncReport, apply_plan, plan_sync
+from .timeouts import DEFAULT_TIMEOUT, Deadline
+from .transport import RequestsTransport
+from .utils.time_utils import clock as _clock
 
 PRODUCT_API_HOST = 'https://api.name.com'
 TEST_API_HOST = 'https://api.dev.name.com'
 
+# POST actions that only read, they do not invalidate cached responses of the endpoint
+_READ_ONLY_ACTIONS = frozenset([':checkAvailability', ':search', ':searchStream'])
+
 
 class _ApiBase(object):
     """
@@ -29,12 +40,117 @@ class _ApiBase(object):
       2. send request
       3. parse result
       4. error handling
+
+    Optional client settings are accepted as keyword arguments by every api class:
+
+    circuit_breaker : :class:`~namecom.CircuitBreaker`
+        fails fast with :class:`~namecom.exceptions.CircuitOpenError` while the service is unhealthy,
+        circuits are tracked per api host and endpoint family
+
+    timeout : float or (float, float)
+        connect and read timeout in seconds of each request, defaults to `DEFAULT_TIMEOUT`
+
+    deadline : float or :class:`~namecom.Deadline`
+        overall deadline for all requests made through this api object, seconds from now if a number
+
+    limiter : :class:`~namecom.AdaptiveLimiter`
+        limits concurrent requests, shared by api objects, pagination helpers and bulk helpers
+
+    conditional_cache : :class:`~namecom.ConditionalCache`
+        revalidates GET requests with stored validators and reuses parsed results of unchanged resources
+
+    read_cache : :class:`~namecom.ReadCache`
+        serves GET requests from a possibly cross-process cache for a ttl, writes invalidate the endpoint,
+        domain searches do not
+
+    negative_cache : :class:`~namecom.NegativeCache`
+        raises :class:`~namecom.exceptions.NotFoundError` for recently missing resources without a request,
+        writes invalidate the endpoint, domain searches do not
+
+    availability_cache : :class:`~namecom.AvailabilityCache`
+        serves domain search results of check_availability, search and search_stream for a short ttl
+
+    transport : :class:`~namecom.Transport`
+        sends the requests, defaults to a :class:`~namecom.RequestsTransport`
+
+    session : requests.Session
+        sends requests over a pool of kept-alive connections, see :func:`~namecom.make_session`,
+        shorthand for a RequestsTransport with this session
+
+    profiler : :class:`~namecom.Profiler`
+        collects the time spent queueing, waiting for the response, downloading, decoding and parsing
+
+    tracer : :class:`~namecom.Tracer`
+        records a span for every request and propagates correlation ids
+
+    sampler : :class:`~namecom.CallSampler`
+        keeps the sanitized details of a bounded sample of slow and failed calls
+
+    recorder : :class:`~namecom.Recorder`
+        writes every request and response with its latency and parse time to a file for replay
+
+    Per-call settings are applied to a copy of the api object returned by :meth:`with_options`.
     """
 
-    def __init__(self, auth, use_test_env):
+    def __init__(self, auth, use_test_env, circuit_breaker=None, timeout=DEFAULT_TIMEOUT, deadline=None,
+                 limiter=None, conditional_cache=None, read_cache=None, negative_cache=None,
+                 availability_cache=None, session=None, transport=None,
+                 profiler=None, tracer=None, sampler=None, recorder=None):
         self.auth = auth
         self.api_host = PRODUCT_API_HOST if not use_test_env else TEST_API_HOST
         self.endpoint = ''
+        self.circuit_breaker = circuit_breaker
+        self.timeout = timeout
+        self.deadline = Deadline(deadline) if isinstance(deadline, (int, float)) else deadline
+        self.limiter = limiter
+        self.conditional_cache = conditional_cache
+        self.read_cache = read_cache
+        self.negative_cache = negative_cache
+        self.availability_cache = availability_cache
+        if transport is not None and session is not None:
+            raise TypeError('session and transport are mutually exclusive')
+        self.transport = transport if transport is not None else RequestsTransport(session)
+        self.profiler = profiler
+        self.tracer = tracer
+        self.sampler = sampler
+        self.recorder = recorder
+
+    def with_options(self, **kwargs):
+        """Returns a copy of this api object with some client settings replaced.
+
+        Example: `api.with_options(timeout=5, deadline=30).list_records()`
+
+        Parameters
+        ----------
+        kwargs :
+            client settings to replace, see :class:`~namecom.api._ApiBase`
+
+        Returns
+        -------
+        a new api object of the same class
+        """
+        api = copy.copy(self)
+        for name, value in kwargs.items():
+            if not hasattr(api, name):
+                raise TypeError('unknown client setting: {}'.format(name))
+            if name == 'deadline' and isinstance(value, (int, float)):
+                value = Deadline(value)
+            setattr(api, name, value)
+        return api
+
+    @property
+    def session(self):
+        """requests.Session of the transport, None if it has none."""
+        return getattr(self.transport, 'session', None)
+
+    @session.setter
+    def session(self, session):
+        self.transport = RequestsTransport(session)
+
+    @property
+    def endpoint_family(self):
+        """Name used to group the endpoints of this api, e.g. for circuit breaking."""
+        return self.__class__.__name__
 
     def _do(self, method, relative_path=None, **kwargs):
         """
@@ -45,16 +161,248 @@ class _ApiBase(object):
         :param kwargs: keyword arguments that will be passed to request method from requests module
         :return: response from requests module
         """
-        resp = requests.request(method,
-                                self.api_host + self.endpoint + (relative_path if relative_path else ''),
-                                auth=(self.auth.username, self.auth.token),
-                                **kwargs)
+        if self.profiler is None and self.tracer is None and self.sampler is None:
+            return self._send(method, relative_path, **kwargs)
+
+        span = None
+        if self.tracer is not None:
+            span = self.tracer.start(method, self.endpoint + (relative_path or ''), kwargs)
+        if self.profiler is not None:
+            self.profiler.begin(self)
+        start = _clock()
+
+        try:
+            resp = self._send(method, relative_path, **kwargs)
+        except Exception as e:
+            if self.profiler is not None:
+                self.profiler.mark(error=True)
+                self.profiler.finish()
+            if span is not None:
+                self.tracer.finish(span, error=e)
+            if self.sampler is not None:
+                self.sampler.observe(method, self.endpoint + (relative_path or ''), kwargs, _clock() - start,
+                                     error=e, correlation_id=span.correlation_id if span is not None else None)
+            raise
+
+        if span is not None:
+            self.tracer.finish(span, resp, streamed=kwargs.get('stream', False))
+        if self.sampler is not None:
+            self.sampler.observe(method, self.endpoint + (relative_path or ''), kwargs, _clock() - start,
+                                 resp=resp, correlation_id=span.correlation_id if span is not None else None)
+        return resp
+
+    def _send(self, method, relative_path=None, revalidate=True, **kwargs):
+        """
+        Sends the request through the caches, limiter and circuit breaker, see :meth:`_do`.
 
-        if resp.status_code // 100 != 2:
+        A 304 to a conditional request whose cached result was evicted meanwhile is sent again
+        without validators, unless `revalidate` is False.
+        """
+        path = self.endpoint + (relative_path if relative_path else '')
+        timeout = kwargs.pop('timeout', self.timeout)
+        deadline = self.deadline
+        if deadline is not None:
+            if deadline.expired():
+                raise exceptions.DeadlineExceededError('deadline of {}s passed before {} {}'.format(
+                    deadline.seconds, method, path))
+
+        url = None
+        if method == 'GET' and (self.read_cache is not None or self.conditional_cache is not None or
+                                self.negative_cache is not None):
+            url = requests.Request(method, self.api_host + path, params=kwargs.get('params')).prepare().url
+
+        if self.negative_cache is not None and url is not None:
+            resp = self.negative_cache.get(url, self.auth.username)
+            if resp is not None:
+                raise exceptions.make_exception(resp)
+
+        if self.read_cache is not None and url is not None:
+            resp = self.read_cache.get(url, self.auth.username)
+            if resp is not None:
+                if self.profiler is not None:
+                    self.profiler.mark(cached=True)
+                return resp
+
+        rate_limit = getattr(self.auth, 'rate_limit', None)
+        if self.limiter is not None and rate_limit is not None:
+            wait = rate_limit.delay()
+            if wait > 0:
+                if deadline is not None and wait >= deadline.remaining():
+                    raise exceptions.DeadlineExceededError('deadline of {}s passed while waiting for rate limit '
+                                                           'before {} {}'.format(deadline.seconds, method, path))
+                time.sleep(wait)
+                if self.profiler is not None:
+                    self.profiler.add('queue', wait)
+
+        if self.limiter is not None:
+            waited = self.limiter.acquire(None if deadline is None else max(deadline.remaining(), 0))
+            if waited is None:
+                raise exceptions.DeadlineExceededError('deadline of {}s passed while queueing {} {}'.format(
+                    deadline.seconds, method, path))
+            if self.profiler is not None:
+                self.profiler.add('queue', waited)
+
+        if deadline is not None:
+            timeout = deadline.cap(timeout)
+            if deadline.expired():
+                # a zero timeout would be rejected by requests
+                if self.limiter is not None:
+                    self.limiter.cancel()
+                raise exceptions.DeadlineExceededError('deadline of {}s passed while waiting to send {} {}'.format(
+                    deadline.seconds, method, path))
+
+        if self.circuit_breaker is not None:
+            try:
+                self.circuit_breaker.before_call((self.api_host, self.endpoint_family))
+            except exceptions.CircuitOpenError:
+                if self.limiter is not None:
+                    self.limiter.cancel()
+                raise
+
+        conditional = self.conditional_cache is not None and url is not None
+        plain_headers = kwargs.get('headers')
+        if conditional and revalidate:
+            headers = self.conditional_cache.request_headers(url, self.auth.username)
+            if headers:
+                kwargs['headers'] = dict(plain_headers or {}, **headers)
+
+        start = _clock()
+        try:
+            resp = self.transport.request(method,
+                                          self.api_host + path,
+                                          auth=(self.auth.username, self.auth.token),
+                                          timeout=timeout,
+                                          **kwargs)
+        except Exception as e:
+            self._after_call(_clock() - start, None)
+            if deadline is not None and isinstance(e, requests.Timeout) and deadline.expired():
+                raise exceptions.DeadlineExceededError('deadline of {}s passed during {} {}'.format(
+                    deadline.seconds, method, path))
+            raise
+
+        duration = _clock() - start
+        try:
+            if rate_limit is not None:
+                rate_limit.update(resp.headers, resp.status_code)
+            if self.recorder is not None:
+                self.recorder.record(method, self.api_host + path, kwargs, resp, duration)
+        finally:
+            # always release the limiter slot and resolve a half-open probe
+            self._after_call(duration, resp.status_code)
+        if self.profiler is not None:
+            self.profiler.add_response(resp, duration)
+
+        writes = url is None and relative_path not in _READ_ONLY_ACTIONS
+        if self.read_cache is not None:
+            if writes:
+                self.read_cache.invalidate(self.api_host + self.endpoint, self.auth.username)
+            elif url is not None and resp.status_code == 200:
+                self.read_cache.set(url, resp, self.auth.username)
+
+        if self.negative_cache is not None:
+            if writes:
+                self.negative_cache.invalidate(self.api_host + self.endpoint, self.auth.username)
+            elif url is not None and resp.status_code == 404:
+                self.negative_cache.set(url, resp, self.auth.username)
+
+        # the cached result was evicted after the validators were sent
+        if revalidate and conditional and resp.status_code == 304 and \
+                (url, self.auth.username) not in self.conditional_cache:
+            kwargs['headers'] = plain_headers
+            return self._send(method, relative_path, revalidate=False, timeout=timeout, **kwargs)
+
+        if resp.status_code // 100 != 2 and not (conditional and resp.status_code == 304):
             raise exceptions.make_exception(resp)
 
         return resp
 
+    def _after_call(self, duration, status_code):
+        """
+        Used to feed the outcome of a request to the circuit breaker and concurrency limiter.
+
+        The limiter treats a call as throttled on 429, and also when the rate limit status of
+        the auth reports a low quota, so it backs off before the server throttles.
+
+        :param duration: elapsed seconds of the request
+        :param status_code: http status code, None if no response was received
+        """
+        failed = status_code is None or status_code >= 500
+
+        if self.circuit_breaker is not None:
+            circuit_key = (self.api_host, self.endpoint_family)
+            if failed:
+                self.circuit_breaker.record_failure(circuit_key, duration)
+            else:
+                self.circuit_breaker.record_success(circuit_key, duration)
+
+        if self.limiter is not None:
+            rate_limit = getattr(self.auth, 'rate_limit', None)
+            throttled = status_code == 429 or (rate_limit is not None and rate_limit.low)
+            self.limiter.release(duration, throttled=throttled, failed=failed)
+
+    def _iter_pages(self, list_func, attr, perPage=1000):
+        """
+        Used to iterate over all pages of a list method.
+
+        Every page is fetched through this api object, so its timeout and deadline apply to each request.
+
+        :param list_func: bound list method of this api, e.g. self.list_records
+        :param attr: name of the result attribute holding the models, e.g. 'records'
+        :param perPage: the number of models to request per page
+        :return: generator of data models
+        """
+        page = 1
+        while page:
+            result = list_func(page=page, perPage=perPage)
+            for model in getattr(result, attr):
+                yield model
+            page = result.nextPage
+
+    def _max_workers(self, max_workers=None):
+        """Returns the worker count of bulk helpers, the limiter decides the actual concurrency if set."""
+        if max_workers is not None:
+            return max_workers
+        if self.limiter is not None:
+            return self.limiter.max_limit
+        return DEFAULT_MAX_WORKERS
+
+    def _run_batch(self, items, func, undo=None, max_workers=None):
+        """
+        Used to apply func to items concurrently.
+
+        :param items: iterable of input items
+        :param func: function called with each item, returns a result model
+        :param undo: function called with each succeeded BatchItemResult if any item failed, None disables rollback
+        :param max_workers: number of worker threads
+        :return: an instance of BatchResult with one BatchItemResult per item in input order
+        """
+        max_workers = self._max_workers(max_workers)
+        batch = BatchResult([
+            BatchItemResult(item, result, error)
+            for _, item, result, error in concurrent_map(func, items, max_workers)
+        ])
+
+        if undo is not None and not batch.ok:
+            batch.rollback_errors = [
+                BatchItemResult(applied, error=error)
+                for _, applied, _, error in concurrent_map(undo, batch.succeeded, max_workers)
+                if error is not None
+            ]
+            batch.rolled_back = True
+
+        return batch
+
+    def _forget_missing_domain(self, domainName):
+        """Used to drop the cached 404 responses of a domain once it was created or transferred in."""
+        if self.negative_cache is not None:
+            self.negative_cache.invalidate('{}/v4/domains/{}'.format(self.api_host, domainName), self.auth.username)
+
+    def _search_timeout(self, timeout):
+        """Returns the server side search timeout in milliseconds capped by the remaining deadline."""
+        if self.deadline is None:
+            return timeout
+        return max(0, min(timeout, int(self.deadline.remaining() * 1000)))
+
     def _parse_result(self, resp, parse_func, klass):
         """
         Used to parse response result.
@@ -64,10 +412,49 @@ class _ApiBase(object):
         :param klass: the class of parsed response result this method returns
         :return: an instance of klass with parsed response information
         """
+        if self.recorder is not None:
+            start = _clock()
+            result = self._parse_response(resp, parse_func, klass)
+            self.recorder.parsed(resp, parse_func, klass, _clock() - start)
+            return result
+        return self._parse_response(resp, parse_func, klass)
+
+    def _parse_response(self, resp, parse_func, klass):
+        """Used to parse response result through the profiler or conditional cache, see :meth:`_parse_result`."""
+        if self.profiler is not None and self.profiler.current() is not None:
+            return self._profile_parse(resp, parse_func, klass)
+
+        if self.conditional_cache is not None and resp.request.method == 'GET':
+            return self.conditional_cache.parse(resp, parse_func, klass, self.auth.username)
+
         result = klass(resp)
         parse_func(result, resp.json())
         return result
 
+    def _profile_parse(self, resp, parse_func, klass):
+        """Used to parse response result while timing decode and parse phases of the profiler."""
+        profiler = self.profiler
+        try:
+            if self.conditional_cache is not None and resp.request.method == 'GET':
+                start = _clock()
+                result = self.conditional_cache.parse(resp, parse_func, klass, self.auth.username)
+                profiler.add('parse', _clock() - start)
+                return result
+
+            start = _clock()
+            dct = resp.json()
+            decoded = _clock()
+            result = klass(resp)
+            parse_func(result, dct)
+            profiler.add('decode', decoded - start)
+            profiler.add('parse', _clock() - decoded)
+            return result
+        except Exception:
+            profiler.mark(error=True)
+            raise
+        finally:
+            profiler.finish()
+
 
 class DnsApi(_ApiBase):
     """
@@ -75,7 +462,7 @@ class DnsApi(_ApiBase):
     Official namecom documentation : https://www.name.com/api-docs/DNS
     """
 
-    def __init__(self, domainName, auth, use_test_env=False):
+    def __init__(self, domainName, auth, use_test_env=False, **kwargs):
         """
         Parameters
         ----------
@@ -87,8 +474,11 @@ class DnsApi(_ApiBase):
 
         use_test_env : bool
             whether runs in test environment
+
+        kwargs :
+            optional client settings, see :class:`~namecom.api._ApiBase`
         """
-        super(DnsApi, self).__init__(auth, use_test_env)
+        super(DnsApi, self).__init__(auth, use_test_env, **kwargs)
         self.endpoint = '/v4/domains/{domain_name}/records'.format(domain_name=domainName)
 
     def list_records(self, page=1, perPage=1000):
@@ -213,6 +603,99 @@ class DnsApi(_ApiBase):
         resp = self._do('DELETE', relative_path='/{id}'.format(id=id))
         return self._parse_result(resp, parse_delete_record, DeleteRecordResult)
 
+    def create_records(self, records, max_workers=None, rollback=False):
+        """Creates records in the zone concurrently.
+
+        Parameters
+        ----------
+        records : iterable of :class:`~namecom.Record`
+            records to create, id and fqdn are ignored
+
+        max_workers : int
+            number of concurrent workers, defaults to the limiter's max_limit
+
+        rollback : bool
+            whether to delete the created records if any creation fails
+
+        Returns
+        -------
+        :class:`~namecom.result_models.BatchResult`
+            one :class:`~namecom.result_models.CreateRecordResult` per record in input order
+        """
+        def create(record):
+            return self.create_record(host=record.host, type=record.type, answer=record.answer,
+                                      ttl=record.ttl, priority=record.priority)
+
+        def undo(item):
+            self.delete_record(item.result.record.id)
+
+        return self._run_batch(records, create, undo if rollback else None, max_workers)
+
+    def update_records(self, records, max_workers=None, rollback=False):
+        """Replaces records with the passed records concurrently, matched by id.
+
+        Parameters
+        ----------
+        records : iterable of :class:`~namecom.Record`
+            records to update
+
+        max_workers : int
+            number of concurrent workers, defaults to the limiter's max_limit
+
+        rollback : bool
+            whether to restore the updated records if any update fails,
+            the current records are fetched before updating when enabled
+
+        Returns
+        -------
+        :class:`~namecom.result_models.BatchResult`
+            one :class:`~namecom.result_models.UpdateRecordResult` per record in input order
+        """
+        previous = {}
+
+        def update(record):
+            if rollback:
+                previous[record.id] = self.get_record(record.id).record
+            return self.update_record(record.id, host=record.host, type=record.type, answer=record.answer,
+                                      ttl=record.ttl, priority=record.priority)
+
+        def undo(item):
+            record = previous[item.item.id]
+            self.update_record(record.id, host=record.host, type=record.type, answer=record.answer,
+                               ttl=record.ttl, priority=record.priority)
+
+        return self._run_batch(records, update, undo if rollback else None, max_workers)
+
+    def delete_records(self, records, max_workers=None, rollback=False):
+        """Deletes records from the zone concurrently.
+
+        Parameters
+        ----------
+        records : iterable of :class:`~namecom.Record`
+            records to delete, matched by id
+
+        max_workers : int
+            number of concurrent workers, defaults to the limiter's max_limit
+
+        rollback : bool
+            whether to re-create the deleted records if any deletion fails,
+            re-created records get new ids
+
+        Returns
+        -------
+        :class:`~namecom.result_models.BatchResult`
+            one :class:`~namecom.result_models.DeleteRecordResult` per record in input order
+        """
+        def delete(record):
+            return self.delete_record(record.id)
+
+        def undo(item):
+            record = item.item
+            self.create_record(host=record.host, type=record.type, answer=record.answer,
+                               ttl=record.ttl, priority=record.priority)
+
+        return self._run_batch(records, delete, undo if rollback else None, max_workers)
+
 
 class DnssecApi(_ApiBase):
     """
@@ -221,7 +704,7 @@ class DnssecApi(_ApiBase):
     Official namecom documentation : https://www.name.com/api-docs/DNSSECs
     """
 
-    def __init__(self, domainName, auth, use_test_env=False):
+    def __init__(self, domainName, auth, use_test_env=False, **kwargs):
         """
         Parameters
         ----------
@@ -233,8 +716,11 @@ class DnssecApi(_ApiBase):
 
         use_test_env : bool
             whether runs in test environment
+
+        kwargs :
+            optional client settings, see :class:`~namecom.api._ApiBase`
         """
-        super(DnssecApi, self).__init__(auth, use_test_env)
+        super(DnssecApi, self).__init__(auth, use_test_env, **kwargs)
         self.endpoint = '/v4/domains/{domainName}/dnssec'.format(domainName=domainName)
 
     def list_dnssecs(self, page=1, perPage=1000):
@@ -325,6 +811,48 @@ class DnssecApi(_ApiBase):
         resp = self._do('DELETE', relative_path='/{digest}'.format(digest=digest))
         return self._parse_result(resp, parse_delete_dnssec, DeleteDnssecResult)
 
+    def reconcile(self, desired, delete_missing=True, dry_run=False, max_workers=None):
+        """Makes the DNSSEC keys registered for the domain match the desired ones.
+
+        Keys are matched by digest. Operations are ordered for safe key rollovers: new keys are
+        registered first, and old keys are only removed once every new key was registered.
+        A key whose digest matches but keyTag, algorithm or digestType differ is registered with the
+        desired values first and the old one is removed with the other old keys.
+
+        Parameters
+        ----------
+        desired : iterable of :class:`~namecom.DNSSEC`
+            the complete desired set of DNSSEC keys
+
+        delete_missing : bool
+            whether registered keys absent from desired are removed
+
+        dry_run : bool
+            only computes the plan without applying it
+
+        max_workers : int
+            number of concurrent workers, defaults to the limiter's max_limit
+
+        Returns
+        -------
+        :class:`~namecom.sync.SyncReport`
+            the plan and the outcome of each applied operation, removals skipped
+            because of a failed registration are listed in `skipped`
+        """
+        current = self._iter_pages(self.list_dnssecs, 'dnssecs')
+        plan = plan_sync(current, desired, 'digest', ['keyTag', 'algorithm', 'digestType'], delete_missing)
+        if dry_run:
+            return SyncReport(plan, dry_run=True)
+
+        def create(model):
+            return self.create_dnssec(model.keyTag, model.algorithm, model.digestType, model.digest)
+
+        return apply_plan(self, plan, {
+            'create': create,
+            'update': create,
+            'delete': lambda model: self.delete_dnssec(model.digest),
+        }, max_workers, phased=True, retire_updated=True)
+
 
 class DomainApi(_ApiBase):
     """
@@ -333,7 +861,7 @@ class DomainApi(_ApiBase):
     Official namecom documentation : https://www.name.com/api-docs/domain
     """
 
-    def __init__(self, auth, use_test_env=False):
+    def __init__(self, auth, use_test_env=False, **kwargs):
         """
         Parameters
         ----------
@@ -342,8 +870,11 @@ class DomainApi(_ApiBase):
 
         use_test_env : bool
             whether runs in test environment
+
+        kwargs :
+            optional client settings, see :class:`~namecom.api._ApiBase`
        """
-        super(DomainApi, self).__init__(auth, use_test_env)
+        super(DomainApi, self).__init__(auth, use_test_env, **kwargs)
         self.endpoint = '/v4/domains'
 
     def list_domains(self, page=1, perPage=1000):
@@ -385,6 +916,64 @@ class DomainApi(_ApiBase):
         resp = self._do('GET', relative_path='/{domainName}'.format(domainName=domainName))
         return self._parse_result(resp, parse_get_domain, GetDomainResult)
 
+    def iter_domains(self, domains, max_workers=None, ordered=False):
+        """Fetches the details of many domains concurrently, yielding each outcome as it completes.
+
+        The listing omits some details such as complete contacts, this hydrates them with get_domain.
+        Unless this api object already has a session or a custom transport, requests share a pooled
+        session sized to the worker count, which is closed when the generator finishes.
+
+        Parameters
+        ----------
+        domains : iterable of string or :class:`~namecom.Domain`
+            domains to fetch
+
+        max_workers : int
+            number of concurrent workers, defaults to the limiter's max_limit
+
+        ordered : bool
+            yields in input order if True, otherwise as completed
+
+        Returns
+        -------
+        generator of :class:`~namecom.result_models.BatchItemResult`
+            item is the domain name, result the GetDomainResult, error the exception if it failed
+        """
+        max_workers = self._max_workers(max_workers)
+        pooled = self.session is None and type(self.transport) is RequestsTransport
+        api = self.with_options(session=make_session(max_workers)) if pooled else self
+        names = (getattr(domain, 'domainName', domain) for domain in domains)
+
+        try:
+            for _, domainName, result, error in concurrent_map(api.get_domain, names, max_workers, ordered):
+                yield BatchItemResult(domainName, result, error)
+        finally:
+            if api is not self:
+                api.session.close()
+
+    def get_domains(self, domains, max_workers=None, ordered=True):
+        """Fetches the details of many domains concurrently, see :meth:`iter_domains`.
+
+        A failed domain does not abort the others, it is reported in the failed items.
+
+        Parameters
+        ----------
+        domains : iterable of string or :class:`~namecom.Domain`
+            domains to fetch
+
+        max_workers : int
+            number of concurrent workers, defaults to the limiter's max_limit
+
+        ordered : bool
+            items are in input order if True, otherwise in completion order
+
+        Returns
+        -------
+        :class:`~namecom.result_models.BatchResult`
+            one item per domain, item is the domain name and result the GetDomainResult
+        """
+        return BatchResult(list(self.iter_domains(domains, max_workers, ordered)))
+
     def create_domain(self, domain, purchasePrice, purchaseType='registration',
                       years=1, tldRequirements=None, promoCode=None):
         """
@@ -414,7 +1003,7 @@ class DomainApi(_ApiBase):
         :class:`~namecom.result_models.CreateDomainResult`
             a response result instance with parsed response info
         """
-        data = json_dumps({
+        data = json_bytes({
             'domain': domain,
             'purchasePrice': purchasePrice,
             'purchaseType': purchaseType,
@@ -424,6 +1013,9 @@ class DomainApi(_ApiBase):
         })
 
         resp = self._do('POST', data=data)
+        self._forget_missing_domain(domain.domainName)
+        if self.availability_cache is not None:
+            self.availability_cache.invalidate(domain.domainName)
         return self._parse_result(resp, parse_create_domain, CreateDomainResult)
 
     def enable_autorenew(self, domainName):
@@ -575,7 +1167,7 @@ class DomainApi(_ApiBase):
         :class:`~namecom.result_models.SetContactsResult`
             a response result instance with parsed response info
         """
-        data = json_dumps({
+        data = json_bytes({
             'contacts': contacts
         })
 
@@ -617,6 +1209,8 @@ class DomainApi(_ApiBase):
     def check_availability(self, domainNames, promoCode=None):
         """Check a list of domains to see if they are purchaseable. A Maximum of 50 domains can be specified.
 
+        With an availability cache, only names without a cached result are sent to the api.
+
         Parameters
         ----------
         domainNames : []string
@@ -630,6 +1224,27 @@ class DomainApi(_ApiBase):
         :class:`~namecom.result_models.CheckAvailabilityResult`
             a response result instance with parsed response info
         """
+        cache = self.availability_cache if promoCode is None else None
+        if cache is None:
+            return self._check_availability(domainNames, promoCode)
+
+        cached, missing = cache.lookup(domainNames)
+        if missing:
+            result = self._check_availability(missing, promoCode)
+            cache.add(result.results)
+        else:
+            result = CheckAvailabilityResult(self._cached_response(':checkAvailability'))
+
+        fetched = result.results
+        merged = dict(cached)
+        for model in fetched:
+            merged.setdefault(model.domainName.lower(), model)
+        requested = set(name.lower() for name in domainNames)
+        result.results = [merged[name.lower()] for name in domainNames if name.lower() in merged]
+        result.results += [model for model in fetched if model.domainName.lower() not in requested]
+        return result
+
+    def _check_availability(self, domainNames, promoCode):
         data = json_dumps({
             'domainNames': domainNames,
             'promoCode': promoCode
@@ -638,9 +1253,15 @@ class DomainApi(_ApiBase):
         resp = self._do('POST', relative_path=':checkAvailability', data=data)
         return self._parse_result(resp, parse_check_availability, CheckAvailabilityResult)
 
+    def _cached_response(self, relative_path):
+        """Returns an empty 200 response for results served from the availability cache."""
+        return build_response('POST', self.api_host + self.endpoint + relative_path, 200, {}, b'')
+
     def search(self, keyword, tldFilter=None, timeout=1000, promoCode=None):
         """Perform a search for specified keywords.
 
+        With an availability cache, a repeated query is served while all of its results are cached.
+
         Parameters
         ----------
         keyword : string
@@ -660,15 +1281,27 @@ class DomainApi(_ApiBase):
         :class:`~namecom.result_models.SearchResult`
             a response result instance with parsed response info
         """
+        cache = self.availability_cache if promoCode is None else None
+        key = (keyword, tuple(tldFilter or []))
+        if cache is not None:
+            results = cache.get_query(key)
+            if results is not None:
+                result = SearchResult(self._cached_response(':search'))
+                result.results = results
+                return result
+
         data = json_dumps({
             'keyword': keyword,
             'tldFilter': tldFilter if tldFilter else [],
-            'timeout': timeout,
+            'timeout': self._search_timeout(timeout),
             'promoCode': promoCode
         })
 
         resp = self._do('POST', relative_path=':search', data=data)
-        return self._parse_result(resp, parse_search, SearchResult)
+        result = self._parse_result(resp, parse_search, SearchResult)
+        if cache is not None:
+            cache.set_query(key, result.results)
+        return result
 
     def search_stream(self, keyword, tldFilter=None, timeout=1000, promoCode=None):
         """Return JSON encoded SearchResults as they are recieved from the registry
@@ -692,17 +1325,30 @@ class DomainApi(_ApiBase):
         :class:`~namecom.result_models.SearchStreamResult`
             a response result instance with parsed response info
         """
+        cache = self.availability_cache if promoCode is None else None
+        key = (keyword, tuple(tldFilter or []))
+        if cache is not None:
+            results = cache.get_query(key)
+            if results is not None:
+                result = SearchStreamResult(self._cached_response(':searchStream'))
+                result.results = iter(results)
+                return result
+
         data = json_dumps({
             'keyword': keyword,
             'tldFilter': tldFilter if tldFilter else [],
-            'timeout': timeout,
+            'timeout': self._search_timeout(timeout),
             'promoCode': promoCode
         })
 
         resp = self._do('POST', relative_path=':searchStream', data=data, stream=True)
         result = SearchStreamResult(resp)
         parse_search_stream(result, resp)
+        if self.profiler is not None:
+            self.profiler.finish()
 
+        if cache is not None:
+            result.results = cache.stream(key, result.results)
         return result
 
 
@@ -713,7 +1359,7 @@ class EmailForwardingApi(_ApiBase):
     Official namecom documentation : https://www.name.com/api-docs/EmailForwardings
     """
 
-    def __init__(self, domainName, auth, use_test_env=False):
+    def __init__(self, domainName, auth, use_test_env=False, **kwargs):
         """
         Parameters
         ----------
@@ -725,8 +1371,11 @@ class EmailForwardingApi(_ApiBase):
 
         use_test_env : bool
             whether runs in test environment
+
+        kwargs :
+            optional client settings, see :class:`~namecom.api._ApiBase`
         """
-        super(EmailForwardingApi, self).__init__(auth, use_test_env)
+        super(EmailForwardingApi, self).__init__(auth, use_test_env, **kwargs)
         self.endpoint = '/v4/domains/{domain_name}/email/forwarding'.format(domain_name=domainName)
 
     def list_email_forwardings(self, perPage=1000, page=1):
@@ -834,6 +1483,42 @@ class EmailForwardingApi(_ApiBase):
         resp = self._do('DELETE', relative_path='/{emailBox}'.format(emailBox=emailBox))
         return self._parse_result(resp, parse_delete_email_forwarding, DeleteEmailForwardingResult)
 
+    def sync(self, desired, delete_missing=True, dry_run=False, max_workers=None):
+        """Makes the email forwardings of the domain match the desired ones.
+
+        Current entries are read from all pages of list_email_forwardings and matched by emailBox,
+        only entries that are missing, point to another emailTo or are not desired are changed.
+
+        Parameters
+        ----------
+        desired : iterable of :class:`~namecom.EmailForwarding`
+            the complete desired set of email forwardings
+
+        delete_missing : bool
+            whether current entries absent from desired are deleted
+
+        dry_run : bool
+            only computes the plan without applying it
+
+        max_workers : int
+            number of concurrent workers, defaults to the limiter's max_limit
+
+        Returns
+        -------
+        :class:`~namecom.sync.SyncReport`
+            the plan and the outcome of each applied operation
+        """
+        current = self._iter_pages(self.list_email_forwardings, 'email_forwardings')
+        plan = plan_sync(current, desired, 'emailBox', ['emailTo'], delete_missing)
+        if dry_run:
+            return SyncReport(plan, dry_run=True)
+
+        return apply_plan(self, plan, {
+            'create': lambda model: self.create_email_forwarding(model.emailBox, model.emailTo),
+            'update': lambda model: self.update_email_forwarding(model.emailBox, model.emailTo),
+            'delete': lambda model: self.delete_email_forwarding(model.emailBox),
+        }, max_workers)
+
 
 class TransferApi(_ApiBase):
     """
@@ -842,7 +1527,7 @@ class TransferApi(_ApiBase):
     Official namecom documentation : https://www.name.com/api-docs/Transfers
     """
 
-    def __init__(self, auth, use_test_env=False):
+    def __init__(self, auth, use_test_env=False, **kwargs):
         """
         Parameters
         ----------
@@ -851,8 +1536,11 @@ class TransferApi(_ApiBase):
 
         use_test_env : bool
             whether runs in test environment
+
+        kwargs :
+            optional client settings, see :class:`~namecom.api._ApiBase`
         """
-        super(TransferApi, self).__init__(auth, use_test_env)
+        super(TransferApi, self).__init__(auth, use_test_env, **kwargs)
         self.endpoint = '/v4/transfers'
 
     def list_transfers(self, page=1, perPage=1000):
@@ -923,6 +1611,7 @@ class TransferApi(_ApiBase):
         })
 
         resp = self._do('POST', data=data)
+        self._forget_missing_domain(domainName)
         return self._parse_result(resp, parse_create_transfer, CreateTransferResult)
 
     def cancel_transfer(self, domainName):
@@ -944,7 +1633,7 @@ class TransferApi(_ApiBase):
 
 class URLForwardingApi(_ApiBase):
 
-    def __init__(self, domainName, auth, use_test_env=False):
+    def __init__(self, domainName, auth, use_test_env=False, **kwargs):
         """
         Parameters
         ----------
@@ -956,8 +1645,11 @@ class URLForwardingApi(_ApiBase):
 
         use_test_env : bool
             whether runs in test environment
+
+        kwargs :
+            optional client settings, see :class:`~namecom.api._ApiBase`
         """
-        super(URLForwardingApi, self).__init__(auth, use_test_env)
+        super(URLForwardingApi, self).__init__(auth, use_test_env, **kwargs)
         self.endpoint = '/v4/domains/{domainName}/url/forwarding'.format(domainName=domainName)
 
     def list_url_forwardings(self, page=1, perPage=1000):
@@ -1089,10 +1781,48 @@ class URLForwardingApi(_ApiBase):
         resp = self._do('DELETE', relative_path='/{host}'.format(host=host))
         return self._parse_result(resp, parse_delete_url_forwarding, DeleteURLForwardingResult)
 
+    def sync(self, desired, delete_missing=True, dry_run=False, max_workers=None):
+        """Makes the URL forwardings of the domain match the desired ones.
+
+        Current entries are read from all pages of list_url_forwardings and matched by host,
+        an entry is only updated if its forwardsTo, type, title or meta differ.
+
+        Parameters
+        ----------
+        desired : iterable of :class:`~namecom.URLForwarding`
+            the complete desired set of URL forwardings
+
+        delete_missing : bool
+            whether current entries absent from desired are deleted
+
+        dry_run : bool
+            only computes the plan without applying it
+
+        max_workers : int
+            number of concurrent workers, defaults to the limiter's max_limit
+
+        Returns
+        -------
+        :class:`~namecom.sync.SyncReport`
+            the plan and the outcome of each applied operation
+        """
+        current = self._iter_pages(self.list_url_forwardings, 'url_forwardings')
+        plan = plan_sync(current, desired, 'host', ['forwardsTo', 'type', 'title', 'meta'], delete_missing)
+        if dry_run:
+            return SyncReport(plan, dry_run=True)
+
+        return apply_plan(self, plan, {
+            'create': lambda model: self.create_url_forwarding(model.host, model.forwardsTo, model.type,
+                                                               model.title, model.meta),
+            'update': lambda model: self.update_url_forwarding(model.host, model.forwardsTo, model.type,
+                                                               model.title, model.meta),
+            'delete': lambda model: self.delete_url_forwarding(model.host),
+        }, max_workers)
+
 
 class VanityNameserverApi(_ApiBase):
 
-    def __init__(self, domainName, auth, use_test_env=False):
+    def __init__(self, domainName, auth, use_test_env=False, **kwargs):
         """
         Parameters
         ----------
@@ -1104,8 +1834,11 @@ class VanityNameserverApi(_ApiBase):
 
         use_test_env : bool
             whether runs in test environment
+
+        kwargs :
+            optional client settings, see :class:`~namecom.api._ApiBase`
         """
-        super(VanityNameserverApi, self).__init__(auth, use_test_env)
+        super(VanityNameserverApi, self).__init__(auth, use_test_env, **kwargs)
         self.endpoint = '/v4/domains/{domainName}/vanity_nameservers'.format(domainName=domainName)
 
     def list_vanity_nameservers(self, page=1, perPage=1000):
@@ -1215,3 +1948,53 @@ class VanityNameserverApi(_ApiBase):
         resp = self._do('DELETE', relative_path='/{hostname}'.format(hostname=hostname))
         return self._parse_result(resp, parse_delete_vanity_nameserver, DeleteVanityNameserverResult)
 
+    def reconcile(self, desired, delete_missing=True, dry_run=False, max_workers=None):
+        """Makes the vanity nameservers of the domain match the desired ones.
+
+        Nameservers are matched by hostname. Since the listing omits IP addresses, the details of
+        listed nameservers that are also desired are fetched concurrently to compare their ips,
+        ignoring order. Nameservers are created and updated before unwanted ones are deleted,
+        and deletes are skipped if any create or update failed.
+
+        Parameters
+        ----------
+        desired : iterable of :class:`~namecom.VanityNameserver`
+            the complete desired set of vanity nameservers
+
+        delete_missing : bool
+            whether nameservers absent from desired are deleted
+
+        dry_run : bool
+            only computes the plan without applying it
+
+        max_workers : int
+            number of concurrent workers, defaults to the limiter's max_limit
+
+        Returns
+        -------
+        :class:`~namecom.sync.SyncReport`
+            the plan and the outcome of each applied operation
+        """
+        desired = list(desired)
+        wanted = set(model.hostname for model in desired)
+        listed = list(self._iter_pages(self.list_vanity_nameservers, 'vanityNameservers'))
+
+        details = self._run_batch([model for model in listed if model.hostname in wanted],
+                                  lambda model: self.get_vanity_nameserver(model.hostname).vanityNameserver,
+                                  max_workers=max_workers)
+        for item in details.failed:
+            raise item.error
+        fetched = dict((item.item.hostname, item.result) for item in details)
+        current = [fetched.get(model.hostname, model) for model in listed]
+
+        plan = plan_sync(current, desired, 'hostname', ['ips'], delete_missing,
+                         normalize={'ips': lambda ips: sorted(ips or [])})
+        if dry_run:
+            return SyncReport(plan, dry_run=True)
+
+        return apply_plan(self, plan, {
+            'create': lambda model: self.create_vanity_nameserver(model.hostname, model.ips),
+            'update': lambda model: self.update_vanity_nameserver(model.hostname, model.ips),
+            'delete': lambda model: self.delete_vanity_nameserver(model.hostname),
+        }, max_workers, phased=True)
+
@@ -8,6 +8,8 @@ Tianhong Chu [https://github.com/CtheSky]
 License: MIT
 """
 
+from .rate_limit import RateLimitStatus
+
 __all__ = ['Auth']
 
 
@@ -16,6 +18,11 @@ class Auth(object):
     The class for http basic authentication.
     Used by api class to do authenticate request.
     Could be found at token manage page: https://www.name.com/account/settings/api
+
+    Attributes
+    ----------
+    rate_limit : :class:`~namecom.RateLimitStatus`
+        live quota status, updated by every api object using this auth
     """
 
     def __init__(self, username, token):
@@ -29,3 +36,4 @@ class Auth(object):
         """
         self.username = username
         self.token = token
+        self.rate_limit = RateLimitStatus()
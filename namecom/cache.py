@@ -0,0 +1,479 @@
+"""
+namecom: cache.py
+
+Implements caches used by api classes to avoid
+transferring and parsing unchanged resources.
+
+Tianhong Chu [https://github.com/CtheSky]
+License: MIT
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from requests.structures import CaseInsensitiveDict
+
+from .utils import build_response
+
+__all__ = ['ConditionalCache', 'CacheBackend', 'MemoryCacheBackend', 'SQLiteCacheBackend', 'ReadCache',
+           'NegativeCache', 'AvailabilityCache']
+
+_logger = logging.getLogger(__name__)
+
+
+def _scoped(account, key):
+    """Returns key prefixed with a hash of the account, so accounts sharing a cache never see each other's entries."""
+    if account is None:
+        return key
+    return hashlib.sha1(account.encode('utf-8')).hexdigest()[:16] + ' ' + key
+
+
+class _Validators(object):
+    """Validators and parsed result of a cached response."""
+
+    def __init__(self, etag, last_modified, digest, result):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+        self.result = result
+
+
+class ConditionalCache(object):
+    """
+    The class stores response validators and parsed results of GET requests.
+
+    When a url is requested again, the stored `ETag` and `Last-Modified` values are sent as
+    `If-None-Match` and `If-Modified-Since`, and a 304 response reuses the previously parsed result.
+    If the server does not emit validators, a hash of the response body is compared instead,
+    which skips json decoding and model construction for unchanged resources.
+
+    The cache is keyed by account and full url, so one instance can be shared by many api objects.
+    It keeps at most `maxsize` urls, evicting the least recently used. Cached results are
+    returned to every caller of the same url, so they should be treated as read-only. A 304
+    refreshes the headers of the cached result, except those describing the body.
+    """
+
+    _BODY_HEADERS = frozenset(['content-length', 'content-type', 'content-encoding', 'transfer-encoding'])
+
+    def __init__(self, maxsize=1024):
+        """
+        Parameters
+        ----------
+        maxsize : int
+            maximum number of urls to keep
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, url):
+        with self._lock:
+            entry = self._entries.pop(url, None)
+            if entry is not None:
+                self._entries[url] = entry
+            return entry
+
+    def request_headers(self, url, account=None):
+        """Returns the conditional request headers for url requested by account."""
+        entry = self._get(_scoped(account, url))
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def __contains__(self, key):
+        """Returns whether validators are stored for key, a (url, account) tuple."""
+        url, account = key
+        with self._lock:
+            return _scoped(account, url) in self._entries
+
+    def parse(self, resp, parse_func, klass, account=None):
+        """
+        Returns the result for a GET response, reusing the cached result if unchanged.
+
+        :param resp: http response from requests module
+        :param parse_func: helper function from utils.parse_utils module
+        :param klass: the class of parsed response result
+        :param account: username of the auth the request was sent with
+        :return: an instance of klass
+        """
+        url = _scoped(account, resp.url)
+        entry = self._get(url)
+
+        if resp.status_code == 304:
+            if entry is None:
+                raise ValueError('304 Not Modified for {} but its cached result was evicted, '
+                                 'maxsize {} is too small'.format(resp.url, self.maxsize))
+            self.hits += 1
+            headers = CaseInsensitiveDict(entry.result.headers)
+            headers.update((name, value) for name, value in resp.headers.items()
+                           if name.lower() not in self._BODY_HEADERS)
+            entry.result.headers = headers
+            entry.etag = resp.headers.get('ETag', entry.etag)
+            entry.last_modified = resp.headers.get('Last-Modified', entry.last_modified)
+            return entry.result
+
+        etag = resp.headers.get('ETag')
+        last_modified = resp.headers.get('Last-Modified')
+        digest = None
+        if not etag and not last_modified:
+            digest = hashlib.sha1(resp.content).hexdigest()
+            if entry is not None and entry.digest == digest:
+                self.hits += 1
+                return entry.result
+
+        self.misses += 1
+        result = klass(resp)
+        parse_func(result, resp.json())
+
+        with self._lock:
+            self._entries.pop(url, None)
+            self._entries[url] = _Validators(etag, last_modified, digest, result)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        return result
+
+    def invalidate(self, prefix='', account=None):
+        """Removes urls of account starting with prefix, all urls of all accounts by default."""
+        prefix = _scoped(account, prefix)
+        with self._lock:
+            for url in [url for url in self._entries if url.startswith(prefix)]:
+                del self._entries[url]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CacheBackend(object):
+    """
+    The interface of storages used by :class:`~namecom.ReadCache`.
+
+    Keys are strings, values are bytes. Implementations must be safe to use from multiple threads.
+    """
+
+    def get(self, key):
+        """Returns the value for key, or None if missing or expired."""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        """Stores value for key, expiring after ttl seconds."""
+        raise NotImplementedError
+
+    def invalidate(self, prefix=''):
+        """Atomically removes all keys starting with prefix, all keys by default."""
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    The class stores values in the memory of the current process, keeping
+    at most `maxsize` keys and evicting the least recently used.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[1] <= time.time():
+                return None
+            self._entries[key] = entry
+            return entry[0]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, time.time() + ttl)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, prefix=''):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    The class stores values in an SQLite database file, so the cache is shared by all
+    processes on a host that open the same path, e.g. the workers of a gunicorn server.
+
+    The database runs in WAL mode so readers do not block the writer, and every write is
+    a single transaction, which makes prefix invalidation atomic for all processes.
+    Expired rows are purged every `purge_every` writes.
+    """
+
+    def __init__(self, path, purge_every=1000, timeout=5.0):
+        """
+        Parameters
+        ----------
+        path : string
+            path of the database file, created if missing
+
+        purge_every : int
+            number of writes between two purges of expired rows
+
+        timeout : float
+            seconds to wait for a lock held by another process
+        """
+        self.path = path
+        self.purge_every = purge_every
+        self.timeout = timeout
+
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        """
+        Returns the connection of this thread, opened on first use.
+
+        Connections are never opened in the constructor and are reopened in a forked child,
+        so a backend created before a fork, e.g. with gunicorn --preload, is safe to use in the workers.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with conn:
+                conn.execute('CREATE TABLE IF NOT EXISTS namecom_cache '
+                             '(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT value FROM namecom_cache WHERE key = ? AND expires > ?', (key, time.time())).fetchone()
+        return bytes(row[0]) if row is not None else None
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute('INSERT OR REPLACE INTO namecom_cache (key, value, expires) VALUES (?, ?, ?)',
+                         (key, sqlite3.Binary(value), now + ttl))
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                conn.execute('DELETE FROM namecom_cache WHERE expires <= ?', (now,))
+
+    def invalidate(self, prefix=''):
+        with self._connection() as conn:
+            if prefix:
+                # a range scan on the primary key, LIKE would need escaping and skip the index
+                conn.execute('DELETE FROM namecom_cache WHERE key >= ? AND key < ?', (prefix, prefix + u'\uffff'))
+            else:
+                conn.execute('DELETE FROM namecom_cache')
+
+
+class ReadCache(object):
+    """
+    The class serves repeated GET requests from a :class:`~namecom.cache.CacheBackend`
+    without contacting the server while the stored response is younger than `ttl` seconds.
+
+    The response status, validators and body are stored, which is the serialized payload
+    of the parsed models, so any process sharing the backend can rebuild the result.
+    Entries are keyed by account and url, so accounts sharing a backend never get each other's responses.
+    A POST, PUT or DELETE through an api object invalidates every cached url of its account under
+    its endpoint, except domain searches.
+
+    Errors of the backend are logged and never reach the caller: a failed lookup is a miss,
+    a failed store or invalidation is skipped.
+    """
+
+    _HEADERS = ['Content-Type', 'ETag', 'Last-Modified']
+
+    def __init__(self, backend=None, ttl=60):
+        """
+        Parameters
+        ----------
+        backend : :class:`~namecom.cache.CacheBackend`
+            storage to use, defaults to a MemoryCacheBackend
+
+        ttl : float
+            seconds a response is served from the cache
+        """
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttl = ttl
+
+    def get(self, url, account=None):
+        """Returns a requests.Response rebuilt from the cache for url requested by account, or None."""
+        try:
+            value = self.backend.get(_scoped(account, url))
+            if value is None:
+                return None
+            meta, content = value.split(b'\n', 1)
+            meta = json.loads(meta.decode('utf-8'))
+        except Exception:
+            _logger.warning('reading %s from the cache failed, treating it as a miss', url, exc_info=True)
+            return None
+        return build_response('GET', url, meta['status'], meta['headers'], content)
+
+    def set(self, url, resp, account=None):
+        """Stores a successful GET response to url requested by account."""
+        headers = dict((name, resp.headers[name]) for name in self._HEADERS if name in resp.headers)
+        meta = json.dumps({'status': resp.status_code, 'headers': headers}).encode('utf-8')
+        try:
+            self.backend.set(_scoped(account, url), meta + b'\n' + resp.content, self.ttl)
+        except Exception:
+            _logger.warning('storing %s in the cache failed', url, exc_info=True)
+
+    def invalidate(self, prefix='', account=None):
+        """Removes cached urls of account starting with prefix, all urls of all accounts by default."""
+        try:
+            self.backend.invalidate(_scoped(account, prefix))
+        except Exception:
+            _logger.warning('invalidating %s in the cache failed', prefix, exc_info=True)
+
+
+class NegativeCache(ReadCache):
+    """
+    The class remembers GET requests that failed with 404 Not Found for a short `ttl`,
+    so repeated lookups of a missing resource raise :class:`~namecom.exceptions.NotFoundError`
+    without contacting the server.
+
+    A POST, PUT or DELETE through an api object invalidates every cached url under its endpoint,
+    except domain searches, so a resource created by the same client is found on the next lookup. Creating or
+    transferring in a domain also forgets the 404 responses of that domain. Resources created by
+    other clients are reported missing until the entry expires.
+    """
+
+    def __init__(self, backend=None, ttl=10):
+        """
+        Parameters
+        ----------
+        backend : :class:`~namecom.cache.CacheBackend`
+            storage to use, defaults to a MemoryCacheBackend
+
+        ttl : float
+            seconds a 404 response is remembered
+        """
+        super(NegativeCache, self).__init__(backend, ttl)
+
+
+class AvailabilityCache(object):
+    """
+    The class keeps :class:`~namecom.DomainSearchResult` by domain name for a short `ttl`.
+
+    :meth:`~namecom.DomainApi.check_availability` only sends the names missing from the cache,
+    :meth:`~namecom.DomainApi.search` and :meth:`~namecom.DomainApi.search_stream` store their
+    results by name and serve a repeated query while every name it returned is still cached.
+    Creating a domain through an api object removes its name. Calls with a promoCode bypass
+    the cache since it changes prices.
+
+    It keeps at most `maxsize` names and `maxsize` queries, evicting the least recently used.
+    Cached results are shared by all callers, so they should be treated as read-only.
+    """
+
+    def __init__(self, ttl=30, maxsize=4096):
+        """
+        Parameters
+        ----------
+        ttl : float
+            seconds a search result is served from the cache
+
+        maxsize : int
+            maximum number of domain names and of queries to keep
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+        self._results = OrderedDict()
+        self._queries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _fresh(entries, key):
+        entry = entries.pop(key, None)
+        if entry is None or entry[1] <= time.time():
+            return None
+        entries[key] = entry
+        return entry[0]
+
+    def _store(self, entries, key, value):
+        entries.pop(key, None)
+        entries[key] = (value, time.time() + self.ttl)
+        while len(entries) > self.maxsize:
+            entries.popitem(last=False)
+
+    def lookup(self, domainNames):
+        """
+        Splits domain names into cached results and names to request.
+
+        :param domainNames: list of domain names
+        :return: (dict of lowercased domain name -> DomainSearchResult, list of missing domain names)
+        """
+        found, missing = {}, []
+        with self._lock:
+            for name in domainNames:
+                result = self._fresh(self._results, name.lower())
+                if result is None:
+                    missing.append(name)
+                else:
+                    found[name.lower()] = result
+        self.hits += len(found)
+        self.misses += len(missing)
+        return found, missing
+
+    def add(self, results):
+        """Stores an iterable of DomainSearchResult."""
+        with self._lock:
+            for result in results:
+                self._store(self._results, result.domainName.lower(), result)
+
+    def get_query(self, key):
+        """Returns the cached results of a search query, None unless all of them are cached."""
+        with self._lock:
+            names = self._fresh(self._queries, key)
+            if names is None:
+                return None
+            results = [self._fresh(self._results, name) for name in names]
+        if any(result is None for result in results):
+            return None
+        self.hits += 1
+        return results
+
+    def set_query(self, key, results):
+        """Stores the results of a search query."""
+        results = list(results)
+        self.add(results)
+        with self._lock:
+            self._store(self._queries, key, [result.domainName.lower() for result in results])
+
+    def stream(self, key, results):
+        """Yields from an iterable of DomainSearchResult, storing each result and the query once exhausted."""
+        seen = []
+        for result in results:
+            self.add([result])
+            seen.append(result)
+            yield result
+        self.set_query(key, seen)
+
+    def invalidate(self, domainName=None):
+        """Removes a domain name, all names and queries by default."""
+        with self._lock:
+            if domainName is None:
+                self._results.clear()
+                self._queries.clear()
+            else:
+                self._results.pop(domainName.lower(), None)
+
+    def __len__(self):
+        return len(self._results)
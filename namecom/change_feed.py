@@ -0,0 +1,292 @@
+"""
+namecom: change_feed.py
+
+Implements ChangeFeed which polls the account and emits
+events when domains or their records change.
+
+Tianhong Chu [https://github.com/CtheSky]
+License: MIT
+"""
+
+import logging
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from .account import AccountReader
+from .api import DomainApi
+from .cache import ConditionalCache
+from .concurrency import concurrent_map
+
+__all__ = ['ChangeEvent', 'ChangeFeed']
+
+ADDED = 'added'
+REMOVED = 'removed'
+MODIFIED = 'modified'
+
+_STOP = object()
+
+_logger = logging.getLogger(__name__)
+
+
+def diff_snapshots(resource, old, new):
+    """
+    Compares two snapshots of a resource.
+
+    :param resource: name of the resource, e.g. 'domain'
+    :param old: dict of key -> model from the previous poll
+    :param new: dict of key -> model from the current poll
+    :return: list of ChangeEvent
+    """
+    events = []
+    for key, model in new.items():
+        previous = old.get(key)
+        if previous is None:
+            events.append(ChangeEvent(ADDED, resource, key, None, model))
+        elif previous != model:
+            events.append(ChangeEvent(MODIFIED, resource, key, previous, model, previous.diff(model)))
+    for key, model in old.items():
+        if key not in new:
+            events.append(ChangeEvent(REMOVED, resource, key, model, None))
+    return events
+
+
+class ChangeEvent(object):
+    """
+    The class describes a change between two polls.
+
+    Attributes
+    ----------
+    kind : string
+        one of 'added', 'removed', 'modified'
+
+    resource : string
+        'domain' or 'record'
+
+    key :
+        domainName for domains, (domainName, id) for records
+
+    old : :class:`~namecom.data_models.DataModel`
+        the model before the change, None if added
+
+    new : :class:`~namecom.data_models.DataModel`
+        the model after the change, None if removed
+
+    changes : dict
+        field -> (old value, new value) for modified models
+    """
+
+    def __init__(self, kind, resource, key, old, new, changes=None):
+        self.kind = kind
+        self.resource = resource
+        self.key = key
+        self.old = old
+        self.new = new
+        self.changes = changes if changes is not None else {}
+
+    def __repr__(self):
+        return 'ChangeEvent(kind={!r}, resource={!r}, key={!r}, changes={!r})'.format(
+            self.kind, self.resource, self.key, sorted(self.changes))
+
+
+class ChangeFeed(object):
+    """
+    The class polls domains and records of an account and emits typed change events.
+
+    Each poll lists all domains, optionally fetches their details (nameservers and contacts
+    are only complete in get_domain) and lists the records of every watched domain.
+    Requests go through a :class:`~namecom.ConditionalCache`, so unchanged pages are
+    revalidated instead of transferred and parsed again. The feed grows the cache it creates
+    to hold every url of a poll, a cache passed as `conditional_cache` must be large enough
+    itself, otherwise its least recently used entries are evicted before they are reused.
+    The snapshot is diffed against the previous one using model equality.
+
+    A poll that fails while running in the background is reported to `on_error` and retried
+    at the next interval against the last successful snapshot.
+
+    Events are delivered to callbacks registered with :meth:`subscribe`, and to consumers
+    iterating the feed with `for event in feed` or `async for event in feed`.
+
+    Example:
+        feed = ChangeFeed(auth, interval=60)
+        feed.subscribe(lambda event: print(event))
+        feed.start()
+    """
+
+    def __init__(self, auth, use_test_env=False, interval=60, domains=None, domain_details=False,
+                 watch_records=True, max_workers=None, on_error=None, **kwargs):
+        """
+        Parameters
+        ----------
+        auth : :class:`~namecom.Auth`
+            http authentication to use
+
+        use_test_env : bool
+            whether runs in test environment
+
+        interval : float
+            seconds between two polls
+
+        domains : []string
+            domains to watch, None for all domains in the account
+
+        domain_details : bool
+            whether to fetch get_domain for each domain, needed to detect nameserver and contact changes
+
+        watch_records : bool
+            whether to watch the dns records of each domain
+
+        max_workers : int
+            size of the thread pool, defaults to the limiter's max_limit
+
+        on_error : callable
+            called with the exception of a failed background poll, by default it is logged
+
+        kwargs :
+            optional client settings, see :class:`~namecom.api._ApiBase`
+        """
+        self._own_cache = kwargs.get('conditional_cache') is None
+        if self._own_cache:
+            kwargs['conditional_cache'] = ConditionalCache()
+
+        self.interval = interval
+        self.domains = domains
+        self.domain_details = domain_details
+        self.watch_records = watch_records
+        self.on_error = on_error
+        self.last_error = None
+
+        self._cache = kwargs['conditional_cache']
+        self._domain_api = DomainApi(auth, use_test_env, **kwargs)
+        self._reader = AccountReader(auth, use_test_env, max_workers, **kwargs)
+        self._snapshot = None
+        self._callbacks = []
+        self._queue = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback):
+        """Registers a callback called with each ChangeEvent."""
+        self._callbacks.append(callback)
+
+    def unsubscribe(self, callback):
+        """Removes a registered callback."""
+        self._callbacks.remove(callback)
+
+    def _take_snapshot(self):
+        domains = dict(
+            (domain.domainName, domain)
+            for domain in self._domain_api._iter_pages(self._domain_api.list_domains, 'domains')
+            if self.domains is None or domain.domainName in self.domains
+        )
+
+        if self.domain_details:
+            api = self._domain_api
+            for _, name, result, error in concurrent_map(api.get_domain, list(domains), self._reader.max_workers):
+                if error is not None:
+                    raise error
+                domains[name] = result.domain
+
+        records = {}
+        if self.watch_records:
+            for domainName, models in self._reader.iter_records(list(domains)):
+                for record in models:
+                    records[(domainName, record.id)] = record
+
+        if self._own_cache:
+            # listing pages, domain details and record listings of every domain
+            self._cache.maxsize = max(self._cache.maxsize, 2 * len(domains) + len(records) // 1000 + 64)
+
+        return {'domain': domains, 'record': records}
+
+    def poll(self):
+        """
+        Polls the account once and emits the changes since the previous poll.
+
+        The first poll only records the baseline and emits nothing.
+
+        :return: list of ChangeEvent
+        """
+        snapshot = self._take_snapshot()
+        previous, self._snapshot = self._snapshot, snapshot
+        if previous is None:
+            return []
+
+        events = []
+        for resource in ['domain', 'record']:
+            events.extend(diff_snapshots(resource, previous[resource], snapshot[resource]))
+
+        for event in events:
+            for callback in list(self._callbacks):
+                callback(event)
+            if self._queue is not None:
+                self._queue.put(event)
+
+        return events
+
+    def run(self):
+        """Polls at the configured interval until :meth:`stop` is called."""
+        while not self._stopped.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                self.last_error = e
+                if self.on_error is not None:
+                    self.on_error(e)
+                else:
+                    _logger.exception('change feed poll failed, retrying in %ss', self.interval)
+            self._stopped.wait(self.interval)
+
+    def start(self):
+        """Starts polling in a daemon thread."""
+        self._stopped.clear()
+        if self._queue is not None:
+            self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self.run, name='namecom-change-feed')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stops polling and ends running iterations."""
+        self._stopped.set()
+        if self._queue is not None:
+            self._queue.put(_STOP)
+
+    def _next_event(self):
+        if self._queue is None:
+            self._queue = queue.Queue()
+        event = self._queue.get()
+        if event is _STOP:
+            self._queue.put(_STOP)
+        return event
+
+    def __iter__(self):
+        if self._queue is None:
+            self._queue = queue.Queue()
+        return self._iter_events()
+
+    def _iter_events(self):
+        while True:
+            event = self._next_event()
+            if event is _STOP:
+                return
+            yield event
+
+    def __aiter__(self):
+        if self._queue is None:
+            self._queue = queue.Queue()
+        return self
+
+    def __anext__(self):
+        import asyncio
+
+        def next_event():
+            event = self._next_event()
+            if event is _STOP:
+                raise StopAsyncIteration
+            return event
+
+        return asyncio.get_event_loop().run_in_executor(None, next_event)
@@ -0,0 +1,141 @@
+"""
+namecom: circuit_breaker.py
+
+Implements a circuit breaker that api classes use to fail fast
+while the name.com service is failing or responding slowly.
+
+Tianhong Chu [https://github.com/CtheSky]
+License: MIT
+"""
+
+import threading
+
+from .exceptions import CircuitOpenError
+from .utils.time_utils import clock as _clock
+
+__all__ = ['CircuitBreaker']
+
+
+class _Circuit(object):
+    """State of a single circuit, guarded by the lock of its CircuitBreaker."""
+
+    def __init__(self):
+        self.state = CircuitBreaker.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.probes = 0
+
+
+class CircuitBreaker(object):
+    """
+    The class tracks failures and latency of api calls and stops sending requests
+    after too many of them failed in a row.
+
+    Each circuit is keyed by an `(api_host, endpoint_family)` tuple, so production and
+    test environment, as well as different api classes, are tracked separately.
+    One instance is meant to be shared by all api objects of a process.
+
+    A circuit goes through three states:
+      1. closed: requests are sent, consecutive failures are counted
+      2. open: requests fail fast with :class:`~namecom.exceptions.CircuitOpenError`
+      3. half open: after `recovery_timeout` seconds, up to `half_open_probes` requests
+         are let through as probes, a success closes the circuit and a failure opens it again
+
+    A call counts as a failure when it raises a connection error, gets a 5xx response,
+    or takes longer than `slow_call_duration` seconds.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30, slow_call_duration=None, half_open_probes=1):
+        """
+        Parameters
+        ----------
+        failure_threshold : int
+            number of consecutive failures that opens the circuit
+
+        recovery_timeout : float
+            seconds an open circuit waits before letting probe requests through
+
+        slow_call_duration : float
+            calls taking longer than this many seconds count as failures, None disables it
+
+        half_open_probes : int
+            number of concurrent probe requests allowed while half open
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.slow_call_duration = slow_call_duration
+        self.half_open_probes = half_open_probes
+
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def _get_circuit(self, key):
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = self._circuits[key] = _Circuit()
+        return circuit
+
+    def state(self, key):
+        """Returns the current state of the circuit for key."""
+        with self._lock:
+            circuit = self._get_circuit(key)
+            if circuit.state == self.OPEN and _clock() - circuit.opened_at >= self.recovery_timeout:
+                return self.HALF_OPEN
+            return circuit.state
+
+    def before_call(self, key):
+        """
+        Called before a request is sent.
+
+        Raises :class:`~namecom.exceptions.CircuitOpenError` if the circuit for key
+        does not allow the request to go through.
+        """
+        with self._lock:
+            circuit = self._get_circuit(key)
+
+            if circuit.state == self.OPEN:
+                retry_after = circuit.opened_at + self.recovery_timeout - _clock()
+                if retry_after > 0:
+                    raise CircuitOpenError('circuit {} is open, retry after {:.1f}s'.format(key, retry_after))
+                circuit.state = self.HALF_OPEN
+                circuit.probes = 0
+
+            if circuit.state == self.HALF_OPEN:
+                if circuit.probes >= self.half_open_probes:
+                    raise CircuitOpenError('circuit {} is half open and waiting for probe results'.format(key))
+                circuit.probes += 1
+
+    def record_success(self, key, duration):
+        """Called after a request succeeded, duration is the elapsed time in seconds."""
+        if self.slow_call_duration is not None and duration > self.slow_call_duration:
+            self.record_failure(key, duration)
+            return
+
+        with self._lock:
+            circuit = self._get_circuit(key)
+            circuit.state = self.CLOSED
+            circuit.failures = 0
+            circuit.probes = 0
+
+    def record_failure(self, key, duration):
+        """Called after a request failed, duration is the elapsed time in seconds."""
+        with self._lock:
+            circuit = self._get_circuit(key)
+            circuit.failures += 1
+
+            if circuit.state == self.HALF_OPEN or circuit.failures >= self.failure_threshold:
+                circuit.state = self.OPEN
+                circuit.opened_at = _clock()
+                circuit.probes = 0
+
+    def reset(self, key=None):
+        """Closes the circuit for key, or all circuits if key is None."""
+        with self._lock:
+            if key is None:
+                self._circuits.clear()
+            else:
+                self._circuits.pop(key, None)
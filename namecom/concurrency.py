@@ -0,0 +1,163 @@
+"""
+namecom: concurrency.py
+
+Implements the adaptive concurrency limiter shared by api objects,
+and the thread pool helper used by bulk operations.
+
+Tianhong Chu [https://github.com/CtheSky]
+License: MIT
+"""
+
+import threading
+from multiprocessing.pool import ThreadPool
+
+from .tracing import bind_correlation
+from .utils.time_utils import clock as _clock
+
+__all__ = ['AdaptiveLimiter', 'DEFAULT_MAX_WORKERS', 'concurrent_map']
+
+DEFAULT_MAX_WORKERS = 8
+
+
+class AdaptiveLimiter(object):
+    """
+    The class limits the number of in-flight requests with an AIMD
+    (additive increase, multiplicative decrease) algorithm.
+
+    Each successful call raises the limit by `increase / limit`, which adds about
+    `increase` per round trip when the limit is saturated. A throttled call (429),
+    a server error, a connection error or a call slower than `latency_target`
+    multiplies the limit by `backoff`, at most once per `cooldown` seconds so a burst
+    of failures from the same window only backs off once.
+
+    One instance is meant to be shared by all api objects and bulk helpers of an account.
+    """
+
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=64, latency_target=None,
+                 increase=1.0, backoff=0.5, cooldown=1.0):
+        """
+        Parameters
+        ----------
+        initial_limit : int
+            number of concurrent requests allowed at start
+
+        min_limit : int
+            the limit never goes below this value
+
+        max_limit : int
+            the limit never goes above this value, also the worker count of bulk helpers
+
+        latency_target : float
+            calls slower than this many seconds are treated as congestion, None disables it
+
+        increase : float
+            additive increase per round trip
+
+        backoff : float
+            multiplicative decrease factor, between 0 and 1
+
+        cooldown : float
+            minimum seconds between two decreases
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.increase = increase
+        self.backoff = backoff
+        self.cooldown = cooldown
+
+        self._limit = float(initial_limit)
+        self._inflight = 0
+        self._last_decrease = None
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self):
+        """Current number of concurrent requests allowed."""
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def inflight(self):
+        """Number of requests currently holding a slot."""
+        return self._inflight
+
+    def acquire(self, timeout=None):
+        """
+        Blocks until a slot is available.
+
+        :param timeout: maximum seconds to wait, None waits forever
+        :return: seconds spent waiting, or None if timed out
+        """
+        start = _clock()
+        with self._cond:
+            while self._inflight >= self.limit:
+                remaining = None if timeout is None else timeout - (_clock() - start)
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            self._inflight += 1
+        return _clock() - start
+
+    def cancel(self):
+        """Releases a slot without adjusting the limit, used when no request was sent."""
+        with self._cond:
+            self._inflight -= 1
+            self._cond.notify_all()
+
+    def release(self, duration, throttled=False, failed=False):
+        """
+        Releases a slot and adjusts the limit from the outcome of the call.
+
+        :param duration: elapsed seconds of the call
+        :param throttled: whether the server throttled the call
+        :param failed: whether the call failed with a server or connection error
+        """
+        congested = throttled or failed or (self.latency_target is not None and duration > self.latency_target)
+
+        with self._cond:
+            self._inflight -= 1
+
+            if congested:
+                now = _clock()
+                if self._last_decrease is None or now - self._last_decrease >= self.cooldown:
+                    self._limit = max(float(self.min_limit), self._limit * self.backoff)
+                    self._last_decrease = now
+            else:
+                self._limit = min(float(self.max_limit), self._limit + self.increase / self._limit)
+
+            self._cond.notify_all()
+
+    def __repr__(self):
+        return 'AdaptiveLimiter(limit={}, inflight={}, max_limit={})'.format(self.limit, self._inflight, self.max_limit)
+
+
+def concurrent_map(func, items, max_workers=DEFAULT_MAX_WORKERS, ordered=True):
+    """
+    Applies func to every item on a thread pool.
+
+    Exceptions raised by func are returned instead of raised, so one failing item
+    does not abort the others.
+    Workers run under the correlation id of the calling thread, see :func:`~namecom.tracing.correlation_id`.
+
+    :param func: function called with each item
+    :param items: iterable of items
+    :param max_workers: number of worker threads
+    :param ordered: yields in input order if True, otherwise as completed
+    :return: generator of (index, item, result, exception) tuples
+    """
+    func = bind_correlation(func)
+
+    def call(args):
+        index, item = args
+        try:
+            return index, item, func(item), None
+        except Exception as e:
+            return index, item, None, e
+
+    pool = ThreadPool(max_workers)
+    try:
+        imap = pool.imap if ordered else pool.imap_unordered
+        for outcome in imap(call, enumerate(items)):
+            yield outcome
+    finally:
+        pool.terminate()
@@ -7,6 +7,95 @@ Tianhong Chu [https://github.com/CtheSky]
 License: MIT
 """
 
+from operator import itemgetter
+
+try:
+    from inspect import getfullargspec as _getargspec
+except ImportError:
+    from inspect import getargspec as _getargspec
+
+_CONSTRUCTORS = {}  # map DataModel class to its compiled from_dict classmethod
+_FIELD_GETTERS = {}  # map DataModel class to an itemgetter of its __init__ fields from __dict__
+
+_FROM_DICT_TEMPLATE = """
+def from_dict(klass, dct):
+    if klass is not cls:
+        return _constructor(klass)(dct)
+    if not dct:
+        return None
+    try:
+        model = cls(**dct)
+    except TypeError:
+        get = dct.get
+        model = cls({args})
+{nested}    return model
+"""
+
+
+def _field_getter(cls):
+    """Returns a function mapping the __dict__ of a model to the tuple of its __init__ fields."""
+    try:
+        return _FIELD_GETTERS[cls]
+    except KeyError:
+        getter = itemgetter(*_getargspec(cls.__init__).args[1:])
+        return _FIELD_GETTERS.setdefault(cls, getter)
+
+
+def _hashable(value):
+    """Returns value with lists and dicts turned into tuples and frozensets, recursively."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(item) for item in value)
+    if isinstance(value, dict):
+        return frozenset((key, _hashable(item)) for key, item in value.items())
+    return value
+
+
+def _compile_from_dict(cls):
+    """
+    Generates the from_dict classmethod of a DataModel class.
+
+    Keyword dispatch of a dict that matches the parameters of __init__ is done in C and is the
+    fastest path, so it is tried first. Otherwise the values of known keys are passed positionally:
+    missing keys take the parameter default or None, unknown keys are ignored.
+    Fields listed in `_nested_models` are then built with the compiled method of their class.
+    """
+    spec = _getargspec(cls.__init__)
+    params = spec.args[1:]
+    defaults = dict(zip(reversed(params), reversed(spec.defaults or ())))
+
+    namespace = {'cls': cls, '_constructor': _constructor}
+    args = []
+    for i, param in enumerate(params):
+        if param in defaults:
+            namespace['default{}'.format(i)] = defaults[param]
+            args.append('get({!r}, default{})'.format(param, i))
+        else:
+            args.append('get({!r})'.format(param))
+
+    nested = []
+    for i, (field, class_name) in enumerate(sorted(cls._nested_models.items())):
+        namespace['nested{}'.format(i)] = _constructor(globals()[class_name])
+        nested.append('    model.{0} = nested{1}(model.{0})\n'.format(field, i))
+
+    exec(_FROM_DICT_TEMPLATE.format(args=', '.join(args), nested=''.join(nested)), namespace)
+    return classmethod(namespace['from_dict'])
+
+
+def _constructor(cls):
+    """
+    Returns the compiled from_dict method of a DataModel class bound to the class.
+
+    It is compiled on first use and installed as the from_dict of the class, unless the class
+    defines its own, so later calls skip this lookup.
+    """
+    try:
+        method = _CONSTRUCTORS[cls]
+    except KeyError:
+        method = _CONSTRUCTORS.setdefault(cls, _compile_from_dict(cls))
+        if 'from_dict' not in cls.__dict__:
+            cls.from_dict = method
+    return method.__get__(None, cls)
+
 
 class DataModel(object):
     """
@@ -16,20 +105,87 @@ class DataModel(object):
       1. class method `from_dict` to construct model from a dict
       2. instance method `to_dict` to transfer model to a dict
       3. overrides equality test using __dict__
+      4. instance methods `replace`, `diff` and `freeze` to derive and compare models cheaply
     """
+
+    # map field name to the name of its DataModel class, for fields holding nested models
+    _nested_models = {}
+
     @classmethod
     def from_dict(cls, dct):
-        """Create DataModel object from dict."""
-        if not dct:
-            return None
-        return cls(**dct)
-
-    def to_dict(self):
-        """Returns a dict representation of DataModel object."""
-        return {
-            k: v.to_dict() if isinstance(v, DataModel) else v
-            for k, v in self.__dict__.items()
-        }
+        """Create DataModel object from dict.
+
+        Unknown keys are ignored and missing keys take their default value, or None if required.
+        """
+        return _constructor(cls)(dct)
+
+    def to_dict(self, omit_none=False):
+        """Returns a dict representation of DataModel object.
+
+        Only the fields listed in `_nested_models` are converted recursively.
+        If omit_none is True, fields whose value is None are left out.
+        """
+        if omit_none:
+            dct = {k: v for k, v in self.__dict__.items() if v is not None}
+        else:
+            dct = self.__dict__.copy()
+        for field in self._nested_models:
+            value = dct.get(field)
+            if value is not None:
+                dct[field] = value.to_dict(omit_none)
+        return dct
+
+    @classmethod
+    def _from_fields(cls, fields):
+        """Returns an instance holding the fields dict without calling __init__."""
+        model = object.__new__(cls)
+        model.__dict__ = fields
+        return model
+
+    def replace(self, **changes):
+        """Returns a copy of this model with some fields replaced.
+
+        The copy is shallow, unchanged fields such as nested contacts are shared with this model.
+        A frozen model returns a frozen copy.
+
+        Example: `record.replace(answer='10.0.0.2', ttl=600)`
+        """
+        unknown = [field for field in changes if field not in self.__dict__]
+        if unknown:
+            raise TypeError('unknown fields for {}: {}'.format(self.__class__.__name__, ', '.join(sorted(unknown))))
+
+        fields = self.__dict__.copy()
+        fields.update(changes)
+        return self._from_fields(fields)
+
+    def diff(self, other):
+        """Returns a dict of field -> (value of this model, value of other) for fields that differ.
+
+        Values are compared by identity first, so fields shared by :meth:`replace` cost no comparison.
+        """
+        mine, theirs = self.__dict__, other.__dict__
+        changes = {}
+        for field, value in mine.items():
+            other_value = theirs.get(field)
+            if value is not other_value and value != other_value:
+                changes[field] = (value, other_value)
+        for field, other_value in theirs.items():
+            if field not in mine and other_value is not None:
+                changes[field] = (None, other_value)
+        return changes
+
+    def freeze(self):
+        """Returns an immutable copy of this model, nested models are frozen too.
+
+        Frozen models raise AttributeError on assignment, cache their hash,
+        and are returned as is by freeze, copy and deepcopy.
+        """
+        fields = self.__dict__.copy()
+        for field in self._nested_models:
+            value = fields.get(field)
+            if value is not None:
+                fields[field] = value.freeze()
+        return _frozen_class(self.__class__)._from_fields(fields)
 
     def __repr__(self):
         cls_name = self.__class__.__name__
@@ -45,7 +201,98 @@ class DataModel(object):
         return not self == other
 
     def __hash__(self):
-        return hash(tuple(sorted(self.__dict__.items())))
+        """Hashes the values of the __init__ fields in declaration order.
+
+        Equal models have equal fields, so they hash equal whatever the order of their __dict__.
+        Lists such as nameservers or ips are hashed as tuples. Frozen models cache the result.
+        """
+        try:
+            values = _field_getter(self.__class__)(self.__dict__)
+        except KeyError:
+            # a field was deleted from the instance
+            get = self.__dict__.get
+            values = tuple([get(field) for field in _getargspec(self.__class__.__init__).args[1:]])
+        try:
+            return hash(values)
+        except TypeError:
+            return hash(_hashable(values))
+
+
+class FrozenModel(object):
+    """
+    This is the mixin of immutable data models returned by :meth:`DataModel.freeze`.
+
+    For each data model class, a subclass deriving from this mixin is created on first use,
+    e.g. `Record(...).freeze()` is an instance of both FrozenModel and Record. Fields holding
+    lists are shared with the model they were frozen from and should not be mutated.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def _from_fields(cls, fields):
+        for field in cls._nested_models:
+            value = fields.get(field)
+            if value is not None and not isinstance(value, FrozenModel):
+                fields[field] = value.freeze()
+        model = object.__new__(cls)
+        object.__setattr__(model, '__dict__', fields)
+        object.__setattr__(model, '_hash', None)
+        return model
+
+    def freeze(self):
+        return self
+
+    def __setattr__(self, name, value):
+        raise AttributeError('{} is frozen, use replace() to derive a changed copy'.format(self._model_class.__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError('{} is frozen'.format(self._model_class.__name__))
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(self, '_hash', self._model_class.__hash__(self))
+        return self._hash
+
+    def __eq__(self, other):
+        if isinstance(other, FrozenModel) and self._hash is not None and other._hash is not None \
+                and self._hash != other._hash:
+            return False
+        return self._model_class.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return _frozen_model, (self._model_class, self.__dict__)
+
+    def __repr__(self):
+        params = ', '.join(['{}={!r}'.format(k, v) for k, v in self.__dict__.items()])
+        return '{}({}).freeze()'.format(self._model_class.__name__, params)
+
+
+_FROZEN_CLASSES = {}  # map DataModel class to its frozen subclass
+
+
+def _frozen_class(cls):
+    """Returns the frozen subclass of a DataModel class, creating it on first use."""
+    try:
+        return _FROZEN_CLASSES[cls]
+    except KeyError:
+        frozen = type('Frozen' + cls.__name__, (FrozenModel, cls), {'__slots__': ('_hash',), '_model_class': cls})
+        frozen.__module__ = cls.__module__
+        return _FROZEN_CLASSES.setdefault(cls, frozen)
+
+
+def _frozen_model(cls, fields):
+    """Rebuilds a frozen model when unpickled."""
+    return _frozen_class(cls)._from_fields(dict(fields))
 
 
 class Record(DataModel):
@@ -167,6 +414,8 @@ class Domain(DataModel):
         RenewalPrice is the price to renew the domain. It may be required for the RenewDomain command.
     """
 
+    _nested_models = {'contacts': 'Contacts'}
+
     def __init__(self, domainName, locked=None, expireDate=None, createDate=None, contacts=None,
                  nameservers=None, privacyEnabled=None, autorenewEnabled=None, renewalPrice=None):
         self.domainName = domainName
@@ -179,16 +428,6 @@ class Domain(DataModel):
         self.createDate = createDate
         self.renewalPrice = renewalPrice
 
-    @classmethod
-    def from_dict(cls, dct):
-        if not dct:
-            return None
-
-        domain = Domain(**dct)
-        domain.contacts = Contacts.from_dict(dct.get('contacts'))
-
-        return domain
-
 
 class Contacts(DataModel):
     """
@@ -214,23 +453,14 @@ class Contacts(DataModel):
         The billing contact is the party responsible for paying bills for the account and taking care of renewals.
     """
 
+    _nested_models = {'registrant': 'Contact', 'admin': 'Contact', 'tech': 'Contact', 'billing': 'Contact'}
+
     def __init__(self, registrant, admin, tech, billing):
         self.registrant = registrant
         self.admin = admin
         self.tech = tech
         self.billing = billing
 
-    @classmethod
-    def from_dict(cls, dct):
-        if not dct:
-            return None
-
-        kwargs = {
-            field: Contact.from_dict(dct.get(field))
-            for field in ['registrant', 'admin', 'tech', 'billing']
-        }
-        return Contacts(**kwargs)
-
 
 class Contact(DataModel):
     """
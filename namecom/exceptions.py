@@ -95,3 +95,27 @@ class ServerError(NamecomError):
     """Fixed params: status_code -> 500, message -> Internal Error"""
     status_code = 500
     message = 'Internal Error'
+
+
+class CircuitOpenError(NamecomError):
+    """Raised without sending the request while the circuit breaker is open."""
+    message = 'Circuit Open'
+
+    def __init__(self, details=None):
+        super(CircuitOpenError, self).__init__(None, None, self.message, details)
+
+
+class DeadlineExceededError(NamecomError):
+    """Raised when the overall deadline of an api object has passed."""
+    message = 'Deadline Exceeded'
+
+    def __init__(self, details=None):
+        super(DeadlineExceededError, self).__init__(None, None, self.message, details)
+
+
+class ReplayMissError(NamecomError):
+    """Raised by a Replayer when a request has no recorded response left."""
+    message = 'Replay Miss'
+
+    def __init__(self, details=None):
+        super(ReplayMissError, self).__init__(None, None, self.message, details)
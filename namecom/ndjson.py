@@ -0,0 +1,181 @@
+"""
+namecom: ndjson.py
+
+Implements streaming export and import of account state
+as newline delimited json (NDJSON), optionally gzip compressed.
+
+Each line holds one data model: {"type": "Record", "data": {...}}.
+
+Tianhong Chu [https://github.com/CtheSky]
+License: MIT
+"""
+
+import gzip
+import itertools
+import json
+
+from .account import AccountReader
+from .api import DnssecApi, DomainApi, EmailForwardingApi, URLForwardingApi, VanityNameserverApi
+from .data_models import *
+from .utils import json_bytes
+
+__all__ = ['NdjsonWriter', 'read_ndjson', 'export_account', 'import_sync']
+
+_MODEL_CLASSES = dict((klass.__name__, klass) for klass in [
+    Domain, Record, DNSSEC, EmailForwarding, URLForwarding, VanityNameserver, Transfer, DomainSearchResult
+])
+
+EXPORT_KINDS = ['domains', 'records', 'dnssecs', 'email_forwardings', 'url_forwardings', 'vanity_nameservers']
+
+
+def _open(path, mode, compress):
+    if compress is None:
+        compress = path.endswith('.gz')
+    return gzip.open(path, mode) if compress else open(path, mode)
+
+
+class NdjsonWriter(object):
+    """
+    The class writes data models to an NDJSON file one line at a time.
+
+    Example:
+        with NdjsonWriter('backup.ndjson.gz') as writer:
+            writer.write_all(models)
+    """
+
+    def __init__(self, path, compress=None):
+        """
+        Parameters
+        ----------
+        path : string
+            file to write
+
+        compress : bool
+            whether to gzip the file, defaults to whether path ends with '.gz'
+        """
+        self.count = 0
+        self._file = _open(path, 'wb', compress)
+
+    def write(self, model):
+        """Writes one data model."""
+        self._file.write(json_bytes({'type': model.__class__.__name__, 'data': model}, omit_none=False) + b'\n')
+        self.count += 1
+
+    def write_all(self, models):
+        """Writes every data model of an iterable."""
+        for model in models:
+            self.write(model)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_ndjson(path, compress=None):
+    """
+    Reads data models from an NDJSON file one line at a time.
+
+    :param path: file to read
+    :param compress: whether the file is gzipped, defaults to whether path ends with '.gz'
+    :return: generator of data models
+    """
+    with _open(path, 'rb', compress) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            obj = json.loads(line.decode('utf-8'))
+            yield _MODEL_CLASSES[obj['type']].from_dict(obj['data'])
+
+
+# number of domains whose resources are fetched together, one page of list_domains
+_EXPORT_BATCH = 1000
+
+
+def export_account(auth, path, use_test_env=False, kinds=None, compress=None, **kwargs):
+    """
+    Streams the state of an account to an NDJSON file.
+
+    Domains are written as their pages arrive. After every `_EXPORT_BATCH` domains the resources
+    of those domains are written as soon as they are fetched, so at most one batch of domain names
+    is kept in memory and memory use does not grow with the size of the account.
+    Models of the same type and domain are written on consecutive lines, which lets
+    :func:`import_sync` stream them back per domain. Vanity nameservers are written with
+    their ips, which the listing omits.
+
+    :param auth: http authentication to use
+    :param path: file to write
+    :param use_test_env: whether runs in test environment
+    :param kinds: list of kinds to export, defaults to EXPORT_KINDS
+    :param compress: whether to gzip the file, defaults to whether path ends with '.gz'
+    :param kwargs: optional client settings, see :class:`~namecom.api._ApiBase`
+    :return: number of models written
+    """
+    kinds = kinds if kinds is not None else EXPORT_KINDS
+    domain_api = DomainApi(auth, use_test_env, **kwargs)
+    reader = AccountReader(auth, use_test_env, **kwargs)
+
+    def write_resources(writer, names):
+        for kind in kinds:
+            if kind == 'domains':
+                continue
+            for domainName, models in reader.fetch(kind, names):
+                if kind == 'vanity_nameservers':
+                    api = VanityNameserverApi(domainName, auth, use_test_env, **kwargs)
+                    models = [api.get_vanity_nameserver(model.hostname).vanityNameserver for model in models]
+                writer.write_all(models)
+
+    with NdjsonWriter(path, compress) as writer:
+        names = []
+        for domain in domain_api._iter_pages(domain_api.list_domains, 'domains'):
+            names.append(domain.domainName)
+            if 'domains' in kinds:
+                writer.write(domain)
+            if len(names) == _EXPORT_BATCH:
+                write_resources(writer, names)
+                names = []
+        if names:
+            write_resources(writer, names)
+
+        return writer.count
+
+
+# model class -> (api class, sync method name)
+_SYNC_METHODS = {
+    EmailForwarding: (EmailForwardingApi, 'sync'),
+    URLForwarding: (URLForwardingApi, 'sync'),
+    DNSSEC: (DnssecApi, 'reconcile'),
+    VanityNameserver: (VanityNameserverApi, 'reconcile'),
+}
+
+
+def import_sync(auth, path, use_test_env=False, dry_run=False, delete_missing=True, compress=None, **kwargs):
+    """
+    Streams an NDJSON file into the sync operations of api classes.
+
+    Consecutive models of the same type and domain form the desired state of that domain,
+    only one such group is held in memory at a time. Email forwardings, URL forwardings,
+    DNSSEC keys and vanity nameservers are synced, other models are skipped. Domains without
+    any line of a type are left untouched for that type.
+
+    :param auth: http authentication to use
+    :param path: file to read
+    :param use_test_env: whether runs in test environment
+    :param dry_run: only computes the plans without applying them
+    :param delete_missing: whether entries absent from the file are deleted
+    :param compress: whether the file is gzipped, defaults to whether path ends with '.gz'
+    :param kwargs: optional client settings, see :class:`~namecom.api._ApiBase`
+    :return: generator of (domainName, model class, :class:`~namecom.sync.SyncReport`) tuples
+    """
+    models = read_ndjson(path, compress)
+    for (klass, domainName), group in itertools.groupby(models, lambda m: (m.__class__, m.domainName)):
+        if klass not in _SYNC_METHODS:
+            continue
+        api_class, method = _SYNC_METHODS[klass]
+        api = api_class(domainName, auth, use_test_env, **kwargs)
+        yield domainName, klass, getattr(api, method)(group, delete_missing=delete_missing, dry_run=dry_run)
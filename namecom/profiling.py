@@ -0,0 +1,256 @@
+"""
+namecom: profiling.py
+
+Implements Profiler which breaks the calls of api objects into phases,
+and a command line entry point running a profiled workload.
+
+Tianhong Chu [https://github.com/CtheSky]
+License: MIT
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from .timeouts import DEFAULT_TIMEOUT
+from .utils.time_utils import clock as _clock
+
+__all__ = ['Profiler', 'PHASES', 'main']
+
+# queue: waiting for a slot of the concurrency limiter
+# ttfb: sending the request until the response headers are parsed, includes connect and TLS handshake
+# download: reading the response body
+# decode: json decoding of the body
+# parse: building result and data models
+PHASES = ['queue', 'ttfb', 'download', 'decode', 'parse']
+
+
+class _Call(object):
+    """Timings of one call in progress."""
+
+    def __init__(self, key):
+        self.key = key
+        self.start = _clock()
+        self.phases = {}
+        self.error = False
+        self.cached = False
+
+
+class _Stats(object):
+    """Aggregated timings of one api method."""
+
+    def __init__(self):
+        self.totals = []
+        self.phases = dict((phase, 0.0) for phase in PHASES)
+        self.errors = 0
+        self.cached = 0
+
+    def percentile(self, q):
+        totals = sorted(self.totals)
+        return totals[min(len(totals) - 1, int(q * len(totals)))] if totals else 0.0
+
+
+class Profiler(object):
+    """
+    The class collects per-method timings of api calls, split into :data:`PHASES`.
+
+    Pass it to api classes as the `profiler` client setting, run the workload, then print
+    :meth:`report`. Calls are keyed by api class and method, e.g. `DnsApi.list_records`.
+    The time left between the phases and the total of a call is spent in the client itself.
+
+    Example:
+        profiler = Profiler()
+        api = DnsApi('example.org', auth, profiler=profiler)
+        api.list_records()
+        print(profiler.report())
+    """
+
+    def __init__(self):
+        self._stats = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @staticmethod
+    def _method_key(api):
+        """Returns 'ApiClass.method' of the public api method currently calling api._do."""
+        frame = sys._getframe(2)
+        while frame is not None:
+            name = frame.f_code.co_name
+            if not name.startswith('_') and frame.f_locals.get('self') is api:
+                return '{}.{}'.format(api.__class__.__name__, name)
+            frame = frame.f_back
+        return '{}.<unknown>'.format(api.__class__.__name__)
+
+    def begin(self, api):
+        """Starts timing a call of api, called by api._do."""
+        self.finish()
+        self._local.call = _Call(self._method_key(api))
+
+    def current(self):
+        """Returns the call in progress on this thread, or None."""
+        return getattr(self._local, 'call', None)
+
+    def add(self, phase, seconds):
+        """Adds seconds to a phase of the call in progress."""
+        call = self.current()
+        if call is not None:
+            call.phases[phase] = call.phases.get(phase, 0.0) + seconds
+
+    def add_response(self, resp, seconds):
+        """Splits the seconds spent in requests into time to first byte and download."""
+        elapsed = resp.elapsed.total_seconds() if getattr(resp, 'elapsed', None) is not None else seconds
+        elapsed = min(max(elapsed, 0.0), seconds)
+        self.add('ttfb', elapsed)
+        self.add('download', seconds - elapsed)
+
+    def mark(self, error=False, cached=False):
+        """Flags the call in progress as failed or served from a cache."""
+        call = self.current()
+        if call is not None:
+            call.error = call.error or error
+            call.cached = call.cached or cached
+
+    def finish(self):
+        """Records the call in progress, called once its result is parsed."""
+        call = self.current()
+        if call is None:
+            return
+        self._local.call = None
+        total = _clock() - call.start
+
+        with self._lock:
+            stats = self._stats.get(call.key)
+            if stats is None:
+                stats = self._stats[call.key] = _Stats()
+            stats.totals.append(total)
+            stats.errors += call.error
+            stats.cached += call.cached
+            for phase, seconds in call.phases.items():
+                stats.phases[phase] += seconds
+
+    def stats(self):
+        """
+        Returns the aggregated timings.
+
+        :return: OrderedDict of method -> dict with calls, errors, cached, total, p50, p95 and
+                 the mean seconds of each phase
+        """
+        self.finish()
+        result = OrderedDict()
+        with self._lock:
+            for key, stats in self._stats.items():
+                calls = len(stats.totals)
+                row = {
+                    'calls': calls,
+                    'errors': stats.errors,
+                    'cached': stats.cached,
+                    'total': sum(stats.totals) / calls,
+                    'p50': stats.percentile(0.5),
+                    'p95': stats.percentile(0.95),
+                }
+                for phase in PHASES:
+                    row[phase] = stats.phases[phase] / calls
+                result[key] = row
+        return result
+
+    def report(self):
+        """Returns the aggregated timings as a text table, times are mean milliseconds per call."""
+        columns = ['calls', 'errors', 'total', 'p50', 'p95'] + PHASES + ['client']
+        stats = self.stats()
+        width = max([len('method')] + [len(key) for key in stats])
+
+        lines = ['{:<{}}'.format('method', width) + ''.join('{:>10}'.format(c) for c in columns)]
+        for key, row in stats.items():
+            row = dict(row, client=row['total'] - sum(row[phase] for phase in PHASES))
+            cells = ['{:>10}'.format(row[c]) if c in ('calls', 'errors') else '{:>10.1f}'.format(row[c] * 1000)
+                     for c in columns]
+            lines.append('{:<{}}'.format(key, width) + ''.join(cells))
+        return '\n'.join(lines)
+
+    def reset(self):
+        """Drops all collected timings."""
+        with self._lock:
+            self._stats.clear()
+
+
+def run_workload(auth, profiler, use_test_env=False, api_host=None, domains=5, repeat=1, **kwargs):
+    """
+    Runs a read-only workload: lists the domains of the account, then reads the details, records
+    and forwardings of the first domains, and checks their availability.
+
+    :param auth: http authentication to use
+    :param profiler: Profiler collecting the timings
+    :param use_test_env: whether runs in test environment
+    :param api_host: overrides the api host, e.g. a local stand-in of the api
+    :param domains: number of domains read in detail
+    :param repeat: number of times the workload runs
+    :param kwargs: optional client settings, see :class:`~namecom.api._ApiBase`
+    """
+    from .api import DnsApi, DomainApi, EmailForwardingApi, URLForwardingApi
+
+    def make(api_class, *args):
+        api = api_class(*(args + (auth, use_test_env)), profiler=profiler, **kwargs)
+        if api_host is not None:
+            api.api_host = api_host
+        return api
+
+    def attempt(func, *args):
+        try:
+            return func(*args)
+        except Exception:
+            profiler.mark(error=True)
+            profiler.finish()
+
+    domain_api = make(DomainApi)
+    for _ in range(repeat):
+        listed = attempt(lambda: list(domain_api._iter_pages(domain_api.list_domains, 'domains'))) or []
+        names = [domain.domainName for domain in listed[:domains]]
+
+        for name in names:
+            attempt(domain_api.get_domain, name)
+            attempt(make(DnsApi, name).list_records)
+            attempt(make(EmailForwardingApi, name).list_email_forwardings)
+            attempt(make(URLForwardingApi, name).list_url_forwardings)
+
+        if names:
+            attempt(domain_api.check_availability, names)
+
+
+def main(argv=None):
+    """Command line entry point, run `python -m namecom.profiling --help` for usage."""
+    from .auth import Auth
+
+    parser = argparse.ArgumentParser(
+        prog='namecom-profile',
+        description='Runs a read-only workload against the name.com api and prints a phase breakdown per method.')
+    parser.add_argument('--username', default=os.environ.get('NAMECOM_USERNAME'),
+                        help='api username, defaults to $NAMECOM_USERNAME')
+    parser.add_argument('--token', default=os.environ.get('NAMECOM_TOKEN'),
+                        help='api token, defaults to $NAMECOM_TOKEN')
+    parser.add_argument('--test-env', action='store_true', help='use the test environment')
+    parser.add_argument('--host', help='api host to use instead, e.g. http://localhost:8080 for a local stand-in')
+    parser.add_argument('--domains', type=int, default=5, help='number of domains read in detail')
+    parser.add_argument('--repeat', type=int, default=1, help='number of times the workload runs')
+    parser.add_argument('--timeout', type=float, default=None, help='read timeout of each request in seconds')
+    args = parser.parse_args(argv)
+
+    if not args.username or not args.token:
+        parser.error('--username and --token are required')
+
+    kwargs = {}
+    if args.timeout is not None:
+        kwargs['timeout'] = (DEFAULT_TIMEOUT[0], args.timeout)
+
+    profiler = Profiler()
+    run_workload(Auth(args.username, args.token), profiler, args.test_env, args.host, args.domains, args.repeat,
+                 **kwargs)
+    print(profiler.report())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
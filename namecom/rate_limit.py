@@ -0,0 +1,154 @@
+"""
+namecom: rate_limit.py
+
+Implements RateLimitStatus which tracks the quota reported
+by rate limit response headers.
+
+Tianhong Chu [https://github.com/CtheSky]
+License: MIT
+"""
+
+import threading
+import time
+from email.utils import mktime_tz, parsedate_tz
+
+__all__ = ['RateLimitStatus']
+
+_LIMIT_HEADERS = ['X-RateLimit-Limit', 'RateLimit-Limit']
+_REMAINING_HEADERS = ['X-RateLimit-Remaining', 'RateLimit-Remaining']
+_RESET_HEADERS = ['X-RateLimit-Reset', 'RateLimit-Reset']
+
+# reset values above this are epoch timestamps, below it seconds from now
+_EPOCH_THRESHOLD = 10 ** 9
+
+
+def _header_number(headers, names):
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return float(value.split(',')[0])
+            except ValueError:
+                return None
+    return None
+
+
+def _retry_after(value, now):
+    """Returns the epoch time given by a Retry-After value, in seconds or as an http date."""
+    try:
+        return now + float(value)
+    except ValueError:
+        parsed = parsedate_tz(value)
+        return mktime_tz(parsed) if parsed is not None else None
+
+
+class RateLimitStatus(object):
+    """
+    The class tracks the request quota reported by the `X-RateLimit-*` and `Retry-After` headers.
+
+    Every :class:`~namecom.Auth` owns one instance as `auth.rate_limit`, updated by all api
+    objects sharing the auth, so it is a live view of the quota of the account.
+    When an api object has a limiter, the status also slows it down before the server throttles:
+    calls wait until a Retry-After time has passed, are spread over the rest of the window once
+    less than `low_water` of the quota remains, and the limiter backs off as if throttled.
+
+    Attributes
+    ----------
+    limit : int
+        requests allowed per window, None until reported
+
+    remaining : int
+        requests left in the current window, None until reported
+
+    reset_at : float
+        epoch time the window resets, None until reported
+
+    retry_at : float
+        epoch time before which the server asked not to retry, None if not asked
+
+    throttled : int
+        number of 429 responses received
+    """
+
+    def __init__(self, low_water=0.1):
+        """
+        Parameters
+        ----------
+        low_water : float
+            fraction of the quota below which calls are spread over the rest of the window
+        """
+        self.low_water = low_water
+        self.limit = None
+        self.remaining = None
+        self.reset_at = None
+        self.retry_at = None
+        self.throttled = 0
+        self.updated_at = None
+
+        self._lock = threading.Lock()
+
+    def update(self, headers, status_code=None):
+        """Updates the status from the headers of a response."""
+        limit = _header_number(headers, _LIMIT_HEADERS)
+        remaining = _header_number(headers, _REMAINING_HEADERS)
+        reset = _header_number(headers, _RESET_HEADERS)
+        retry_after = headers.get('Retry-After')
+        if limit is None and remaining is None and reset is None and retry_after is None and status_code != 429:
+            return
+
+        now = time.time()
+        with self._lock:
+            self.updated_at = now
+            if limit is not None:
+                self.limit = int(limit)
+            if remaining is not None:
+                self.remaining = int(remaining)
+            if reset is not None:
+                self.reset_at = reset if reset > _EPOCH_THRESHOLD else now + reset
+            if retry_after is not None:
+                self.retry_at = _retry_after(retry_after, now)
+            if status_code == 429:
+                self.throttled += 1
+                if retry_after is None and self.reset_at is not None and self.reset_at > now:
+                    self.retry_at = self.reset_at
+
+    @property
+    def reset_in(self):
+        """Seconds until the window resets, None if unknown."""
+        if self.reset_at is None:
+            return None
+        return max(0.0, self.reset_at - time.time())
+
+    @property
+    def low(self):
+        """Whether less than `low_water` of the quota of the current window remains."""
+        remaining, limit, reset_at = self.remaining, self.limit, self.reset_at
+        if remaining is None or not limit or reset_at is None or reset_at <= time.time():
+            return False
+        return remaining <= limit * self.low_water
+
+    def delay(self):
+        """Returns the seconds to wait before the next call, 0 if it can be sent now."""
+        now = time.time()
+        retry_at = self.retry_at
+        if retry_at is not None and retry_at > now:
+            return retry_at - now
+        if self.low:
+            return self.reset_in / max(self.remaining, 1)
+        return 0.0
+
+    def snapshot(self):
+        """Returns the current status as a dict."""
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'remaining': self.remaining,
+                'reset_in': self.reset_in,
+                'retry_in': max(0.0, self.retry_at - time.time()) if self.retry_at is not None else None,
+                'throttled': self.throttled,
+                'low': self.low,
+            }
+
+    def __repr__(self):
+        return 'RateLimitStatus(limit={}, remaining={}, reset_in={}, throttled={})'.format(
+            self.limit, self.remaining, self.reset_in, self.throttled)
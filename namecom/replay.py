@@ -0,0 +1,371 @@
+"""
+namecom: replay.py
+
+Implements Recorder which saves the requests and responses of api objects
+to a file, and Replayer which serves them back for regression and load tests.
+
+Tianhong Chu [https://github.com/CtheSky]
+License: MIT
+"""
+
+import gzip
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+
+try:
+    from urllib.parse import urlsplit
+except ImportError:
+    from urlparse import urlsplit
+
+import requests
+
+from . import exceptions
+from .sampling import redact, sanitize_body
+from .tracing import endpoint_template
+from .transport import Transport
+from .utils.http_utils import build_response
+from .utils.time_utils import clock as _clock
+
+__all__ = ['Recorder', 'Replayer', 'ReplayReport', 'load_recording']
+
+_DROPPED_HEADERS = frozenset(['set-cookie', 'authorization', 'cookie'])
+
+
+def _open(path, mode):
+    """Opens a recording in binary mode, gzip compressed if the path ends with .gz."""
+    return gzip.open(path, mode) if path.endswith('.gz') else open(path, mode)
+
+
+def _compact(obj):
+    return json.dumps(obj, separators=(',', ':'), sort_keys=True)
+
+
+def _redact_content(content):
+    """Returns the response body as text with sensitive values redacted if it is json."""
+    text = content.decode('utf-8', 'replace')
+    try:
+        return _compact(redact(json.loads(text)))
+    except ValueError:
+        return text
+
+
+def _request_key(method, url, params, body):
+    return method, url, _compact(params or {}), body
+
+
+def load_recording(path):
+    """
+    Reads a recording written by :class:`Recorder`.
+
+    :param path: path of the recording
+    :return: list of entry dicts in recording order, with the parse time of the response when it was parsed
+    """
+    entries = OrderedDict()
+    with _open(path, 'rb') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line.decode('utf-8'))
+            if 'parsed' in item:
+                entry = entries.get(item['parsed'])
+                if entry is not None:
+                    entry.update(parse=item['seconds'], parser=item['parser'], result=item['result'])
+            else:
+                entries[item['id']] = item
+    return list(entries.values())
+
+
+class Recorder(object):
+    """
+    The class writes the requests and responses of api objects to a file.
+
+    Pass it to api classes as the `recorder` client setting. Every request sent over the network is
+    written as one json line with its latency, followed by the time spent parsing the response once
+    the api method parsed it. Responses served by caches are not recorded. Credentials are never written:
+    the auth of the api object is not part of the request, and sensitive values such as auth codes in
+    request and response bodies are replaced. A path ending with `.gz` is gzip compressed.
+    Streamed responses are read whole while recording.
+
+    Example:
+        recorder = Recorder('traffic.jsonl.gz')
+        api = DomainApi(auth, recorder=recorder)
+        ...
+        recorder.close()
+    """
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path : string
+            file the recording is appended to
+        """
+        self.path = path
+        self._file = _open(path, 'ab')
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._next_id = 0
+
+    def _write(self, item):
+        line = (_compact(item) + '\n').encode('utf-8')
+        with self._lock:
+            self._file.write(line)
+
+    def record(self, method, url, kwargs, resp, latency):
+        """
+        Writes a request and its response, called by api._send.
+
+        :param method: http method
+        :param url: url of the request without query
+        :param kwargs: keyword arguments that were passed to requests
+        :param resp: response received
+        :param latency: seconds until the response was received
+        """
+        body, _ = sanitize_body(kwargs, None)
+        with self._lock:
+            self._next_id += 1
+            entry_id = self._next_id
+        self._write({
+            'id': entry_id,
+            'ts': time.time() - latency,
+            'method': method,
+            'url': url,
+            'params': redact(dict(kwargs.get('params') or {})),
+            'body': body,
+            'stream': bool(kwargs.get('stream')),
+            'status': resp.status_code,
+            'headers': dict((k, v) for k, v in resp.headers.items() if k.lower() not in _DROPPED_HEADERS),
+            'content': _redact_content(resp.content),
+            'latency': latency,
+        })
+        self._local.last = (entry_id, resp)
+
+    def parsed(self, resp, parse_func, klass, seconds):
+        """Writes the time spent parsing resp, called by api._parse_result."""
+        last = getattr(self._local, 'last', None)
+        if last is None or last[1] is not resp:
+            return
+        self._local.last = None
+        self._write({'parsed': last[0], 'seconds': seconds, 'parser': parse_func.__name__, 'result': klass.__name__})
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class ReplayReport(object):
+    """
+    The class holds the outcome of :meth:`Replayer.run`.
+
+    Attributes
+    ----------
+    calls : list
+        one dict per replayed call with method, endpoint, status, recorded and replayed latency
+        and parse seconds, and the error raised by the client if any
+
+    mismatches : list
+        the calls whose replayed status differs from the recorded one or that raised unexpectedly
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.mismatches = []
+
+    @staticmethod
+    def _mismatch(call):
+        return call['replayed_status'] != call['status'] or call['unexpected']
+
+    def add(self, call):
+        self.calls.append(call)
+        if self._mismatch(call):
+            self.mismatches.append(call)
+
+    def summary(self):
+        """
+        Returns the calls aggregated by endpoint.
+
+        :return: OrderedDict of 'METHOD endpoint' -> dict with calls, mismatches, the mean recorded
+                 and replayed latency and parse seconds, and the deltas replayed minus recorded
+        """
+        groups = OrderedDict()
+        for call in self.calls:
+            groups.setdefault('{} {}'.format(call['method'], call['endpoint']), []).append(call)
+
+        def mean(calls, name):
+            values = [call[name] for call in calls if call[name] is not None]
+            return sum(values) / len(values) if values else None
+
+        result = OrderedDict()
+        for key, calls in groups.items():
+            row = {'calls': len(calls), 'mismatches': sum(self._mismatch(call) for call in calls)}
+            for name in ['latency', 'replayed_latency', 'parse', 'replayed_parse']:
+                row[name] = mean(calls, name)
+            for name in ['latency', 'parse']:
+                recorded, replayed = row[name], row['replayed_' + name]
+                row[name + '_delta'] = replayed - recorded if recorded is not None and replayed is not None else None
+            result[key] = row
+        return result
+
+    def report(self):
+        """Returns the summary as a text table, times are mean milliseconds per call."""
+        columns = ['calls', 'mismatches', 'latency', 'replayed_latency', 'latency_delta',
+                   'parse', 'replayed_parse', 'parse_delta']
+        headers = ['calls', 'mismatch', 'latency', 'replayed', 'delta', 'parse', 'replayed', 'delta']
+        summary = self.summary()
+        width = max([len('endpoint')] + [len(key) for key in summary])
+
+        def cell(row, column):
+            value = row[column]
+            if column in ('calls', 'mismatches'):
+                return '{:>10}'.format(value)
+            return '{:>10}'.format('-') if value is None else '{:>10.2f}'.format(value * 1000)
+
+        lines = ['{:<{}}'.format('endpoint', width) + ''.join('{:>10}'.format(h) for h in headers)]
+        for key, row in summary.items():
+            lines.append('{:<{}}'.format(key, width) + ''.join(cell(row, c) for c in columns))
+        return '\n'.join(lines)
+
+
+class Replayer(Transport):
+    """
+    The class serves the responses of a recording back to api objects.
+
+    It is a :class:`~namecom.Transport`, pass it to api classes as the `transport` client
+    setting: every request gets the next recorded response of the same method, url,
+    params and body, in recording order, and raises :class:`~namecom.exceptions.ReplayMissError`
+    when none is left. :meth:`run` replays the whole recording through the client and reports the
+    latency and parse time of every call against the recorded ones.
+
+    Responses are served at the pace they were recorded divided by `speed`, or as fast as
+    possible when `speed` is None.
+
+    Example:
+        report = Replayer('traffic.jsonl.gz', speed=10).run()
+        print(report.report())
+    """
+
+    def __init__(self, path, speed=None):
+        """
+        Parameters
+        ----------
+        path : string
+            recording written by :class:`Recorder`
+
+        speed : float
+            pace factor, 1 replays at the recorded pace, 10 ten times faster, None without pacing
+        """
+        self.path = path
+        self.speed = speed
+        self.entries = load_recording(path)
+        self.waited = 0.0
+
+        self._lock = threading.Lock()
+        self._origin = self.entries[0]['ts'] if self.entries else 0.0
+        self.reset()
+
+    def reset(self):
+        """Makes all recorded responses available again and restarts the pacing."""
+        with self._lock:
+            self._queues = {}
+            for entry in self.entries:
+                key = _request_key(entry['method'], entry['url'], entry['params'], entry['body'])
+                self._queues.setdefault(key, deque()).append(entry)
+            self._started = None
+
+    def _pace(self, entry):
+        if not self.speed:
+            return
+        with self._lock:
+            if self._started is None:
+                self._started = _clock()
+            wait = (entry['ts'] - self._origin) / self.speed - (_clock() - self._started)
+            if wait > 0:
+                self.waited += wait
+        if wait > 0:
+            time.sleep(wait)
+
+    def request(self, method, url, params=None, data=None, json=None, **kwargs):
+        """Returns the next recorded response of the request, see :meth:`~namecom.Transport.request`."""
+        body, _ = sanitize_body({'data': data, 'json': json}, None)
+        key = _request_key(method, url, redact(dict(params or {})), body)
+        with self._lock:
+            queue = self._queues.get(key)
+            entry = queue.popleft() if queue else None
+        if entry is None:
+            raise exceptions.ReplayMissError('{} {} params={} body={}'.format(method, url, key[2], body))
+
+        self._pace(entry)
+        full_url = requests.Request(method, url, params=entry['params']).prepare().url
+        return build_response(method, full_url, entry['status'], entry['headers'], entry['content'].encode('utf-8'))
+
+    def run(self, **kwargs):
+        """
+        Replays every recorded request through the client, parsing the responses that were parsed.
+
+        Revalidations answered with 304 Not Modified are skipped, the replaying api object has no
+        conditional cache to serve them from.
+
+        :param kwargs: optional client settings of the api object used, see :class:`~namecom.api._ApiBase`
+        :return: a ReplayReport
+        """
+        from .api import _ApiBase
+        from .auth import Auth
+        from . import result_models
+        from .utils import parse_utils
+
+        self.reset()
+        api = _ApiBase(Auth('replay', 'replay'), False, transport=self, **kwargs)
+        report = ReplayReport()
+
+        for entry in self.entries:
+            if entry['status'] == 304:
+                continue
+            parts = urlsplit(entry['url'])
+            api.api_host = '{}://{}'.format(parts.scheme, parts.netloc)
+            request_kwargs = {'params': entry['params'] or None, 'stream': entry['stream']}
+            if entry['body'] is not None:
+                request_kwargs['data'] = entry['body'].encode('utf-8')
+
+            call = {
+                'method': entry['method'],
+                'endpoint': endpoint_template(parts.path)[0],
+                'status': entry['status'],
+                'latency': entry['latency'],
+                'parse': entry.get('parse'),
+                'replayed_status': None,
+                'replayed_latency': None,
+                'replayed_parse': None,
+                'error': None,
+                'unexpected': False,
+            }
+
+            waited = self.waited
+            start = _clock()
+            try:
+                resp = api._do(entry['method'], parts.path, **request_kwargs)
+                call['replayed_latency'] = _clock() - start - (self.waited - waited)
+                call['replayed_status'] = resp.status_code
+                if entry.get('parser') is not None:
+                    start = _clock()
+                    api._parse_result(resp, getattr(parse_utils, entry['parser']),
+                                      getattr(result_models, entry['result']))
+                    call['replayed_parse'] = _clock() - start
+            except exceptions.NamecomError as e:
+                if call['replayed_latency'] is None:
+                    call['replayed_latency'] = _clock() - start - (self.waited - waited)
+                call['replayed_status'] = e.status_code
+                call['error'] = e.__class__.__name__
+                call['unexpected'] = e.status_code is None
+            except Exception as e:
+                call['error'] = e.__class__.__name__
+                call['unexpected'] = True
+            report.add(call)
+
+        return report
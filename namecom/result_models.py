@@ -681,3 +681,69 @@ class UpdateVanityNameserverResult(RequestResult):
         
 class DeleteVanityNameserverResult(RequestResult):
     """Response class for DeleteVanityNameserver method."""
+
+
+class BatchItemResult(object):
+    """Result class for a single item of a batch method.
+
+    Attributes
+    ----------
+    item :
+        the input item, e.g. a :class:`~namecom.Record`
+
+    result : :class:`~namecom.result_models.RequestResult`
+        result of the api call, None if it failed
+
+    error : Exception
+        exception raised by the api call, None if it succeeded
+    """
+    def __init__(self, item, result=None, error=None):
+        self.item = item
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return 'BatchItemResult(item={!r}, ok={!r})'.format(self.item, self.ok)
+
+
+class BatchResult(object):
+    """Result class for batch methods.
+
+    Attributes
+    ----------
+    items : [] :class:`~namecom.result_models.BatchItemResult`
+        one result per input item, in input order unless the method says otherwise
+
+    rolled_back : bool
+        whether the applied items were rolled back because some item failed
+
+    rollback_errors : [] :class:`~namecom.result_models.BatchItemResult`
+        rollbacks that failed, their changes are still applied
+    """
+    def __init__(self, items):
+        self.items = items
+        self.rolled_back = False
+        self.rollback_errors = []
+
+    @property
+    def ok(self):
+        """Whether every item succeeded."""
+        return all(item.ok for item in self.items)
+
+    @property
+    def succeeded(self):
+        return [item for item in self.items if item.ok]
+
+    @property
+    def failed(self):
+        return [item for item in self.items if not item.ok]
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
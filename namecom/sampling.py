@@ -0,0 +1,268 @@
+"""
+namecom: sampling.py
+
+Implements CallSampler which keeps the details of a bounded random
+sample of slow and failed api calls.
+
+Tianhong Chu [https://github.com/CtheSky]
+License: MIT
+"""
+
+import json
+import random
+import threading
+import time
+
+from .tracing import current_correlation_id
+from .utils.http_utils import response_size
+
+__all__ = ['CallSampler', 'SampledCall', 'REDACTED']
+
+REDACTED = '<redacted>'
+
+# lower cased keys of request bodies, params and headers whose values are never kept
+_SENSITIVE_KEYS = frozenset(['authcode', 'token', 'password', 'authorization', 'cookie', 'creditcard'])
+
+KINDS = ['slow', 'error']
+
+
+def redact(value):
+    """Returns a copy of a json value with the values of sensitive keys replaced by REDACTED."""
+    if isinstance(value, dict):
+        return dict((k, REDACTED if k.lower() in _SENSITIVE_KEYS else redact(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return [redact(v) for v in value]
+    return value
+
+
+def sanitize_body(kwargs, max_body):
+    """Returns the request body with sensitive values redacted and its size in bytes."""
+    body = kwargs.get('json')
+    size = None
+    if body is None:
+        data = kwargs.get('data')
+        if data is None:
+            return None, 0
+        if isinstance(data, bytes):
+            size = len(data)
+            data = data.decode('utf-8', 'replace')
+        else:
+            size = len(data.encode('utf-8')) if hasattr(data, 'encode') else None
+        try:
+            body = json.loads(data)
+        except (TypeError, ValueError):
+            return '<{} bytes not json>'.format(size), size
+
+    text = json.dumps(redact(body), sort_keys=True)
+    if size is None:
+        size = len(text)
+    if max_body is not None and len(text) > max_body:
+        text = text[:max_body] + '...'
+    return text, size
+
+
+class SampledCall(object):
+    """
+    The class holds the details of one sampled api call.
+
+    Attributes
+    ----------
+    kind : string
+        'slow' or 'error'
+
+    timestamp : float
+        epoch time the call completed
+
+    correlation_id : string
+        correlation id of the call, None if it was made outside a correlation context without a tracer
+
+    method : string
+        http method
+
+    path : string
+        path of the request
+
+    params : dict
+        query parameters, sensitive values redacted
+
+    headers : dict
+        extra request headers, sensitive values redacted
+
+    body : string
+        json request body, sensitive values redacted and truncated to `max_body` characters
+
+    request_bytes : int
+        size of the request body
+
+    status : int
+        http status code, None if no response was received
+
+    response_bytes : int
+        size of the response body, None if unknown
+
+    duration : float
+        seconds the call took in the client, including queueing
+
+    elapsed : float
+        seconds until the response headers were received, None if no response was received
+
+    error : string
+        name of the exception class if the call failed
+
+    message : string
+        message of the exception if the call failed
+    """
+
+    __slots__ = ['kind', 'timestamp', 'correlation_id', 'method', 'path', 'params', 'headers', 'body',
+                 'request_bytes', 'status', 'response_bytes', 'duration', 'elapsed', 'error', 'message']
+
+    def __init__(self, **kwargs):
+        for name in self.__slots__:
+            setattr(self, name, kwargs.get(name))
+
+    def to_dict(self):
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+    def __repr__(self):
+        return 'SampledCall(kind={!r}, method={!r}, path={!r}, status={!r}, duration={!r})'.format(
+            self.kind, self.method, self.path, self.status, self.duration)
+
+
+class CallSampler(object):
+    """
+    The class keeps the details of api calls that are slower than a threshold or fail.
+
+    Pass it to api classes as the `sampler` client setting. Slow and failed calls are kept
+    in separate reservoirs of at most `capacity` calls each, every qualifying call has the same
+    chance to be in its reservoir regardless of how many occurred, so memory stays bounded under
+    any load. Fast successful calls are only counted. Request bodies,
+    params and headers are kept with sensitive values such as auth codes replaced by `REDACTED`.
+
+    Example:
+        sampler = CallSampler(threshold=0.5)
+        api = DomainApi(auth, sampler=sampler)
+        ...
+        for call in sampler.samples('slow'):
+            print(call.path, call.duration)
+    """
+
+    def __init__(self, threshold=1.0, capacity=100, max_body=2048, rand=None):
+        """
+        Parameters
+        ----------
+        threshold : float
+            seconds above which a successful call is sampled as slow
+
+        capacity : int
+            maximum number of calls kept per kind
+
+        max_body : int
+            maximum number of characters of request bodies kept, None to keep them whole
+
+        rand : random.Random
+            source of randomness of the reservoirs
+        """
+        self.threshold = threshold
+        self.capacity = capacity
+        self.max_body = max_body
+        self._random = rand if rand is not None else random.Random()
+        self._lock = threading.Lock()
+        self.clear()
+
+    def observe(self, method, path, kwargs, duration, resp=None, error=None, correlation_id=None):
+        """
+        Samples a completed call if it was slow or failed, called by api._do.
+
+        :param method: http method
+        :param path: path of the request
+        :param kwargs: keyword arguments that were passed to requests
+        :param duration: seconds the call took
+        :param resp: response of the call if it succeeded
+        :param error: exception raised by the call if it failed
+        :param correlation_id: correlation id of the call, defaults to the current one
+        """
+        if error is None and duration < self.threshold:
+            with self._lock:
+                self._calls += 1
+            return
+        kind = 'error' if error is not None else 'slow'
+
+        with self._lock:
+            self._calls += 1
+            seen = self._seen[kind] = self._seen[kind] + 1
+            if seen <= self.capacity:
+                slot = None
+            else:
+                slot = self._random.randrange(seen)
+                if slot >= self.capacity:
+                    return
+
+        call = self._make_call(kind, method, path, kwargs, duration, resp, error, correlation_id)
+        with self._lock:
+            reservoir = self._reservoirs[kind]
+            if len(reservoir) < self.capacity:
+                reservoir.append(call)
+            elif slot is not None:
+                reservoir[slot] = call
+
+    def _make_call(self, kind, method, path, kwargs, duration, resp, error, correlation_id):
+        body, request_bytes = sanitize_body(kwargs, self.max_body)
+        status = response_bytes = elapsed = None
+        if resp is not None:
+            status = resp.status_code
+            response_bytes = response_size(resp, kwargs.get('stream', False))
+            elapsed = resp.elapsed.total_seconds() if getattr(resp, 'elapsed', None) is not None else None
+        if error is not None:
+            status = getattr(error, 'status_code', status)
+            length = (getattr(error, 'headers', None) or {}).get('Content-Length')
+            if length is not None:
+                response_bytes = int(length)
+
+        return SampledCall(
+            kind=kind,
+            timestamp=time.time(),
+            correlation_id=correlation_id if correlation_id is not None else current_correlation_id(),
+            method=method,
+            path=path,
+            params=redact(dict(kwargs.get('params') or {})),
+            headers=redact(dict(kwargs.get('headers') or {})),
+            body=body,
+            request_bytes=request_bytes,
+            status=status,
+            response_bytes=response_bytes,
+            duration=duration,
+            elapsed=elapsed,
+            error=error.__class__.__name__ if error is not None else None,
+            message=str(error) if error is not None else None,
+        )
+
+    def samples(self, kind=None):
+        """
+        Returns the kept calls, oldest first.
+
+        :param kind: 'slow' or 'error' to return only calls of this kind, all calls by default
+        :return: list of SampledCall
+        """
+        with self._lock:
+            if kind is None:
+                calls = [call for k in KINDS for call in self._reservoirs[k]]
+            else:
+                calls = list(self._reservoirs[kind])
+        return sorted(calls, key=lambda call: call.timestamp)
+
+    def stats(self):
+        """Returns a dict with the number of observed calls, slow and failed calls and kept calls."""
+        with self._lock:
+            return {
+                'calls': self._calls,
+                'slow': self._seen['slow'],
+                'errors': self._seen['error'],
+                'kept': sum(len(reservoir) for reservoir in self._reservoirs.values()),
+            }
+
+    def clear(self):
+        """Drops all kept calls and counts."""
+        with self._lock:
+            self._calls = 0
+            self._seen = dict((kind, 0) for kind in KINDS)
+            self._reservoirs = dict((kind, []) for kind in KINDS)
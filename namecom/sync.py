@@ -0,0 +1,188 @@
+"""
+namecom: sync.py
+
+Implements the diff and apply steps of desired-state sync operations,
+used by the sync methods of api classes.
+
+Tianhong Chu [https://github.com/CtheSky]
+License: MIT
+"""
+
+__all__ = ['SyncPlan', 'SyncReport', 'plan_sync', 'apply_plan']
+
+CREATE = 'create'
+UPDATE = 'update'
+DELETE = 'delete'
+
+
+class SyncPlan(object):
+    """
+    The class lists the operations needed to turn the current state into the desired state.
+
+    Attributes
+    ----------
+    creates : [] :class:`~namecom.data_models.DataModel`
+        desired models that do not exist yet
+
+    updates : [] (current, desired) tuple
+        models that exist but differ in a compared field
+
+    deletes : [] :class:`~namecom.data_models.DataModel`
+        current models that are not desired
+
+    unchanged : int
+        number of models that are already up to date
+    """
+
+    def __init__(self, creates=None, updates=None, deletes=None, unchanged=0):
+        self.creates = creates if creates is not None else []
+        self.updates = updates if updates is not None else []
+        self.deletes = deletes if deletes is not None else []
+        self.unchanged = unchanged
+
+    def operations(self):
+        """Returns a list of (action, model) tuples, model is the desired one except for deletes."""
+        return ([(CREATE, model) for model in self.creates] +
+                [(UPDATE, desired) for _, desired in self.updates] +
+                [(DELETE, model) for model in self.deletes])
+
+    def __len__(self):
+        return len(self.creates) + len(self.updates) + len(self.deletes)
+
+    def __repr__(self):
+        return 'SyncPlan(creates={}, updates={}, deletes={}, unchanged={})'.format(
+            len(self.creates), len(self.updates), len(self.deletes), self.unchanged)
+
+
+class SyncReport(object):
+    """
+    The class reports the outcome of a sync operation.
+
+    Attributes
+    ----------
+    plan : :class:`~namecom.sync.SyncPlan`
+        the computed plan
+
+    dry_run : bool
+        whether the plan was only computed and not applied
+
+    items : [] :class:`~namecom.result_models.BatchItemResult`
+        one result per applied operation, each item is an (action, model) tuple
+
+    skipped : [] (action, model) tuple
+        operations not attempted because an earlier phase failed
+    """
+
+    def __init__(self, plan, items=None, skipped=None, dry_run=False):
+        self.plan = plan
+        self.items = items if items is not None else []
+        self.skipped = skipped if skipped is not None else []
+        self.dry_run = dry_run
+
+    def _applied(self, action):
+        return [item.item[1] for item in self.items if item.ok and item.item[0] == action]
+
+    @property
+    def created(self):
+        return self._applied(CREATE)
+
+    @property
+    def updated(self):
+        return self._applied(UPDATE)
+
+    @property
+    def deleted(self):
+        return self._applied(DELETE)
+
+    @property
+    def failed(self):
+        return [item for item in self.items if not item.ok]
+
+    @property
+    def ok(self):
+        """Whether every planned operation was applied."""
+        return not self.dry_run and not self.failed and not self.skipped
+
+    def __repr__(self):
+        return 'SyncReport(plan={!r}, dry_run={}, created={}, updated={}, deleted={}, failed={}, skipped={})'.format(
+            self.plan, self.dry_run, len(self.created), len(self.updated), len(self.deleted),
+            len(self.failed), len(self.skipped))
+
+
+def plan_sync(current, desired, key, fields, delete_missing=True, normalize=None):
+    """
+    Diffs the current models against the desired models.
+
+    :param current: iterable of models read from the api
+    :param desired: iterable of desired models
+    :param key: name of the attribute identifying a model, e.g. 'emailBox'
+    :param fields: names of the attributes compared to decide whether a model needs an update
+    :param delete_missing: whether current models absent from desired are deleted
+    :param normalize: dict of field -> function applied to both values before comparing, e.g. sorted
+    :return: an instance of SyncPlan
+    """
+    normalize = normalize or {}
+
+    def differs(existing, model):
+        for field in fields:
+            func = normalize.get(field)
+            old, new = getattr(existing, field), getattr(model, field)
+            if (func(old) != func(new)) if func else (old != new):
+                return True
+        return False
+
+    remaining = dict((getattr(model, key), model) for model in current)
+    plan = SyncPlan()
+    seen = set()
+
+    for model in desired:
+        model_key = getattr(model, key)
+        if model_key in seen:
+            raise ValueError('duplicate {} in desired state: {!r}'.format(key, model_key))
+        seen.add(model_key)
+
+        existing = remaining.pop(model_key, None)
+        if existing is None:
+            plan.creates.append(model)
+        elif differs(existing, model):
+            plan.updates.append((existing, model))
+        else:
+            plan.unchanged += 1
+
+    if delete_missing:
+        plan.deletes = list(remaining.values())
+
+    return plan
+
+
+def apply_plan(api, plan, handlers, max_workers=None, phased=False, retire_updated=False):
+    """
+    Applies the operations of a plan concurrently.
+
+    :param api: api object whose thread pool settings are used
+    :param plan: an instance of SyncPlan
+    :param handlers: dict of action -> function called with the model
+    :param max_workers: number of worker threads
+    :param phased: if True, creates and updates are applied first and deletes only if all of them succeeded
+    :param retire_updated: if True, the current model of each update is also deleted in the second phase,
+                           for updates that add the desired model next to the current one
+    :return: an instance of SyncReport
+    """
+    def apply(operation):
+        action, model = operation
+        return handlers[action](model)
+
+    operations = plan.operations()
+    if not phased:
+        return SyncReport(plan, api._run_batch(operations, apply, max_workers=max_workers).items)
+
+    first = [op for op in operations if op[0] != DELETE]
+    second = [op for op in operations if op[0] == DELETE]
+    if retire_updated:
+        second += [(DELETE, current) for current, _ in plan.updates]
+
+    batch = api._run_batch(first, apply, max_workers=max_workers)
+    if not batch.ok:
+        return SyncReport(plan, batch.items, skipped=second)
+
+    return SyncReport(plan, batch.items + api._run_batch(second, apply, max_workers=max_workers).items)
@@ -0,0 +1,57 @@
+"""
+namecom: timeouts.py
+
+Defines default http timeouts and the Deadline class that
+bounds the total time spent on a sequence of api calls.
+
+Tianhong Chu [https://github.com/CtheSky]
+License: MIT
+"""
+
+from .utils.time_utils import clock as _clock
+
+__all__ = ['DEFAULT_TIMEOUT', 'Deadline']
+
+# (connect timeout, read timeout) in seconds, passed to requests
+DEFAULT_TIMEOUT = (3.05, 30)
+
+
+class Deadline(object):
+    """
+    The class for an overall deadline.
+
+    A deadline is shared by every request made through an api object, including each page
+    fetched by pagination helpers. Connect and read timeouts of each request are capped
+    by the remaining time, and :class:`~namecom.exceptions.DeadlineExceededError` is raised
+    once the deadline has passed.
+    """
+
+    def __init__(self, seconds):
+        """
+        Parameters
+        ----------
+        seconds : float
+            how many seconds from now the deadline expires
+        """
+        self.seconds = seconds
+        self.expires_at = _clock() + seconds
+
+    def remaining(self):
+        """Returns the remaining seconds, may be negative when expired."""
+        return self.expires_at - _clock()
+
+    def expired(self):
+        """Returns whether the deadline has passed."""
+        return self.remaining() <= 0
+
+    def cap(self, timeout):
+        """Returns timeout capped by the remaining time, timeout could be a number or a (connect, read) tuple."""
+        remaining = max(self.remaining(), 0)
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+        return min(timeout, remaining)
+
+    def __repr__(self):
+        return 'Deadline(seconds={!r}, remaining={:.3f})'.format(self.seconds, self.remaining())
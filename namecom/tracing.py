@@ -0,0 +1,283 @@
+"""
+namecom: tracing.py
+
+Implements request tracing: spans recorded around each api request,
+correlation ids propagated to requests and worker threads, and span sinks.
+
+Tianhong Chu [https://github.com/CtheSky]
+License: MIT
+"""
+
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+from .utils.http_utils import response_size
+from .utils.time_utils import clock as _clock
+
+__all__ = ['Tracer', 'Span', 'RingBufferSink', 'JsonlFileSink', 'correlation_id', 'current_correlation_id']
+
+# collection segment -> placeholder of the segment following it
+_KEY_SEGMENTS = {
+    'domains': '{domainName}',
+    'transfers': '{domainName}',
+    'records': '{id}',
+    'forwarding': '{key}',
+    'vanity_nameservers': '{hostname}',
+    'dnssec': '{digest}',
+}
+
+_local = threading.local()
+
+
+class _Correlation(object):
+    """The correlation id of the current context and the attempts of each request made under it."""
+
+    def __init__(self, value):
+        self.value = value
+        self.attempts = {}
+        self.lock = threading.Lock()
+
+    def next_attempt(self, key):
+        with self.lock:
+            attempt = self.attempts[key] = self.attempts.get(key, 0) + 1
+            return attempt
+
+
+def _current():
+    return getattr(_local, 'correlation', None)
+
+
+def _activate(correlation):
+    """Sets the correlation of this thread, returns the previous one."""
+    previous = _current()
+    _local.correlation = correlation
+    return previous
+
+
+@contextmanager
+def correlation_id(value=None):
+    """
+    Context manager tagging the requests made inside it with a correlation id.
+
+    The id is sent as the header of the tracer and recorded in every span, also for requests
+    made by the worker threads of bulk helpers. A request repeated inside the same context
+    is recorded with an increasing attempt number.
+
+    Example:
+        with correlation_id(request.headers['X-Request-ID']):
+            api.create_records(records)
+
+    :param value: the correlation id, a random one by default
+    :return: the correlation id
+    """
+    previous = _activate(_Correlation(value if value is not None else uuid.uuid4().hex))
+    try:
+        yield _current().value
+    finally:
+        _activate(previous)
+
+
+def current_correlation_id():
+    """Returns the correlation id of the current context, or None."""
+    correlation = _current()
+    return correlation.value if correlation is not None else None
+
+
+def endpoint_template(path):
+    """
+    Returns the endpoint template and domain name of a request path.
+
+    Example: '/v4/domains/example.org/records/12' -> ('/v4/domains/{domainName}/records/{id}', 'example.org')
+    """
+    segments = path.split('/')
+    domain = None
+    for i in range(1, len(segments)):
+        collection = segments[i - 1].split(':')[0]
+        placeholder = _KEY_SEGMENTS.get(collection)
+        if placeholder is None or not segments[i]:
+            continue
+        key, sep, action = segments[i].partition(':')
+        if placeholder == '{domainName}' and domain is None:
+            domain = key
+        segments[i] = placeholder + sep + action
+    return '/'.join(segments), domain
+
+
+class Span(object):
+    """
+    The class records one request sent by an api object.
+
+    Attributes
+    ----------
+    correlation_id : string
+        id linking the span to the work that caused it
+
+    method : string
+        http method
+
+    endpoint : string
+        endpoint template, e.g. '/v4/domains/{domainName}/records/{id}'
+
+    domain : string
+        domain name in the path, None if the endpoint has none
+
+    page : int
+        requested page of list methods, None otherwise
+
+    attempt : int
+        1 for the first request to a url in a correlation context, incremented for each repetition
+
+    start : float
+        epoch time the request started
+
+    duration : float
+        seconds until the response was received or the request failed
+
+    bytes : int
+        size of the response body, None if unknown
+
+    status : int
+        http status code, None if no response was received
+
+    error : string
+        name of the exception class if the request failed
+    """
+
+    __slots__ = ['correlation_id', 'method', 'endpoint', 'domain', 'page', 'attempt', 'start', 'duration',
+                 'bytes', 'status', 'error', '_started']
+
+    def __init__(self, correlation_id, method, endpoint, domain=None, page=None, attempt=1):
+        self.correlation_id = correlation_id
+        self.method = method
+        self.endpoint = endpoint
+        self.domain = domain
+        self.page = page
+        self.attempt = attempt
+        self.start = time.time()
+        self.duration = None
+        self.bytes = None
+        self.status = None
+        self.error = None
+        self._started = _clock()
+
+    def to_dict(self):
+        return dict((name, getattr(self, name)) for name in self.__slots__ if not name.startswith('_'))
+
+    def __repr__(self):
+        return 'Span({})'.format(', '.join('{}={!r}'.format(k, v) for k, v in sorted(self.to_dict().items())))
+
+
+class RingBufferSink(object):
+    """The sink keeping the latest `maxsize` spans in memory."""
+
+    def __init__(self, maxsize=1000):
+        self._spans = deque(maxlen=maxsize)
+
+    def emit(self, span):
+        self._spans.append(span)
+
+    def spans(self):
+        """Returns the kept spans, oldest first."""
+        return list(self._spans)
+
+    def clear(self):
+        self._spans.clear()
+
+
+class JsonlFileSink(object):
+    """The sink appending each span as one json line to a file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a')
+        self._lock = threading.Lock()
+
+    def emit(self, span):
+        line = json.dumps(span.to_dict(), sort_keys=True)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class Tracer(object):
+    """
+    The class records a :class:`Span` for every request sent by api objects that use it.
+
+    Pass it to api classes as the `tracer` client setting. Spans are emitted to the sink once
+    the request completes. Requests made inside :func:`correlation_id` carry its id, both in
+    the span and as the `header` of the request, other requests get a random id each.
+    Api objects without a tracer skip tracing entirely.
+    """
+
+    def __init__(self, sink=None, header='X-Correlation-ID'):
+        """
+        Parameters
+        ----------
+        sink :
+            object with an emit(span) method, defaults to a RingBufferSink
+
+        header : string
+            request header carrying the correlation id, None to not send it
+        """
+        self.sink = sink if sink is not None else RingBufferSink()
+        self.header = header
+
+    def start(self, method, path, kwargs):
+        """
+        Starts the span of a request, adding the correlation header to its keyword arguments.
+
+        :param method: http method
+        :param path: path of the request
+        :param kwargs: keyword arguments that will be passed to requests
+        :return: an instance of Span
+        """
+        correlation = _current()
+        template, domain = endpoint_template(path)
+        params = kwargs.get('params') or {}
+
+        if correlation is not None:
+            value = correlation.value
+            attempt = correlation.next_attempt((method, path, tuple(sorted(params.items()))))
+        else:
+            value = uuid.uuid4().hex
+            attempt = 1
+
+        if self.header:
+            kwargs['headers'] = dict(kwargs.get('headers') or {}, **{self.header: value})
+
+        return Span(value, method, template, domain, params.get('page'), attempt)
+
+    def finish(self, span, resp=None, error=None, streamed=False):
+        """Completes a span with the response or the exception and emits it."""
+        span.duration = _clock() - span._started
+        if resp is not None:
+            span.status = resp.status_code
+            span.bytes = response_size(resp, streamed)
+        if error is not None:
+            span.error = error.__class__.__name__
+            span.status = getattr(error, 'status_code', span.status)
+        self.sink.emit(span)
+
+
+def bind_correlation(func):
+    """Returns func wrapped to run under the correlation context of the calling thread."""
+    correlation = _current()
+    if correlation is None:
+        return func
+
+    def call(*args, **kwargs):
+        previous = _activate(correlation)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _activate(previous)
+
+    return call
@@ -0,0 +1,138 @@
+"""
+namecom: transport.py
+
+Implements the transports api objects send their requests with:
+the default one backed by requests, and an in-memory one for tests and benchmarks.
+
+Tianhong Chu [https://github.com/CtheSky]
+License: MIT
+"""
+
+import threading
+from multiprocessing.pool import ThreadPool
+
+import requests
+
+from .utils.http_utils import build_response
+from .utils.time_utils import clock as _clock
+
+__all__ = ['Transport', 'RequestsTransport', 'MemoryTransport']
+
+
+class Transport(object):
+    """
+    The base class of transports, pass an instance to api classes as the `transport` client setting.
+
+    A transport implements :meth:`request`, which must behave like `requests.request` for the
+    arguments api objects use:
+
+      1. `auth` is a (username, token) tuple sent as http basic authentication
+      2. `params` are encoded into the query of `url`, `data` is sent as the body as is
+      3. it returns a requests.Response, or an object with the same `status_code`, `headers`
+         (case-insensitive), `content`, `json()`, `iter_lines()`, `url` and `request.method`
+      4. timeouts raise requests.Timeout, other failures to get a response raise requests.ConnectionError
+      5. it can be called from several threads at once
+
+    :meth:`request_async` returns a handle whose `get(timeout=None)` returns the response or raises
+    the error of :meth:`request`, by default the request runs on a thread pool of the transport.
+    Transports built on an asynchronous http stack override it. The contract tests in
+    `tests/transport_contract.py` check all of the above.
+    """
+
+    max_workers = 8
+    _pool = None
+
+    def request(self, method, url, auth=None, timeout=None, params=None, data=None, headers=None, stream=False):
+        """
+        Sends a request and returns its response.
+
+        :param method: http method
+        :param url: url of the request without query
+        :param auth: (username, token) tuple
+        :param timeout: seconds, or a (connect, read) tuple
+        :param params: dict of query parameters
+        :param data: request body
+        :param headers: dict of extra request headers
+        :param stream: whether the body can be read incrementally with iter_lines
+        :return: a requests.Response
+        """
+        raise NotImplementedError
+
+    def request_async(self, method, url, **kwargs):
+        """
+        Sends a request without waiting for its response.
+
+        :return: a handle whose get(timeout=None) returns the response of :meth:`request`
+        """
+        if self._pool is None:
+            with _pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPool(self.max_workers)
+        return self._pool.apply_async(self.request, (method, url), kwargs)
+
+    def close(self):
+        """Releases the resources of the transport."""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.terminate()
+
+
+_pool_lock = threading.Lock()
+
+
+class RequestsTransport(Transport):
+    """The default transport, sends requests with the requests package."""
+
+    def __init__(self, session=None):
+        """
+        Parameters
+        ----------
+        session : requests.Session
+            session sending the requests, see :func:`~namecom.make_session`, a new connection
+            per request if None
+        """
+        self.session = session
+
+    def request(self, method, url, **kwargs):
+        sender = self.session if self.session is not None else requests
+        return sender.request(method, url, **kwargs)
+
+    def close(self):
+        super(RequestsTransport, self).close()
+        if self.session is not None:
+            self.session.close()
+
+
+class MemoryTransport(Transport):
+    """
+    The transport answering requests with a function instead of the network.
+
+    The handler is called with the prepared request, a requests.PreparedRequest with the final
+    url, headers and body, and returns a (status_code, headers, content) tuple. Use it for
+    benchmarks of the client without network noise, or as a stand-in of the api in tests.
+    A handler slower than the read timeout raises requests.ReadTimeout like a slow server would.
+
+    Example:
+        transport = MemoryTransport(lambda request: (200, {}, b'{"records": []}'))
+        api = DnsApi('example.org', auth, transport=transport)
+    """
+
+    def __init__(self, handler):
+        """
+        Parameters
+        ----------
+        handler : callable
+            function of a requests.PreparedRequest returning (status_code, headers, content)
+        """
+        self.handler = handler
+
+    def request(self, method, url, auth=None, timeout=None, params=None, data=None, headers=None, stream=False):
+        prepared = requests.Request(method, url, auth=auth, params=params, data=data, headers=headers).prepare()
+        start = _clock()
+        status_code, response_headers, content = self.handler(prepared)
+        read_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+        if read_timeout is not None and _clock() - start > read_timeout:
+            raise requests.ReadTimeout('handler took longer than the read timeout of {}s'.format(read_timeout))
+        resp = build_response(method, prepared.url, status_code, response_headers, content)
+        resp.request = prepared
+        return resp
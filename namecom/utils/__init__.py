@@ -1,7 +1,7 @@
 """
 namecom: utils/__init__.py
 
-This submodule provides json and result parse utility functions.
+This submodule provides json, result parse, http response and clock utility functions.
 
 Tianhong Chu [https://github.com/CtheSky]
 License: MIT
@@ -9,3 +9,5 @@ License: MIT
 
 from .json_utils import *
 from .parse_utils import *
+from .http_utils import *
+from .time_utils import *
@@ -0,0 +1,53 @@
+"""
+namecom: utils/http_utils.py
+
+Provides helpers to build requests.Response objects
+from stored or recorded response data, and pooled sessions.
+
+Tianhong Chu [https://github.com/CtheSky]
+License: MIT
+"""
+
+import requests
+
+__all__ = ['build_response', 'make_session', 'response_size']
+
+
+def build_response(method, url, status_code, headers, content):
+    """Returns a requests.Response as if it was received for method and url."""
+    resp = requests.models.Response()
+    resp.request = requests.Request(method, url).prepare()
+    resp.url = url
+    resp.status_code = status_code
+    resp.headers.update(headers or {})
+    resp._content = content
+    resp._content_consumed = True
+    resp.encoding = 'utf-8'
+    return resp
+
+
+def make_session(pool_size=10):
+    """
+    Returns a requests.Session keeping up to pool_size connections per host alive.
+
+    Pass it to api classes as the `session` client setting so concurrent calls reuse
+    connections instead of opening one per request.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def response_size(resp, streamed=False):
+    """Returns the size of the response body in bytes, None if unknown without consuming a stream."""
+    length = resp.headers.get('Content-Length')
+    if length is not None:
+        return int(length)
+    if streamed:
+        return None
+    try:
+        return len(resp.content)
+    except TypeError:
+        return None
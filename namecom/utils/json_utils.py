@@ -14,10 +14,31 @@ from ..data_models import DataModel
 
 class DataModelEncoder(json.JSONEncoder):
 
+    def __init__(self, omit_none=False, **kwargs):
+        super(DataModelEncoder, self).__init__(**kwargs)
+        self.omit_none = omit_none
+
     def default(self, o):
         if isinstance(o, DataModel):
-            return o.to_dict()
-        return json.JSONEncoder.default(o)
+            return o.to_dict(self.omit_none)
+        return json.JSONEncoder.default(self, o)
 
 
 json_dumps = functools.partial(json.dumps, cls=DataModelEncoder)
+
+# encoders are stateless between calls, so one instance of each is reused
+_BYTES_ENCODERS = {
+    omit_none: DataModelEncoder(omit_none=omit_none, separators=(',', ':'), check_circular=False)
+    for omit_none in (False, True)
+}
+
+
+def json_bytes(obj, omit_none=True):
+    """
+    Serializes obj to compact utf-8 encoded json, used for request payloads holding data models.
+
+    :param obj: object to serialize, data models may be nested anywhere
+    :param omit_none: whether fields of data models whose value is None are left out
+    :return: bytes
+    """
+    return _BYTES_ENCODERS[omit_none].encode(obj).encode('utf-8')
@@ -34,7 +34,7 @@ def parse_delete_record(result, dct):
 
 
 def parse_list_dnssecs(result, dct):
-    result.dnssecs = [DNSSEC.from_dict(obj) for obj in dct.get('dnssec')]
+    result.dnssecs = [DNSSEC.from_dict(obj) for obj in dct.get('dnssec', [])]
     result.nextPage = dct.get('nextPage')
     result.lastPage = dct.get('lastPage')
 
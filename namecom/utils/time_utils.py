@@ -0,0 +1,15 @@
+"""
+namecom: utils/time_utils.py
+
+Provides the clock used to measure durations and deadlines.
+
+Tianhong Chu [https://github.com/CtheSky]
+License: MIT
+"""
+
+import time
+
+__all__ = ['clock']
+
+# monotonic where available, so durations are not skewed by system clock changes
+clock = getattr(time, 'monotonic', time.time)
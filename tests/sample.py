@@ -1,4 +1,17 @@
+import base64
+import datetime
+import json
+
+import requests
+
 from namecom import Domain, Contact, Contacts, Record, DNSSEC, EmailForwarding, URLForwarding, VanityNameserver, Auth
+from namecom import MemoryTransport
+from namecom.utils.http_utils import build_response
+
+try:
+    from urllib.parse import parse_qs, urlsplit
+except ImportError:
+    from urlparse import parse_qs, urlsplit
 
 correct_auth = Auth('cthesky-test', '96414285232f77557662ba9be585ba926f04dc9b')
 wrong_auth = Auth('cthesky-test', 'wrong token')
@@ -36,3 +49,32 @@ vanity_nameserver_sample1 = VanityNameserver(domainName='cthesky.band', hostname
                                              ips=["192.168.1.1", "fd01:4860:4860::8888"])
 vanity_nameserver_sample2 = VanityNameserver(domainName='cthesky.band', hostname='ns1.cthesky.band',
                                              ips=["192.168.0.1", "fd01:4860:4860::8888"])
+
+
+def make_response(status_code=200, dct=None, headers=None, method='GET', url='https://api.dev.name.com/v4/',
+                  params=None, elapsed=0.0):
+    """Returns a requests.Response of the api with dct as json body, an empty body if dct is None."""
+    content = json.dumps(dct).encode('utf-8') if dct is not None else b''
+    url = requests.Request(method, url, params=params).prepare().url
+    resp = build_response(method, url, status_code, headers, content)
+    resp.elapsed = datetime.timedelta(seconds=elapsed)
+    return resp
+
+
+def fake_transport(request):
+    """
+    Returns a MemoryTransport answering requests with a fake of the api.
+
+    request is called like requests.request, with the method, the url without query and the
+    params, data, headers and auth of the request, and returns a response of :func:`make_response`.
+    """
+    def handler(prepared):
+        parts = urlsplit(prepared.url)
+        url = '{}://{}{}'.format(parts.scheme, parts.netloc, parts.path)
+        params = dict((k, v[0]) for k, v in parse_qs(parts.query).items()) or None
+        auth = base64.b64decode(prepared.headers['Authorization'].split(' ', 1)[1]).decode('utf-8')
+        resp = request(prepared.method, url, params=params, data=prepared.body, headers=prepared.headers,
+                       auth=tuple(auth.split(':', 1)))
+        return resp.status_code, resp.headers, resp.content
+
+    return MemoryTransport(handler)
@@ -0,0 +1,70 @@
+import unittest
+
+import requests
+
+from namecom import AccountReader, Deadline, Domain, exceptions
+from namecom.result_models import ListDomainsResult
+from .sample import correct_auth, fake_transport, make_response
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+def fake_request(method, url, params=None, **kwargs):
+    path = url.split('/v4/', 1)[1]
+    if path == 'domains':
+        if int(params['page']) == 1:
+            return make_response(200, {'domains': [{'domainName': 'a.org'}], 'nextPage': 2})
+        return make_response(200, {'domains': [{'domainName': 'b.org'}, {'domainName': 'missing.org'}]})
+
+    domainName = path.split('/')[1]
+    if domainName == 'missing.org':
+        return make_response(404, {'message': 'Not Found'})
+
+    records = [{'id': int(params['page']), 'domainName': domainName, 'fqdn': domainName + '.', 'type': 'A',
+                'answer': '10.0.0.1'}]
+    return make_response(200, {'records': records, 'nextPage': 2 if int(params['page']) == 1 else None})
+
+
+class AccountReaderTestCase(unittest.TestCase):
+
+    def test_iter_records(self):
+        reader = AccountReader(correct_auth, use_test_env=True, max_workers=4, transport=fake_transport(fake_request))
+        errors = {}
+        got = dict(reader.iter_records(errors=errors))
+
+        self.assertEqual(sorted(got), ['a.org', 'b.org'])
+        self.assertEqual([r.id for r in got['a.org']], [1, 2])
+        self.assertIsInstance(errors['missing.org'], exceptions.NotFoundError)
+
+    def test_domain_inputs(self):
+        reader = AccountReader(correct_auth, use_test_env=True, transport=fake_transport(fake_request))
+        result = ListDomainsResult(make_response(200, {}))
+        result.domains = [Domain('a.org'), Domain('b.org')]
+
+        self.assertEqual(list(reader.iter_domain_names(result)), ['a.org', 'b.org'])
+        self.assertEqual(list(reader.iter_domain_names(['a.org', Domain('b.org')])), ['a.org', 'b.org'])
+
+        got = list(reader.iter_records(result, ordered=True))
+        self.assertEqual([name for name, _ in got], ['a.org', 'b.org'])
+        self.assertRaises(exceptions.NotFoundError, list, reader.iter_records(['missing.org']))
+
+    def test_reads_share_a_pooled_session_and_deadline(self):
+        reader = AccountReader(correct_auth, use_test_env=True, max_workers=4, deadline=60)
+        self.assertIsInstance(reader.settings['deadline'], Deadline)
+        sessions = set()
+
+        def request(session, method, url, **kwargs):
+            sessions.add(session)
+            return fake_request(method, url, **kwargs)
+
+        with mock.patch.object(requests.Session, 'request', autospec=True, side_effect=request), \
+                mock.patch.object(requests.Session, 'close', autospec=True) as close, \
+                mock.patch('namecom.api.requests.request') as plain_request:
+            dict(reader.iter_records(errors={}))
+
+        self.assertFalse(plain_request.called)
+        self.assertEqual(len(sessions), 1)
+        close.assert_called_once_with(sessions.pop())
@@ -0,0 +1,374 @@
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from namecom import (Auth, AvailabilityCache, ConditionalCache, DnsApi, DomainApi, DomainSearchResult,
+                     MemoryCacheBackend, NegativeCache, ReadCache, SQLiteCacheBackend, TransferApi)
+from namecom.cache import CacheBackend
+from namecom.exceptions import NotFoundError, PermissionDeniedError
+from .sample import correct_auth, domain_sample1, fake_transport, make_response, record_sample1
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class ConditionalCacheTestCase(unittest.TestCase):
+
+    def test_etag_revalidation(self):
+        cache = ConditionalCache()
+        sent_etags = []
+
+        def request(method, url, headers=None, **kwargs):
+            sent_etags.append(headers.get('If-None-Match'))
+            if headers.get('If-None-Match') == '"v1"':
+                return make_response(304, headers={'ETag': '"v1"'})
+            return make_response(200, domain_sample1.to_dict(), headers={'ETag': '"v1"'})
+
+        api = DomainApi(correct_auth, use_test_env=True, conditional_cache=cache, transport=fake_transport(request))
+        first = api.get_domain(domain_sample1.domainName)
+        second = api.get_domain(domain_sample1.domainName)
+
+        self.assertEqual(sent_etags, [None, '"v1"'])
+        self.assertIs(first, second)
+        self.assertEqual(second.domain, domain_sample1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_content_hash_fallback(self):
+        cache = ConditionalCache()
+        answers = ['10.0.0.1', '10.0.0.1', '10.0.0.2']
+
+        def request(method, url, params=None, **kwargs):
+            record = dict(record_sample1.to_dict(), answer=answers.pop(0))
+            return make_response(200, {'records': [record]})
+
+        api = DnsApi(record_sample1.domainName, correct_auth, use_test_env=True, conditional_cache=cache,
+                     transport=fake_transport(request))
+        first = api.list_records()
+        second = api.list_records()
+        third = api.list_records()
+
+        self.assertIs(first, second)
+        self.assertIsNot(second, third)
+        self.assertEqual(third.records[0].answer, '10.0.0.2')
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_not_modified_refreshes_headers(self):
+        cache = ConditionalCache()
+        sent_etags = []
+
+        def request(method, url, headers=None, **kwargs):
+            sent_etags.append(headers.get('If-None-Match'))
+            if headers.get('If-None-Match') == '"v1"':
+                return make_response(304, headers={'ETag': '"v1"', 'X-RateLimit-Remaining': '9'})
+            return make_response(200, domain_sample1.to_dict(), {'ETag': '"v1"', 'X-RateLimit-Remaining': '10'})
+
+        api = DomainApi(correct_auth, use_test_env=True, conditional_cache=cache, transport=fake_transport(request))
+        first = api.get_domain(domain_sample1.domainName)
+        self.assertEqual(first.headers['X-RateLimit-Remaining'], '10')
+        second = api.get_domain(domain_sample1.domainName)
+        self.assertEqual(second.headers['X-RateLimit-Remaining'], '9')
+
+        real_headers = cache.request_headers
+
+        def evicting_headers(*args):
+            # evicted between sending the validators and parsing the 304
+            headers = real_headers(*args)
+            cache.invalidate()
+            return headers
+
+        with mock.patch.object(cache, 'request_headers', side_effect=evicting_headers):
+            third = api.get_domain(domain_sample1.domainName)
+        self.assertEqual(sent_etags, [None, '"v1"', '"v1"', None])
+        self.assertEqual(third.domain, domain_sample1)
+
+    def test_lru_and_invalidate(self):
+        cache = ConditionalCache(maxsize=2)
+        for i in range(3):
+            url = 'https://api.dev.name.com/v4/domains/%d' % i
+            cache.parse(make_response(200, {}, {'ETag': 'x'}, url=url), lambda r, d: None, lambda r: r)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.request_headers('https://api.dev.name.com/v4/domains/0'), {})
+
+        cache.invalidate('https://api.dev.name.com/v4/domains/1')
+        self.assertEqual(len(cache), 1)
+
+
+class ReadCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def check_backend(self, backend, other):
+        backend.set('https://h/v4/domains/a.org', b'a', 60)
+        backend.set('https://h/v4/domains/a.org/records', b'r', 60)
+        backend.set('https://h/v4/domains/b.org', b'b', 60)
+        backend.set('https://h/v4/transfers', b'expired', -1)
+
+        self.assertEqual(other.get('https://h/v4/domains/a.org'), b'a')
+        self.assertIsNone(other.get('https://h/v4/transfers'))
+        self.assertIsNone(other.get('https://h/v4/missing'))
+
+        other.invalidate('https://h/v4/domains/a.org')
+        self.assertIsNone(backend.get('https://h/v4/domains/a.org'))
+        self.assertIsNone(backend.get('https://h/v4/domains/a.org/records'))
+        self.assertEqual(backend.get('https://h/v4/domains/b.org'), b'b')
+
+        backend.invalidate()
+        self.assertIsNone(other.get('https://h/v4/domains/b.org'))
+
+    def test_memory_backend(self):
+        backend = MemoryCacheBackend()
+        self.check_backend(backend, backend)
+
+    def test_sqlite_backend_shared_by_instances(self):
+        path = os.path.join(self.tmpdir, 'cache.sqlite')
+        self.check_backend(SQLiteCacheBackend(path), SQLiteCacheBackend(path))
+
+    def test_sqlite_backend_reconnects_after_fork(self):
+        backend = SQLiteCacheBackend(os.path.join(self.tmpdir, 'cache.sqlite'))
+        self.assertIsNone(getattr(backend._local, 'conn', None))
+
+        backend.set('https://h/v4/domains/a.org', b'a', 60)
+        parent_conn = backend._local.conn
+        with mock.patch('namecom.cache.os.getpid', return_value=os.getpid() + 1):
+            self.assertEqual(backend.get('https://h/v4/domains/a.org'), b'a')
+            self.assertIsNot(backend._local.conn, parent_conn)
+
+    def test_api_read_cache(self):
+        cache = ReadCache(SQLiteCacheBackend(os.path.join(self.tmpdir, 'cache.sqlite')), ttl=60)
+        calls = []
+
+        def request(method, url, params=None, **kwargs):
+            calls.append(method)
+            if method == 'GET':
+                return make_response(200, {'records': [record_sample1.to_dict()]})
+            return make_response(200, {})
+
+        transport = fake_transport(request)
+        api = DnsApi(record_sample1.domainName, correct_auth, use_test_env=True, read_cache=cache, transport=transport)
+        first = api.list_records()
+        second = DnsApi(record_sample1.domainName, correct_auth, use_test_env=True, read_cache=cache,
+                        transport=transport).list_records()
+        self.assertEqual(calls, ['GET'])
+        self.assertEqual(first.records, second.records)
+        self.assertEqual(second.status_code, 200)
+
+        api.delete_record(record_sample1.id)
+        api.list_records()
+        self.assertEqual(calls, ['GET', 'DELETE', 'GET'])
+
+    def test_backend_errors_are_misses(self):
+        backend = mock.Mock(spec=CacheBackend)
+        for name in ['get', 'set', 'invalidate']:
+            getattr(backend, name).side_effect = sqlite3.OperationalError('database is locked')
+        calls = []
+
+        def request(method, url, **kwargs):
+            calls.append(method)
+            return make_response(200, {'records': [record_sample1.to_dict()]} if method == 'GET' else {})
+
+        api = DnsApi(record_sample1.domainName, correct_auth, use_test_env=True, read_cache=ReadCache(backend),
+                     transport=fake_transport(request))
+        with mock.patch('namecom.cache._logger') as logger:
+            self.assertEqual(api.list_records().records, [record_sample1])
+            api.delete_record(record_sample1.id)
+        self.assertEqual(calls, ['GET', 'DELETE'])
+        self.assertEqual(logger.warning.call_count, 3)
+
+    def test_accounts_do_not_share_entries(self):
+        cache = ReadCache(SQLiteCacheBackend(os.path.join(self.tmpdir, 'cache.sqlite')), ttl=60)
+        other_auth = Auth('other-account', 'token')
+        calls = []
+
+        def request(method, url, auth=None, params=None, **kwargs):
+            calls.append(auth[0])
+            if auth[0] == other_auth.username:
+                return make_response(403, {'message': 'Permission Denied'})
+            return make_response(200, {'records': [record_sample1.to_dict()]})
+
+        settings = dict(use_test_env=True, read_cache=cache, transport=fake_transport(request))
+        DnsApi(record_sample1.domainName, correct_auth, **settings).list_records()
+        with self.assertRaises(PermissionDeniedError):
+            DnsApi(record_sample1.domainName, other_auth, **settings).list_records()
+        DnsApi(record_sample1.domainName, correct_auth, **settings).list_records()
+
+        self.assertEqual(calls, [correct_auth.username, other_auth.username])
+
+    def test_searches_do_not_invalidate(self):
+        calls = []
+
+        def request(method, url, **kwargs):
+            calls.append(url.rsplit('/', 1)[-1])
+            if method == 'GET':
+                return make_response(200, domain_sample1.to_dict())
+            return make_response(200, {'results': []})
+
+        api = DomainApi(correct_auth, use_test_env=True, read_cache=ReadCache(MemoryCacheBackend(), ttl=60),
+                        transport=fake_transport(request))
+        api.get_domain(domain_sample1.domainName)
+        api.check_availability(['a.com'])
+        api.search('cthesky')
+        api.get_domain(domain_sample1.domainName)
+        api.enable_autorenew(domain_sample1.domainName)
+        api.get_domain(domain_sample1.domainName)
+
+        self.assertEqual(calls, ['cthesky.band', 'domains:checkAvailability', 'domains:search',
+                                 'cthesky.band:enableAutorenew', 'cthesky.band'])
+
+
+class NegativeCacheTestCase(unittest.TestCase):
+
+    not_found = {'message': 'Not Found'}
+
+    def test_not_found_is_cached_until_created(self):
+        created = []
+        calls = []
+
+        def request(method, url, **kwargs):
+            calls.append(method)
+            if method == 'POST':
+                created.append(True)
+                return make_response(200, {'domain': domain_sample1.to_dict(), 'order': 1, 'totalPaid': 1.0})
+            if created:
+                return make_response(200, domain_sample1.to_dict())
+            return make_response(404, self.not_found)
+
+        api = DomainApi(correct_auth, use_test_env=True, negative_cache=NegativeCache(),
+                        transport=fake_transport(request))
+        for _ in range(2):
+            with self.assertRaises(NotFoundError):
+                api.get_domain(domain_sample1.domainName)
+        self.assertEqual(calls, ['GET'])
+
+        api.create_domain(domain_sample1, 12.99)
+        self.assertEqual(api.get_domain(domain_sample1.domainName).domain, domain_sample1)
+        self.assertEqual(calls, ['GET', 'POST', 'GET'])
+
+    def test_transfer_forgets_missing_domain(self):
+        cache = NegativeCache()
+        transferred = []
+
+        def request(method, url, **kwargs):
+            if method == 'POST':
+                transferred.append(True)
+                return make_response(200, {'transfer': {'domainName': domain_sample1.domainName}, 'order': 1,
+                                           'totalPaid': 1.0})
+            if transferred:
+                return make_response(200, domain_sample1.to_dict())
+            return make_response(404, self.not_found)
+
+        settings = dict(use_test_env=True, negative_cache=cache, transport=fake_transport(request))
+        domain_api = DomainApi(correct_auth, **settings)
+        with self.assertRaises(NotFoundError):
+            domain_api.get_domain(domain_sample1.domainName)
+
+        TransferApi(correct_auth, **settings).create_transfer(domain_sample1.domainName, 'code', 12.99)
+        self.assertEqual(domain_api.get_domain(domain_sample1.domainName).domain, domain_sample1)
+
+    def test_searches_do_not_invalidate(self):
+        calls = []
+
+        def request(method, url, **kwargs):
+            calls.append(method)
+            if method == 'GET':
+                return make_response(404, self.not_found)
+            return make_response(200, {'results': []})
+
+        api = DomainApi(correct_auth, use_test_env=True, negative_cache=NegativeCache(),
+                        transport=fake_transport(request))
+        with self.assertRaises(NotFoundError):
+            api.get_domain(domain_sample1.domainName)
+        api.check_availability(['a.com'])
+        with self.assertRaises(NotFoundError):
+            api.get_domain(domain_sample1.domainName)
+        self.assertEqual(calls, ['GET', 'POST'])
+
+    def test_ttl_expiry(self):
+        calls = []
+
+        def request(method, url, **kwargs):
+            calls.append(method)
+            return make_response(404, self.not_found)
+
+        api = DnsApi(record_sample1.domainName, correct_auth, use_test_env=True, negative_cache=NegativeCache(ttl=-1),
+                     transport=fake_transport(request))
+        for _ in range(2):
+            with self.assertRaises(NotFoundError):
+                api.get_record(record_sample1.id)
+        self.assertEqual(calls, ['GET', 'GET'])
+
+
+def search_result(domainName, purchasable=True):
+    sld, tld = domainName.split('.', 1)
+    return DomainSearchResult(domainName, sld, tld, purchasable=purchasable, purchasePrice=12.99)
+
+
+class AvailabilityCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = AvailabilityCache(ttl=60)
+        self.api = DomainApi(correct_auth, use_test_env=True, availability_cache=self.cache,
+                             transport=fake_transport(self.request))
+        self.sent = []
+
+    def request(self, method, url, data=None, **kwargs):
+        body = json.loads(data)
+        self.sent.append(body)
+        if url.endswith(':searchStream'):
+            # one result per line
+            return make_response(200, search_result(body['keyword'] + '.net').to_dict())
+        if url.endswith(':checkAvailability'):
+            names = body['domainNames']
+        else:
+            names = [body['keyword'] + '.com', body['keyword'] + '.org']
+        return make_response(200, {'results': [search_result(name).to_dict() for name in names]})
+
+    def test_check_availability_sends_uncached_names(self):
+        self.api.check_availability(['a.com', 'b.com'])
+        result = self.api.check_availability(['B.com', 'c.com', 'a.com'])
+        cached = self.api.check_availability(['a.com'])
+
+        self.assertEqual([body['domainNames'] for body in self.sent], [['a.com', 'b.com'], ['c.com']])
+        self.assertEqual([model.domainName for model in result.results], ['b.com', 'c.com', 'a.com'])
+        self.assertEqual(cached.status_code, 200)
+        self.assertEqual(cached.results, [search_result('a.com')])
+
+    def test_check_availability_keeps_input_order(self):
+        self.api.check_availability(['a.com'])
+        result = self.api.check_availability(['b.com', 'a.com', 'c.com'])
+
+        self.assertEqual([body['domainNames'] for body in self.sent], [['a.com'], ['b.com', 'c.com']])
+        self.assertEqual([model.domainName for model in result.results], ['b.com', 'a.com', 'c.com'])
+
+    def test_search_queries_and_stream(self):
+        first = self.api.search('cthesky')
+        second = self.api.search('cthesky')
+        self.api.check_availability(['cthesky.org'])
+        self.assertEqual(len(self.sent), 1)
+        self.assertEqual(first.results, second.results)
+
+        self.api.search('cthesky', promoCode='PROMO')
+        self.api.search('cthesky', tldFilter=['com'])
+        self.assertEqual(len(self.sent), 3)
+
+        self.cache.invalidate('cthesky.com')
+        self.api.search('cthesky')
+        self.assertEqual(len(self.sent), 4)
+
+        self.assertEqual([model.domainName for model in self.api.search_stream('stream').results], ['stream.net'])
+        self.assertEqual(list(self.api.search_stream('stream').results), [search_result('stream.net')])
+        self.assertEqual(len(self.sent), 5)
+
+    def test_ttl_expiry(self):
+        self.cache.ttl = -1
+        self.api.check_availability(['a.com'])
+        self.api.check_availability(['a.com'])
+        self.assertEqual(len(self.sent), 2)
@@ -0,0 +1,141 @@
+import threading
+import time
+import unittest
+
+from namecom import ChangeFeed, ConditionalCache
+from .sample import correct_auth, fake_transport, make_response, record_sample1
+
+
+class FakeAccount(object):
+    """Serves list_domains, get_domain and list_records from mutable state."""
+
+    def __init__(self):
+        self.domains = {'a.org': {'domainName': 'a.org', 'locked': True, 'nameservers': ['ns1.name.com']}}
+        self.records = {'a.org': [dict(record_sample1.to_dict(), domainName='a.org')]}
+        self.count = 0
+        self.failures = 0
+        self.lock = threading.Lock()
+
+    def request(self, method, url, params=None, headers=None, **kwargs):
+        with self.lock:
+            self.count += 1
+            path = url.split('/v4/', 1)[1]
+            status_code = 200
+            if self.failures:
+                self.failures -= 1
+                status_code, dct = 500, {'message': 'Internal Error'}
+            elif path == 'domains':
+                dct = {'domains': [dict(d, nameservers=None) for _, d in sorted(self.domains.items())]}
+            elif path.endswith('/records'):
+                dct = {'records': self.records.get(path.split('/')[1], [])}
+            else:
+                dct = self.domains[path.split('/')[1]]
+            return make_response(status_code, dct)
+
+
+class ChangeFeedTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.account = FakeAccount()
+        self.transport = fake_transport(self.account.request)
+
+    def test_events(self):
+        feed = ChangeFeed(correct_auth, use_test_env=True, transport=self.transport, domain_details=True)
+        received = []
+        feed.subscribe(received.append)
+
+        self.assertEqual(feed.poll(), [])
+        self.assertEqual(feed.poll(), [])
+
+        self.account.domains['a.org']['locked'] = False
+        self.account.domains['a.org']['nameservers'] = ['ns2.name.com']
+        self.account.domains['b.org'] = {'domainName': 'b.org'}
+        self.account.records['a.org'][0]['answer'] = '10.0.0.9'
+
+        events = feed.poll()
+        self.assertEqual(events, received)
+        by_key = dict((event.key, event) for event in events)
+
+        self.assertEqual(by_key['b.org'].kind, 'added')
+        self.assertEqual(by_key['a.org'].kind, 'modified')
+        self.assertEqual(by_key['a.org'].changes, {'locked': (True, False),
+                                                   'nameservers': (['ns1.name.com'], ['ns2.name.com'])})
+        record_event = by_key[('a.org', record_sample1.id)]
+        self.assertEqual(record_event.resource, 'record')
+        self.assertEqual(record_event.changes, {'answer': ('10.0.0.1', '10.0.0.9')})
+
+        del self.account.records['a.org']
+        events = feed.poll()
+        self.assertEqual([(e.kind, e.key) for e in events], [('removed', ('a.org', record_sample1.id))])
+
+    def test_iterators(self):
+        feed = ChangeFeed(correct_auth, use_test_env=True, transport=self.transport, domains=['a.org'])
+        feed.poll()
+        iterator = iter(feed)
+
+        self.account.domains['a.org']['locked'] = False
+        feed.poll()
+        feed.stop()
+        self.assertEqual([event.kind for event in iterator], ['modified'])
+
+        try:
+            import asyncio
+        except ImportError:
+            return
+
+        feed = ChangeFeed(correct_auth, use_test_env=True, transport=self.transport, domains=['a.org'])
+        feed.poll()
+
+        async_iterator = feed.__aiter__()
+        self.account.domains['a.org']['locked'] = True
+        feed.poll()
+        feed.stop()
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        events = []
+        try:
+            while True:
+                try:
+                    events.append(loop.run_until_complete(async_iterator.__anext__()))
+                except StopAsyncIteration:
+                    break
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+        self.assertEqual([event.kind for event in events], ['modified'])
+
+    def test_background_poll_survives_errors(self):
+        errors = []
+        feed = ChangeFeed(correct_auth, use_test_env=True, transport=self.transport, interval=0.01, domains=['a.org'],
+                          on_error=errors.append)
+        iterator = iter(feed)
+        self.account.failures = 1
+        feed.start()
+        try:
+            for _ in range(500):
+                if errors and feed._snapshot is not None:
+                    break
+                time.sleep(0.01)
+            self.assertEqual([error.status_code for error in errors], [500])
+            self.assertTrue(feed._thread.is_alive())
+
+            self.account.domains['a.org']['locked'] = False
+            self.assertEqual(next(iterator).kind, 'modified')
+        finally:
+            feed.stop()
+            feed._thread.join(5)
+        self.assertIs(feed.last_error, errors[0])
+
+    def test_own_cache_grows_with_watched_domains(self):
+        for i in range(600):
+            self.account.domains['d%d.org' % i] = {'domainName': 'd%d.org' % i}
+        feed = ChangeFeed(correct_auth, use_test_env=True, transport=self.transport, watch_records=True)
+        feed.poll()
+        self.assertGreaterEqual(feed._cache.maxsize, 2 * 601)
+        self.assertGreaterEqual(feed._cache.maxsize, len(feed._cache))
+
+        passed = ConditionalCache(maxsize=10)
+        feed = ChangeFeed(correct_auth, use_test_env=True, transport=self.transport, conditional_cache=passed)
+        feed.poll()
+        self.assertEqual(passed.maxsize, 10)
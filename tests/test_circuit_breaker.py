@@ -0,0 +1,72 @@
+import unittest
+
+from namecom import CircuitBreaker, DnsApi, exceptions
+from namecom.api import TEST_API_HOST
+from .sample import correct_auth, fake_transport, make_response
+
+KEY = (TEST_API_HOST, 'DnsApi')
+
+
+class CircuitBreakerTestCase(unittest.TestCase):
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+
+        breaker.before_call(KEY)
+        breaker.record_failure(KEY, 0.1)
+        self.assertEqual(breaker.state(KEY), CircuitBreaker.CLOSED)
+
+        breaker.before_call(KEY)
+        breaker.record_failure(KEY, 0.1)
+        self.assertEqual(breaker.state(KEY), CircuitBreaker.OPEN)
+
+        self.assertRaises(exceptions.CircuitOpenError, breaker.before_call, KEY)
+        # other families and hosts are not affected
+        breaker.before_call((TEST_API_HOST, 'DomainApi'))
+
+    def test_success_resets_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2)
+
+        breaker.record_failure(KEY, 0.1)
+        breaker.record_success(KEY, 0.1)
+        breaker.record_failure(KEY, 0.1)
+        self.assertEqual(breaker.state(KEY), CircuitBreaker.CLOSED)
+
+    def test_slow_call_counts_as_failure(self):
+        breaker = CircuitBreaker(failure_threshold=1, slow_call_duration=1)
+
+        breaker.record_success(KEY, 0.5)
+        self.assertEqual(breaker.state(KEY), CircuitBreaker.CLOSED)
+
+        breaker.record_success(KEY, 2)
+        self.assertEqual(breaker.state(KEY), CircuitBreaker.OPEN)
+
+    def test_half_open_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0, half_open_probes=1)
+        breaker.record_failure(KEY, 0.1)
+        self.assertEqual(breaker.state(KEY), CircuitBreaker.HALF_OPEN)
+
+        breaker.before_call(KEY)
+        self.assertRaises(exceptions.CircuitOpenError, breaker.before_call, KEY)
+
+        breaker.record_success(KEY, 0.1)
+        self.assertEqual(breaker.state(KEY), CircuitBreaker.CLOSED)
+
+        breaker.record_failure(KEY, 0.1)
+        breaker.before_call(KEY)
+        breaker.record_failure(KEY, 0.1)
+        self.assertEqual(breaker._circuits[KEY].state, CircuitBreaker.OPEN)
+
+    def test_api_fails_fast(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+        sent = []
+
+        def request(method, url, **kwargs):
+            sent.append(url)
+            return make_response(500, {'message': 'Internal Error'})
+
+        api = DnsApi('example.org', auth=correct_auth, use_test_env=True, circuit_breaker=breaker,
+                     transport=fake_transport(request))
+        self.assertRaises(exceptions.ServerError, api.get_record, 1)
+        self.assertRaises(exceptions.CircuitOpenError, api.get_record, 1)
+        self.assertEqual(len(sent), 1)
@@ -0,0 +1,71 @@
+import threading
+import time
+import unittest
+
+from namecom import AdaptiveLimiter, DnsApi
+from namecom.concurrency import concurrent_map
+from .sample import correct_auth, fake_transport, make_response
+
+
+class AdaptiveLimiterTestCase(unittest.TestCase):
+
+    def test_additive_increase(self):
+        limiter = AdaptiveLimiter(initial_limit=2, max_limit=4)
+        for _ in range(20):
+            limiter.acquire()
+            limiter.release(0.1)
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual(limiter.inflight, 0)
+
+    def test_multiplicative_decrease(self):
+        limiter = AdaptiveLimiter(initial_limit=8, cooldown=60)
+        limiter.acquire()
+        limiter.release(0.1, throttled=True)
+        self.assertEqual(limiter.limit, 4)
+
+        # within cooldown, a burst of failures only backs off once
+        limiter.acquire()
+        limiter.release(0.1, failed=True)
+        self.assertEqual(limiter.limit, 4)
+
+    def test_latency_target(self):
+        limiter = AdaptiveLimiter(initial_limit=8, latency_target=1, cooldown=0)
+        limiter.acquire()
+        limiter.release(2)
+        self.assertEqual(limiter.limit, 4)
+
+    def test_acquire_blocks_at_limit(self):
+        limiter = AdaptiveLimiter(initial_limit=1, max_limit=1)
+        limiter.acquire()
+        self.assertIsNone(limiter.acquire(timeout=0.01))
+
+        threading.Timer(0.02, limiter.cancel).start()
+        self.assertIsNotNone(limiter.acquire(timeout=1))
+
+    def test_api_feeds_limiter(self):
+        limiter = AdaptiveLimiter(initial_limit=8, cooldown=0)
+        transport = fake_transport(lambda method, url, **kwargs: make_response(429, {'message': 'Too Many Requests'}))
+        api = DnsApi('example.org', auth=correct_auth, use_test_env=True, limiter=limiter, transport=transport)
+        self.assertRaises(Exception, api.get_record, 1)
+
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual(limiter.inflight, 0)
+
+
+class ConcurrentMapTestCase(unittest.TestCase):
+
+    def test_ordered_with_errors(self):
+        def func(x):
+            time.sleep(0.01 * (5 - x))
+            if x == 2:
+                raise ValueError(x)
+            return x * 10
+
+        outcomes = list(concurrent_map(func, range(5), max_workers=5))
+        self.assertEqual([o[0] for o in outcomes], [0, 1, 2, 3, 4])
+        self.assertEqual([o[2] for o in outcomes], [0, 10, None, 30, 40])
+        self.assertIsInstance(outcomes[2][3], ValueError)
+
+    def test_unordered(self):
+        outcomes = list(concurrent_map(lambda x: x, range(10), max_workers=3, ordered=False))
+        self.assertEqual(sorted(o[2] for o in outcomes), list(range(10)))
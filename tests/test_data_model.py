@@ -1,6 +1,11 @@
+import copy
+import json
+import pickle
 import unittest
 
-from namecom import Transfer, Domain
+from namecom import Contact, Contacts, Domain, FrozenModel, Record, Transfer, VanityNameserver
+from namecom.utils import json_bytes
+from .sample import domain_sample1
 
 
 class DataModelTestCase(unittest.TestCase):
@@ -25,4 +30,97 @@ class DataModelTestCase(unittest.TestCase):
             email='cthesky@yeah.net',
             status='Completed'
         ))
-        self.assertEqual(transfer, got_transfer)
\ No newline at end of file
+        self.assertEqual(transfer, got_transfer)
+
+    def test_from_dict_unknown_and_missing_keys(self):
+        record = Record.from_dict({'id': 1, 'domainName': 'example.org', 'type': 'A', 'answer': '10.0.0.1',
+                                   'createdAt': '2018-01-01T00:00:00Z'})
+        self.assertEqual(record, Record(1, 'example.org', None, 'A', '10.0.0.1'))
+        self.assertEqual(record.ttl, 300)
+        self.assertFalse(hasattr(record, 'createdAt'))
+
+    def test_from_dict_nested_models(self):
+        dct = domain_sample1.to_dict()
+        dct['contacts']['registrant']['extra'] = 'ignored'
+        domain = Domain.from_dict(dct)
+        self.assertEqual(domain, domain_sample1)
+        self.assertIsInstance(domain.contacts.registrant, Contact)
+        self.assertIsNone(Domain.from_dict({'domainName': 'example.org'}).contacts)
+
+    def test_from_dict_subclass(self):
+        class MyTransfer(Transfer):
+            pass
+
+        self.assertEqual(type(Transfer.from_dict({'domainName': 'example.org'})), Transfer)
+        self.assertEqual(type(MyTransfer.from_dict({'domainName': 'example.org'})), MyTransfer)
+        self.assertEqual(type(Transfer.from_dict({'domainName': 'example.org'})), Transfer)
+
+    def test_to_dict_and_json_bytes(self):
+        dct = domain_sample1.to_dict()
+        self.assertIsInstance(dct['contacts']['registrant'], dict)
+        self.assertIn('companyName', dct['contacts']['registrant'])
+        self.assertNotIn('companyName', domain_sample1.to_dict(omit_none=True)['contacts']['registrant'])
+        self.assertEqual(Domain.from_dict(dct), domain_sample1)
+
+        domain = Domain('example.org', locked=True)
+        data = json_bytes({'domain': domain, 'promoCode': None})
+        self.assertEqual(json.loads(data.decode('utf-8')),
+                         {'domain': {'domainName': 'example.org', 'locked': True}, 'promoCode': None})
+        self.assertNotIn(b' ', data)
+        self.assertEqual(json.loads(json_bytes([domain], omit_none=False).decode('utf-8')), [domain.to_dict()])
+
+    def test_replace_and_diff(self):
+        domain = Domain.from_dict(domain_sample1.to_dict())
+        changed = domain.replace(locked=True, renewalPrice=20.0)
+
+        self.assertIsNot(changed, domain)
+        self.assertIs(changed.contacts, domain.contacts)
+        self.assertEqual(domain.diff(changed), {'locked': (domain.locked, True),
+                                                'renewalPrice': (domain.renewalPrice, 20.0)})
+        self.assertEqual(domain.diff(domain.replace()), {})
+        self.assertRaises(TypeError, domain.replace, unknown=1)
+
+    def test_freeze(self):
+        domain = domain_sample1.freeze()
+
+        self.assertIsInstance(domain, FrozenModel)
+        self.assertIsInstance(domain, Domain)
+        self.assertIsInstance(domain.contacts.registrant, FrozenModel)
+        self.assertEqual(domain, domain_sample1)
+        self.assertEqual(domain_sample1, domain)
+        self.assertIs(domain.freeze(), domain)
+        self.assertIs(copy.deepcopy(domain), domain)
+        self.assertEqual(eval(repr(domain)), domain)
+        self.assertEqual(pickle.loads(pickle.dumps(domain)), domain)
+
+        with self.assertRaises(AttributeError):
+            domain.locked = True
+        with self.assertRaises(AttributeError):
+            del domain.locked
+
+        changed = domain.replace(locked=True, contacts=Contacts(None, None, None, None))
+        self.assertIsInstance(changed, FrozenModel)
+        self.assertIsInstance(changed.contacts, FrozenModel)
+        self.assertNotEqual(changed, domain)
+        self.assertEqual(Record(1, 'example.org', None, 'A', '10.0.0.1').freeze().to_dict()['answer'], '10.0.0.1')
+
+        transfer = Transfer('example.org', 'cthesky@yeah.net', 'Completed').freeze()
+        self.assertEqual(hash(transfer), hash(transfer))
+        self.assertEqual(len({transfer, transfer.replace(), Transfer(**transfer.to_dict())}), 1)
+
+    def test_hash_list_fields(self):
+        self.assertEqual(hash(domain_sample1), hash(Domain.from_dict(domain_sample1.to_dict())))
+        nameserver = VanityNameserver('example.org', 'ns1.example.org', ips=['10.0.0.1'])
+        same = VanityNameserver._from_fields({'ips': ['10.0.0.1'], 'hostname': 'ns1.example.org',
+                                              'domainName': 'example.org'})
+        self.assertEqual(hash(nameserver), hash(same))
+        self.assertEqual(len({nameserver, same, nameserver.freeze()}), 1)
+
+        del same.ips
+        self.assertNotEqual(same, nameserver)
+        self.assertIsInstance(hash(same), int)
+
+    def test_set_diff(self):
+        records = [Record(i, 'example.org', None, 'A', '10.0.0.{}'.format(i)) for i in range(10)]
+        changed = [record.replace(ttl=600) if record.id % 2 else record.replace() for record in records]
+        self.assertEqual(set(records) - set(changed), set(records[1::2]))
@@ -0,0 +1,96 @@
+import json
+import threading
+import unittest
+
+from namecom import DnsApi, Record, exceptions
+from .sample import correct_auth, fake_transport, make_response
+
+
+class FakeZone(object):
+    """Serves the record endpoints of a single zone from memory."""
+
+    def __init__(self, fail_answers=()):
+        self.records = {}
+        self.next_id = 1
+        self.fail_answers = fail_answers
+        self.lock = threading.Lock()
+
+    def request(self, method, url, data=None, **kwargs):
+        record_id = url.rsplit('/', 1)[-1]
+        body = json.loads(data) if data else {}
+
+        with self.lock:
+            if body.get('answer') in self.fail_answers:
+                return make_response(500, {'message': 'Internal Error'})
+            if method == 'POST':
+                body['id'] = self.next_id
+                self.next_id += 1
+            elif int(record_id) not in self.records:
+                return make_response(404, {'message': 'Not Found'})
+            else:
+                body['id'] = int(record_id)
+
+            if method == 'DELETE':
+                del self.records[body['id']]
+                return make_response(200, {})
+            if method == 'GET':
+                return make_response(200, self.records[body['id']])
+
+            body.update(domainName='example.org', fqdn='{}.example.org.'.format(body['host']))
+            self.records[body['id']] = body
+            return make_response(200, body)
+
+
+def make_record(host, answer, id=None):
+    return Record(id=id, domainName='example.org', fqdn=None, type='A', host=host, answer=answer)
+
+
+class DnsBatchTestCase(unittest.TestCase):
+
+    def api(self, zone):
+        return DnsApi('example.org', auth=correct_auth, use_test_env=True, transport=fake_transport(zone.request))
+
+    def test_create_update_delete_records(self):
+        zone = FakeZone()
+        api = self.api(zone)
+        batch = api.create_records([make_record('host%d' % i, '10.0.0.%d' % i) for i in range(20)])
+        self.assertTrue(batch.ok)
+        self.assertEqual([item.result.record.host for item in batch], ['host%d' % i for i in range(20)])
+        self.assertEqual(len(zone.records), 20)
+
+        records = [item.result.record for item in batch]
+        for record in records:
+            record.answer = '10.0.1.1'
+        batch = api.update_records(records)
+        self.assertTrue(batch.ok)
+        self.assertTrue(all(r['answer'] == '10.0.1.1' for r in zone.records.values()))
+
+        batch = api.delete_records(records)
+        self.assertTrue(batch.ok)
+        self.assertEqual(zone.records, {})
+
+    def test_partial_failure(self):
+        zone = FakeZone(fail_answers=['10.0.0.3'])
+        api = self.api(zone)
+        batch = api.create_records([make_record('host%d' % i, '10.0.0.%d' % i) for i in range(5)])
+
+        self.assertFalse(batch.ok)
+        self.assertFalse(batch.rolled_back)
+        self.assertEqual(len(batch.succeeded), 4)
+        self.assertIsInstance(batch.items[3].error, exceptions.ServerError)
+        self.assertEqual(len(zone.records), 4)
+
+    def test_rollback(self):
+        zone = FakeZone(fail_answers=['10.0.0.3'])
+        api = self.api(zone)
+        batch = api.create_records([make_record('host%d' % i, '10.0.0.%d' % i) for i in range(5)], rollback=True)
+        self.assertTrue(batch.rolled_back)
+        self.assertEqual(batch.rollback_errors, [])
+        self.assertEqual(zone.records, {})
+
+        created = [item.result.record for item in api.create_records([make_record('a', '10.0.0.1'),
+                                                                      make_record('b', '10.0.0.2')])]
+        changed = [make_record('a', '10.0.0.9', id=created[0].id), make_record('b', '10.0.0.3', id=created[1].id)]
+        batch = api.update_records(changed, rollback=True)
+        self.assertTrue(batch.rolled_back)
+        self.assertEqual(sorted(r['answer'] for r in zone.records.values()), ['10.0.0.1', '10.0.0.2'])
@@ -0,0 +1,55 @@
+import threading
+import unittest
+
+import requests
+
+from namecom import DomainApi, exceptions, make_session
+from .sample import correct_auth, domain_sample1, domain_sample2, make_response
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class GetDomainsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.api = DomainApi(correct_auth, use_test_env=True)
+        self.domains = {domain_sample1.domainName: domain_sample1, domain_sample2.domainName: domain_sample2}
+        self.sessions = set()
+        self.lock = threading.Lock()
+
+    def request(self, session, method, url, **kwargs):
+        with self.lock:
+            self.sessions.add(session)
+        domain = self.domains.get(url.rsplit('/', 1)[-1])
+        if domain is None:
+            return make_response(404, {'message': 'Not Found'})
+        return make_response(200, domain.to_dict())
+
+    def test_get_domains_reports_errors_in_input_order(self):
+        names = [domain_sample2.domainName, 'missing.com', domain_sample1]
+        with mock.patch.object(requests.Session, 'request', autospec=True, side_effect=self.request), \
+                mock.patch('namecom.api.requests.request') as plain_request:
+            result = self.api.get_domains(names, max_workers=3)
+
+        self.assertFalse(plain_request.called)
+        self.assertEqual(len(self.sessions), 1)
+        self.assertFalse(result.ok)
+        self.assertEqual([item.item for item in result],
+                         [domain_sample2.domainName, 'missing.com', domain_sample1.domainName])
+        self.assertEqual(result.items[0].result.domain, domain_sample2)
+        self.assertEqual(result.items[2].result.domain, domain_sample1)
+        self.assertIsInstance(result.failed[0].error, exceptions.NotFoundError)
+
+    def test_iter_domains_as_completed_with_own_session(self):
+        session = make_session(4)
+        api = self.api.with_options(session=session)
+        with mock.patch.object(requests.Session, 'request', autospec=True, side_effect=self.request):
+            items = list(api.iter_domains(list(self.domains), ordered=False))
+
+        self.assertEqual(self.sessions, {session})
+        self.assertEqual(sorted(item.item for item in items), sorted(self.domains))
+        self.assertTrue(all(item.ok for item in items))
+        self.assertIsNone(self.api.session)
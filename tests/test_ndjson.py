@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from namecom.ndjson import NdjsonWriter, export_account, import_sync, read_ndjson
+from .sample import (
+    correct_auth,
+    domain_sample1,
+    domain_sample2,
+    email_forwarding_sample1,
+    email_forwarding_sample2,
+    fake_transport,
+    make_response,
+    record_sample1,
+    vanity_nameserver_sample1,
+)
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+def fake_request(method, url, params=None, **kwargs):
+    path = url.split('/v4/', 1)[1]
+    if path == 'domains':
+        return make_response(200, {'domains': [domain_sample1.to_dict()]})
+    if path.endswith('/records'):
+        return make_response(200, {'records': [record_sample1.to_dict()]})
+    if path.endswith('/email/forwarding'):
+        return make_response(200, {'emailForwarding': [email_forwarding_sample1.to_dict()]})
+    if path.endswith('/vanity_nameservers'):
+        return make_response(200, {'vanityNameservers': [{'domainName': 'cthesky.band', 'hostname': 'ns1.cthesky.band'}]})
+    if '/vanity_nameservers/' in path:
+        return make_response(200, vanity_nameserver_sample1.to_dict())
+    return make_response(200, {})
+
+
+class NdjsonTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_round_trip(self):
+        models = [domain_sample1, record_sample1, email_forwarding_sample1, vanity_nameserver_sample1]
+        for name in ['state.ndjson', 'state.ndjson.gz']:
+            path = os.path.join(self.tmpdir, name)
+            with NdjsonWriter(path) as writer:
+                writer.write_all(models)
+            self.assertEqual(writer.count, 4)
+            self.assertEqual(list(read_ndjson(path)), models)
+
+        with open(os.path.join(self.tmpdir, 'state.ndjson.gz'), 'rb') as f:
+            self.assertEqual(f.read(2), b'\x1f\x8b')
+
+    def test_export_account(self):
+        path = os.path.join(self.tmpdir, 'account.ndjson.gz')
+        count = export_account(correct_auth, path, use_test_env=True, transport=fake_transport(fake_request))
+
+        models = list(read_ndjson(path))
+        self.assertEqual(count, 4)
+        self.assertEqual(models, [domain_sample1, record_sample1, email_forwarding_sample1, vanity_nameserver_sample1])
+
+    def test_export_account_in_batches(self):
+        def request(method, url, **kwargs):
+            if url.endswith('/v4/domains'):
+                return make_response(200, {'domains': [domain_sample1.to_dict(), domain_sample2.to_dict()]})
+            return fake_request(method, url, **kwargs)
+
+        path = os.path.join(self.tmpdir, 'account.ndjson')
+        with mock.patch('namecom.ndjson._EXPORT_BATCH', 1):
+            export_account(correct_auth, path, use_test_env=True, kinds=['domains', 'records'],
+                           transport=fake_transport(request))
+
+        self.assertEqual(list(read_ndjson(path)), [domain_sample1, record_sample1, domain_sample2, record_sample1])
+
+    def test_import_sync(self):
+        path = os.path.join(self.tmpdir, 'desired.ndjson')
+        with NdjsonWriter(path) as writer:
+            writer.write_all([record_sample1, email_forwarding_sample1, email_forwarding_sample2])
+
+        reports = list(import_sync(correct_auth, path, use_test_env=True, dry_run=True,
+                                   transport=fake_transport(fake_request)))
+
+        self.assertEqual(len(reports), 1)
+        domainName, klass, report = reports[0]
+        self.assertEqual(domainName, 'cthesky.band')
+        self.assertEqual(klass.__name__, 'EmailForwarding')
+        self.assertEqual(report.plan.creates, [email_forwarding_sample2])
+        self.assertEqual(report.plan.unchanged, 1)
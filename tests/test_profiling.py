@@ -0,0 +1,72 @@
+import unittest
+
+from namecom import AdaptiveLimiter, DnsApi, DomainApi, Profiler
+from namecom.profiling import PHASES, main
+from namecom.timeouts import DEFAULT_TIMEOUT
+from .sample import correct_auth, domain_sample1, fake_transport, make_response, record_sample1
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+def fake_api(method, url, params=None, **kwargs):
+    if url.endswith('/records'):
+        return make_response(200, {'records': [record_sample1.to_dict()]})
+    if url.endswith('/v4/domains'):
+        return make_response(200, {'domains': [domain_sample1.to_dict()]})
+    if url.endswith(domain_sample1.domainName):
+        return make_response(200, domain_sample1.to_dict())
+    if url.endswith(':checkAvailability'):
+        return make_response(200, {'results': []})
+    return make_response(404, {'message': 'Not Found'})
+
+
+class ProfilerTestCase(unittest.TestCase):
+
+    def test_phases_per_method(self):
+        profiler = Profiler()
+        api = DnsApi(record_sample1.domainName, correct_auth, use_test_env=True, profiler=profiler,
+                     limiter=AdaptiveLimiter(), transport=fake_transport(fake_api))
+
+        list(api._iter_pages(api.list_records, 'records'))
+        api.list_records()
+        with self.assertRaises(Exception):
+            api.get_record(1)
+
+        stats = profiler.stats()
+        self.assertEqual(list(stats), ['DnsApi.list_records', 'DnsApi.get_record'])
+        self.assertEqual(stats['DnsApi.list_records']['calls'], 2)
+        self.assertEqual(stats['DnsApi.list_records']['errors'], 0)
+        self.assertEqual(stats['DnsApi.get_record']['errors'], 1)
+        for phase in PHASES:
+            self.assertGreaterEqual(stats['DnsApi.list_records'][phase], 0)
+        self.assertGreaterEqual(stats['DnsApi.list_records']['total'],
+                                sum(stats['DnsApi.list_records'][phase] for phase in PHASES))
+
+        report = profiler.report()
+        self.assertIn('DnsApi.list_records', report)
+        self.assertIn('ttfb', report.splitlines()[0])
+
+        profiler.reset()
+        self.assertEqual(profiler.stats(), {})
+
+    def test_helper_methods_are_attributed_to_public_method(self):
+        profiler = Profiler()
+        api = DomainApi(correct_auth, use_test_env=True, profiler=profiler, transport=fake_transport(fake_api))
+        api.check_availability([domain_sample1.domainName])
+        self.assertEqual(list(profiler.stats()), ['DomainApi.check_availability'])
+
+    def test_main(self):
+        argv = ['--username', 'user', '--token', 'token', '--test-env', '--domains', '1', '--timeout', '7']
+        with mock.patch('namecom.api.requests.request', side_effect=fake_api) as request, \
+                mock.patch('namecom.profiling.print', create=True) as printed:
+            self.assertEqual(main(argv), 0)
+
+        self.assertEqual(request.call_args[1]['timeout'], (DEFAULT_TIMEOUT[0], 7))
+
+        report = printed.call_args[0][0]
+        for method in ['DomainApi.list_domains', 'DomainApi.get_domain', 'DnsApi.list_records',
+                       'EmailForwardingApi.list_email_forwardings', 'DomainApi.check_availability']:
+            self.assertIn(method, report)
@@ -0,0 +1,78 @@
+import time
+import unittest
+
+from namecom import AdaptiveLimiter, Auth, DnsApi, RateLimitStatus, exceptions
+from .sample import fake_transport, make_response, record_sample1
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class RateLimitStatusTestCase(unittest.TestCase):
+
+    def test_parse_headers(self):
+        status = RateLimitStatus()
+        status.update({})
+        self.assertIsNone(status.remaining)
+        self.assertEqual(status.delay(), 0)
+
+        status.update({'X-RateLimit-Limit': '100', 'X-RateLimit-Remaining': '50', 'X-RateLimit-Reset': '30'})
+        self.assertEqual((status.limit, status.remaining), (100, 50))
+        self.assertAlmostEqual(status.reset_in, 30, delta=1)
+        self.assertFalse(status.low)
+        self.assertEqual(status.delay(), 0)
+
+        status.update({'X-RateLimit-Remaining': '5', 'X-RateLimit-Reset': str(int(time.time()) + 10)})
+        self.assertTrue(status.low)
+        self.assertAlmostEqual(status.delay(), 2, delta=0.3)
+        self.assertTrue(status.snapshot()['low'])
+
+    def test_retry_after(self):
+        status = RateLimitStatus()
+        status.update({'Retry-After': '3'}, 429)
+        self.assertEqual(status.throttled, 1)
+        self.assertAlmostEqual(status.delay(), 3, delta=0.3)
+
+        status.update({'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+        self.assertEqual(status.delay(), 0)
+
+    def test_expired_window_is_not_low(self):
+        status = RateLimitStatus()
+        status.update({'X-RateLimit-Limit': '100', 'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '-1'})
+        self.assertFalse(status.low)
+        self.assertEqual(status.delay(), 0)
+
+
+class RateLimitApiTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.auth = Auth('user', 'token')
+        self.limiter = AdaptiveLimiter(initial_limit=8, cooldown=0)
+
+    def api(self, headers=None, **kwargs):
+        self.sent = []
+
+        def request(method, url, **kwargs):
+            self.sent.append(method)
+            return make_response(200, {'records': []}, headers)
+
+        return DnsApi(record_sample1.domainName, self.auth, use_test_env=True, transport=fake_transport(request),
+                      **kwargs)
+
+    def test_status_shared_by_auth_and_limiter_backs_off(self):
+        headers = {'X-RateLimit-Limit': '100', 'X-RateLimit-Remaining': '5', 'X-RateLimit-Reset': '60'}
+        self.api(headers).list_records()
+        self.assertEqual(self.auth.rate_limit.remaining, 5)
+
+        with mock.patch('namecom.api.time.sleep') as sleep:
+            self.api(headers, limiter=self.limiter).list_records()
+        self.assertAlmostEqual(sleep.call_args[0][0], 12, delta=1)
+        self.assertEqual(self.limiter.limit, 4)
+
+    def test_wait_exceeding_deadline(self):
+        self.auth.rate_limit.update({'Retry-After': '30'}, 429)
+        with self.assertRaises(exceptions.DeadlineExceededError):
+            self.api(limiter=self.limiter, deadline=5).list_records()
+        self.assertEqual(self.sent, [])
@@ -0,0 +1,129 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from namecom import AdaptiveLimiter, DnsApi, DomainApi, Recorder, Replayer, exceptions
+from namecom.replay import load_recording
+from namecom.sampling import REDACTED
+from .sample import correct_auth, domain_sample1, fake_transport, make_response, record_sample1
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+def response(status_code, dct):
+    return make_response(status_code, dct, {'Content-Type': 'application/json', 'Set-Cookie': 'x'})
+
+
+class ReplayTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def record(self, name):
+        path = os.path.join(self.tmpdir, name)
+        recorder = Recorder(path)
+        responses = [response(200, {'records': [record_sample1.to_dict()]}), response(404, {'message': 'Not Found'}),
+                     response(200, {'authCode': 'secret'}), response(200, domain_sample1.to_dict())]
+        transport = fake_transport(lambda method, url, **kwargs: responses.pop(0))
+        dns_api = DnsApi(record_sample1.domainName, correct_auth, use_test_env=True, recorder=recorder,
+                         transport=transport)
+        domain_api = DomainApi(correct_auth, use_test_env=True, recorder=recorder, transport=transport)
+
+        dns_api.list_records(page=2)
+        with self.assertRaises(exceptions.NotFoundError):
+            dns_api.get_record(12)
+        domain_api.get_auth_code_for_domain(domain_sample1.domainName)
+        domain_api.lock_domain(domain_sample1.domainName)
+
+        recorder.close()
+        return path
+
+    def test_record(self):
+        path = self.record('traffic.jsonl')
+        with open(path) as f:
+            text = f.read()
+        self.assertNotIn(correct_auth.token, text)
+        self.assertNotIn('secret', text)
+        self.assertNotIn('Set-Cookie', text)
+
+        listed, missing, auth_code, locked = load_recording(path)
+        self.assertEqual((listed['method'], listed['url']),
+                         ('GET', 'https://api.dev.name.com/v4/domains/cthesky.band/records'))
+        self.assertEqual(listed['params'], {'page': 2, 'perPage': 1000})
+        self.assertEqual((listed['status'], listed['parser'], listed['result']),
+                         (200, 'parse_list_records', 'ListRecordsResult'))
+        self.assertGreaterEqual(listed['parse'], 0)
+        self.assertGreaterEqual(listed['latency'], 0)
+
+        self.assertEqual(missing['status'], 404)
+        self.assertNotIn('parse', missing)
+        self.assertEqual(json.loads(auth_code['content']), {'authCode': REDACTED})
+        self.assertEqual(locked['method'], 'POST')
+
+    def test_run(self):
+        path = self.record('traffic.jsonl.gz')
+        report = Replayer(path).run()
+
+        self.assertEqual(len(report.calls), 4)
+        self.assertEqual(report.mismatches, [])
+        missing = report.calls[1]
+        self.assertEqual((missing['replayed_status'], missing['error']), (404, 'NotFoundError'))
+
+        summary = report.summary()
+        self.assertEqual(list(summary), ['GET /v4/domains/{domainName}/records',
+                                         'GET /v4/domains/{domainName}/records/{id}',
+                                         'GET /v4/domains/{domainName}:getAuthCode',
+                                         'POST /v4/domains/{domainName}:lock'])
+        row = summary['GET /v4/domains/{domainName}/records']
+        self.assertEqual(row['calls'], 1)
+        self.assertAlmostEqual(row['parse_delta'], row['replayed_parse'] - row['parse'])
+        self.assertIsNone(summary['GET /v4/domains/{domainName}/records/{id}']['parse'])
+        self.assertIn('GET /v4/domains/{domainName}/records', report.report())
+
+    def test_session(self):
+        replayer = Replayer(self.record('traffic.jsonl'))
+        api = DnsApi(record_sample1.domainName, correct_auth, use_test_env=True, transport=replayer)
+
+        self.assertEqual(api.list_records(page=2).records, [record_sample1])
+        with self.assertRaises(exceptions.ReplayMissError):
+            api.list_records(page=2)
+        with self.assertRaises(exceptions.ReplayMissError):
+            api.list_records(page=3)
+
+        replayer.reset()
+        self.assertEqual(api.list_records(page=2).records, [record_sample1])
+
+    def test_pacing(self):
+        replayer = Replayer(self.record('traffic.jsonl'), speed=2)
+        for i, entry in enumerate(replayer.entries):
+            entry['ts'] = replayer.entries[0]['ts'] + i
+
+        with mock.patch('namecom.replay.time.sleep') as sleep:
+            report = replayer.run()
+        self.assertEqual(report.mismatches, [])
+        waits = [call[0][0] for call in sleep.call_args_list]
+        self.assertEqual(len(waits), 3)
+        for i, wait in enumerate(waits):
+            self.assertAlmostEqual(wait, (i + 1) / 2.0, places=1)
+
+    def test_failed_record_releases_limiter(self):
+        recorder = Recorder(os.path.join(self.tmpdir, 'traffic.jsonl'))
+        recorder.close()
+        limiter = AdaptiveLimiter(initial_limit=1)
+        api = DnsApi(record_sample1.domainName, correct_auth, use_test_env=True, recorder=recorder, limiter=limiter,
+                     transport=fake_transport(lambda method, url, **kwargs: response(200, {'records': []})))
+
+        self.assertRaises(ValueError, api.list_records)
+        self.assertEqual(limiter.inflight, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import json
+import random
+import unittest
+
+from namecom import CallSampler, DnsApi, DomainApi, Tracer, correlation_id, exceptions
+from namecom.sampling import REDACTED
+from .sample import correct_auth, domain_sample1, fake_transport, make_response, record_sample1
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+def answering(dct):
+    return fake_transport(lambda method, url, **kwargs: make_response(200, dct))
+
+
+class SamplingTestCase(unittest.TestCase):
+
+    def test_fast_calls_are_not_kept(self):
+        sampler = CallSampler(threshold=10)
+        api = DnsApi(record_sample1.domainName, correct_auth, use_test_env=True, sampler=sampler,
+                     transport=answering({'records': []}))
+        api.list_records()
+        api.list_records()
+
+        self.assertEqual(sampler.samples(), [])
+        self.assertEqual(sampler.stats(), {'calls': 2, 'slow': 0, 'errors': 0, 'kept': 0})
+
+    def test_slow_and_failed_calls(self):
+        sampler = CallSampler(threshold=0)
+        dct = domain_sample1.to_dict()
+        api = DomainApi(correct_auth, use_test_env=True, sampler=sampler, transport=answering(dct))
+
+        # the elapsed time of a response comes from the transport
+        with mock.patch.object(api.transport, 'request', return_value=make_response(200, dct, elapsed=0.2)):
+            api.get_domain(domain_sample1.domainName)
+
+        api.transport = fake_transport(
+            lambda method, url, **kwargs: make_response(404, {'message': 'Not Found'}, {'Content-Length': '24'}))
+        with self.assertRaises(exceptions.NotFoundError):
+            api.get_domain('missing.org')
+
+        slow, = sampler.samples('slow')
+        self.assertEqual((slow.method, slow.path, slow.status), ('GET', '/v4/domains/cthesky.band', 200))
+        self.assertEqual((slow.response_bytes, slow.elapsed, slow.error), (len(json.dumps(dct)), 0.2, None))
+        self.assertGreaterEqual(slow.duration, 0)
+
+        failed, = sampler.samples('error')
+        self.assertEqual((failed.path, failed.status, failed.response_bytes), ('/v4/domains/missing.org', 404, 24))
+        self.assertEqual(failed.error, 'NotFoundError')
+        self.assertIn('Not Found', failed.message)
+
+        self.assertEqual(sampler.samples(), [slow, failed])
+        self.assertEqual(sampler.stats(), {'calls': 2, 'slow': 1, 'errors': 1, 'kept': 2})
+
+    def test_request_is_sanitized(self):
+        sampler = CallSampler(threshold=0, max_body=200)
+        api = DomainApi(correct_auth, use_test_env=True, sampler=sampler, tracer=Tracer(), transport=answering({}))
+        body = {'domain': {'domainName': 'example.org'}, 'authCode': 'secret', 'years': 1}
+
+        with correlation_id('job-7'):
+            api._do('POST', data=json.dumps(body).encode('utf-8'), headers={'Authorization': 'Basic x'})
+
+        call, = sampler.samples()
+        self.assertEqual(call.correlation_id, 'job-7')
+        self.assertEqual(call.request_bytes, len(json.dumps(body)))
+        self.assertEqual(json.loads(call.body), dict(body, authCode=REDACTED))
+        self.assertEqual(call.headers['Authorization'], REDACTED)
+
+        sampler.clear()
+        api._do('POST', data=json.dumps({'names': ['x' * 300]}))
+        call, = sampler.samples()
+        self.assertEqual(len(call.body), 203)
+        self.assertTrue(call.body.endswith('...'))
+
+    def test_reservoir_is_bounded(self):
+        sampler = CallSampler(threshold=0, capacity=5, rand=random.Random(1))
+        for i in range(1000):
+            sampler.observe('GET', '/v4/domains/{}'.format(i), {}, 1.0, resp=make_response(200, {}))
+
+        kept = sampler.samples('slow')
+        self.assertEqual(len(kept), 5)
+        self.assertEqual(sampler.stats()['slow'], 1000)
+        # a uniform sample of 1000 calls almost never keeps only the first ones
+        self.assertGreater(max(int(call.path.rsplit('/', 1)[1]) for call in kept), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
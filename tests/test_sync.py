@@ -0,0 +1,189 @@
+import json
+import threading
+import unittest
+
+from namecom import (
+    DNSSEC,
+    DnssecApi,
+    EmailForwarding,
+    EmailForwardingApi,
+    URLForwarding,
+    URLForwardingApi,
+    VanityNameserver,
+    VanityNameserverApi,
+)
+from namecom.sync import plan_sync
+from .sample import correct_auth, fake_transport, make_response
+
+
+def forwarding(emailBox, emailTo):
+    return EmailForwarding(domainName='example.org', emailBox=emailBox, emailTo=emailTo)
+
+
+class FakeEmailForwardings(object):
+    """Serves the email forwarding endpoints of a single domain from memory, two entries per page."""
+
+    def __init__(self, entries):
+        self.entries = dict((e.emailBox, e.to_dict()) for e in entries)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def request(self, method, url, params=None, data=None, **kwargs):
+        emailBox = url.rsplit('/forwarding', 1)[1].lstrip('/')
+        body = json.loads(data) if data else {}
+
+        with self.lock:
+            if method == 'GET':
+                boxes = sorted(self.entries)
+                page = int(params['page'])
+                start = (page - 1) * 2
+                more = start + 2 < len(boxes)
+                return make_response(200, {'emailForwarding': [self.entries[b] for b in boxes[start:start + 2]],
+                                           'nextPage': page + 1 if more else None})
+
+            self.calls.append((method, emailBox or body['emailBox']))
+            if method == 'DELETE':
+                del self.entries[emailBox]
+                return make_response(200, {})
+
+            box = emailBox or body['emailBox']
+            self.entries[box] = dict(domainName='example.org', emailBox=box, emailTo=body['emailTo'])
+            return make_response(200, self.entries[box])
+
+
+class PlanSyncTestCase(unittest.TestCase):
+
+    def test_plan(self):
+        current = [forwarding('a', 'x@example.net'), forwarding('b', 'x@example.net'), forwarding('c', 'x@example.net')]
+        desired = [forwarding('a', 'x@example.net'), forwarding('b', 'y@example.net'), forwarding('d', 'x@example.net')]
+
+        plan = plan_sync(current, desired, 'emailBox', ['emailTo'])
+        self.assertEqual([m.emailBox for m in plan.creates], ['d'])
+        self.assertEqual([d.emailBox for _, d in plan.updates], ['b'])
+        self.assertEqual([m.emailBox for m in plan.deletes], ['c'])
+        self.assertEqual(plan.unchanged, 1)
+        self.assertEqual(len(plan), 3)
+
+        plan = plan_sync(current, desired, 'emailBox', ['emailTo'], delete_missing=False)
+        self.assertEqual(plan.deletes, [])
+
+        self.assertRaises(ValueError, plan_sync, current, desired + desired[:1], 'emailBox', ['emailTo'])
+
+
+class EmailForwardingSyncTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeEmailForwardings([forwarding(box, 'old@example.net') for box in 'abcde'])
+        self.api = EmailForwardingApi('example.org', auth=correct_auth, use_test_env=True,
+                                      transport=fake_transport(self.fake.request))
+        self.desired = [forwarding('a', 'old@example.net'), forwarding('b', 'new@example.net'),
+                        forwarding('e', 'old@example.net'), forwarding('f', 'new@example.net')]
+
+    def test_dry_run(self):
+        report = self.api.sync(self.desired, dry_run=True)
+
+        self.assertTrue(report.dry_run)
+        self.assertEqual(len(report.plan), 4)
+        self.assertEqual(report.plan.unchanged, 2)
+        self.assertEqual(self.fake.calls, [])
+
+    def test_sync(self):
+        report = self.api.sync(self.desired)
+
+        self.assertTrue(report.ok)
+        self.assertEqual(sorted(self.fake.calls), [('DELETE', 'c'), ('DELETE', 'd'), ('POST', 'f'), ('PUT', 'b')])
+        self.assertEqual([m.emailBox for m in report.created], ['f'])
+        self.assertEqual([m.emailBox for m in report.updated], ['b'])
+        self.assertEqual(sorted(m.emailBox for m in report.deleted), ['c', 'd'])
+        self.assertEqual(sorted(self.fake.entries), ['a', 'b', 'e', 'f'])
+
+
+class URLForwardingSyncTestCase(unittest.TestCase):
+
+    def test_sync(self):
+        current = [
+            {'domainName': 'example.org', 'host': 'a.example.org', 'forwardsTo': 'https://a.net', 'type': 'redirect'},
+            {'domainName': 'example.org', 'host': 'b.example.org', 'forwardsTo': 'https://b.net', 'type': 'redirect'},
+            {'domainName': 'example.org', 'host': 'c.example.org', 'forwardsTo': 'https://c.net', 'type': 'redirect'},
+        ]
+        desired = [
+            URLForwarding.from_dict(current[0]),
+            URLForwarding('example.org', 'b.example.org', 'https://b.net', 'masked', title='B'),
+            URLForwarding('example.org', 'd.example.org', 'https://d.net', 'redirect'),
+        ]
+        calls = []
+
+        def request(method, url, **kwargs):
+            if method == 'GET':
+                return make_response(200, {'urlForwarding': current})
+            calls.append((method, url.rsplit('/', 1)[1]))
+            return make_response(200, current[0])
+
+        api = URLForwardingApi('example.org', auth=correct_auth, use_test_env=True, transport=fake_transport(request))
+        report = api.sync(desired, max_workers=2)
+
+        self.assertTrue(report.ok)
+        self.assertEqual(sorted(calls), [('DELETE', 'c.example.org'), ('POST', 'forwarding'), ('PUT', 'b.example.org')])
+        self.assertEqual(report.plan.unchanged, 1)
+
+
+class ReconcileTestCase(unittest.TestCase):
+
+    def test_dnssec_rollover_order(self):
+        old = DNSSEC('example.org', keyTag=1, algorithm=8, digestType=2, digest='OLD')
+        new = DNSSEC('example.org', keyTag=2, algorithm=8, digestType=2, digest='NEW')
+        calls = []
+
+        def request(method, url, data=None, **kwargs):
+            if method == 'GET':
+                return make_response(200, {'dnssec': [old.to_dict()]})
+            calls.append(method)
+            if method == 'POST' and json.loads(data)['digest'] == 'BAD':
+                return make_response(500, {'message': 'Internal Error'})
+            return make_response(200, new.to_dict())
+
+        api = DnssecApi('example.org', auth=correct_auth, use_test_env=True, transport=fake_transport(request))
+        self.assertEqual(len(api.reconcile([old]).plan), 0)
+
+        report = api.reconcile([new])
+        self.assertTrue(report.ok)
+        self.assertEqual(calls, ['POST', 'DELETE'])
+
+        del calls[:]
+        bad = DNSSEC('example.org', keyTag=3, algorithm=8, digestType=2, digest='BAD')
+        report = api.reconcile([bad])
+        self.assertFalse(report.ok)
+        self.assertEqual(calls, ['POST'])
+        self.assertEqual(report.skipped, [('delete', old)])
+
+        del calls[:]
+        changed = old.replace(algorithm=13)
+        report = api.reconcile([changed])
+        self.assertTrue(report.ok)
+        self.assertEqual(calls, ['POST', 'DELETE'])
+        self.assertEqual((report.updated, report.deleted), ([changed], [old]))
+
+    def test_vanity_nameserver_fetches_ips(self):
+        ips = {'ns1.example.org': ['10.0.0.2', '10.0.0.1'], 'ns2.example.org': ['10.0.0.3']}
+        calls = []
+
+        def request(method, url, data=None, **kwargs):
+            hostname = url.rsplit('/', 1)[1]
+            if method == 'GET' and hostname == 'vanity_nameservers':
+                return make_response(200, {'vanityNameservers': [
+                    {'domainName': 'example.org', 'hostname': h} for h in sorted(ips)]})
+            calls.append((method, hostname))
+            return make_response(200, {'domainName': 'example.org', 'hostname': hostname, 'ips': ips.get(hostname)})
+
+        desired = [
+            VanityNameserver('example.org', 'ns1.example.org', ['10.0.0.1', '10.0.0.2']),
+            VanityNameserver('example.org', 'ns3.example.org', ['10.0.0.4']),
+        ]
+        api = VanityNameserverApi('example.org', auth=correct_auth, use_test_env=True,
+                                  transport=fake_transport(request))
+        report = api.reconcile(desired)
+
+        self.assertTrue(report.ok)
+        self.assertEqual(report.plan.unchanged, 1)
+        self.assertEqual(calls, [('GET', 'ns1.example.org'), ('POST', 'vanity_nameservers'),
+                                 ('DELETE', 'ns2.example.org')])
@@ -0,0 +1,75 @@
+import time
+import unittest
+
+import requests
+
+from namecom import Deadline, DnsApi, exceptions
+from namecom.timeouts import DEFAULT_TIMEOUT
+from .sample import correct_auth, fake_transport, make_response
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class TimeoutTestCase(unittest.TestCase):
+
+    def test_deadline_cap(self):
+        deadline = Deadline(10)
+        self.assertEqual(deadline.cap((3, 30))[0], 3)
+        self.assertLessEqual(deadline.cap((3, 30))[1], 10)
+        self.assertLessEqual(deadline.cap(None), 10)
+        self.assertFalse(deadline.expired())
+        self.assertTrue(Deadline(-1).expired())
+
+    def test_default_and_per_call_timeout(self):
+        transport = fake_transport(lambda method, url, **kwargs: make_response(200, {}))
+        api = DnsApi('example.org', auth=correct_auth, use_test_env=True, transport=transport)
+
+        with mock.patch.object(transport, 'request', wraps=transport.request) as request:
+            api.delete_record(1)
+            self.assertEqual(request.call_args[1]['timeout'], DEFAULT_TIMEOUT)
+
+            api.with_options(timeout=(1, 2)).delete_record(1)
+            self.assertEqual(request.call_args[1]['timeout'], (1, 2))
+            self.assertEqual(api.timeout, DEFAULT_TIMEOUT)
+
+        self.assertRaises(TypeError, api.with_options, unknown=1)
+
+    def test_deadline_propagates_through_pages(self):
+        pages = [make_response(200, {'records': [], 'nextPage': 2}), make_response(200, {'records': []})]
+
+        def slow_request(*args, **kwargs):
+            time.sleep(0.1)
+            return pages.pop(0)
+
+        api = DnsApi('example.org', auth=correct_auth, use_test_env=True,
+                     transport=fake_transport(slow_request)).with_options(deadline=0.05)
+        self.assertRaises(exceptions.DeadlineExceededError, list, api._iter_pages(api.list_records, 'records'))
+        self.assertEqual(len(pages), 1)
+
+    def test_timeout_after_deadline(self):
+        def timeout(*args, **kwargs):
+            time.sleep(0.02)
+            raise requests.ReadTimeout()
+
+        api = DnsApi('example.org', auth=correct_auth, use_test_env=True, deadline=Deadline(0.01),
+                     transport=fake_transport(timeout))
+        self.assertRaises(exceptions.DeadlineExceededError, api.get_record, 1)
+
+    def test_deadline_passed_while_queueing(self):
+        limiter = mock.Mock()
+
+        def acquire(timeout):
+            time.sleep(0.02)
+            return 0.02
+
+        limiter.acquire.side_effect = acquire
+        sent = []
+        api = DnsApi('example.org', auth=correct_auth, use_test_env=True, deadline=Deadline(0.01), limiter=limiter,
+                     transport=fake_transport(lambda method, url, **kwargs: sent.append(url)))
+
+        self.assertRaises(exceptions.DeadlineExceededError, api.get_record, 1)
+        self.assertEqual(sent, [])
+        self.assertEqual(limiter.cancel.call_count, 1)
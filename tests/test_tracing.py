@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from namecom import DnsApi, DomainApi, JsonlFileSink, Tracer, correlation_id, exceptions
+from namecom.tracing import current_correlation_id, endpoint_template
+from .sample import correct_auth, domain_sample1, domain_sample2, fake_transport, make_response, record_sample1
+
+
+def answering(responses, sent_headers=None):
+    """Returns a fake transport answering with the responses in turn, the last one repeatedly."""
+    def request(method, url, headers=None, **kwargs):
+        if sent_headers is not None:
+            sent_headers.append(headers)
+        return responses.pop(0) if len(responses) > 1 else responses[0]
+    return fake_transport(request)
+
+
+class TracingTestCase(unittest.TestCase):
+
+    def test_endpoint_template(self):
+        self.assertEqual(endpoint_template('/v4/domains/example.org/records/12'),
+                         ('/v4/domains/{domainName}/records/{id}', 'example.org'))
+        self.assertEqual(endpoint_template('/v4/domains/example.org:setNameservers'),
+                         ('/v4/domains/{domainName}:setNameservers', 'example.org'))
+        self.assertEqual(endpoint_template('/v4/domains:checkAvailability'), ('/v4/domains:checkAvailability', None))
+        self.assertEqual(endpoint_template('/v4/domains/example.org/url/forwarding/www.example.org'),
+                         ('/v4/domains/{domainName}/url/forwarding/{key}', 'example.org'))
+
+    def test_spans(self):
+        tracer = Tracer()
+        dct = {'records': [record_sample1.to_dict()]}
+        sent_headers = []
+        transport = answering([make_response(200, dct), make_response(404, {'message': 'Not Found'})], sent_headers)
+        api = DnsApi(record_sample1.domainName, correct_auth, use_test_env=True, tracer=tracer, transport=transport)
+
+        api.list_records(page=2)
+        self.assertEqual(len(sent_headers[0]['X-Correlation-ID']), 32)
+
+        with self.assertRaises(exceptions.NotFoundError):
+            api.get_record(12)
+
+        listed, failed = tracer.sink.spans()
+        self.assertEqual(listed.endpoint, '/v4/domains/{domainName}/records')
+        self.assertEqual((listed.method, listed.domain, listed.page, listed.attempt), ('GET', 'cthesky.band', 2, 1))
+        self.assertEqual((listed.status, listed.bytes, listed.error), (200, len(json.dumps(dct)), None))
+        self.assertGreaterEqual(listed.duration, 0)
+
+        self.assertEqual(failed.endpoint, '/v4/domains/{domainName}/records/{id}')
+        self.assertEqual((failed.status, failed.error), (404, 'NotFoundError'))
+        self.assertNotEqual(failed.correlation_id, listed.correlation_id)
+
+    def test_correlation_propagates_to_workers(self):
+        tracer = Tracer(header='X-Request-ID')
+        sent_headers = []
+        api = DomainApi(correct_auth, use_test_env=True, tracer=tracer,
+                        transport=answering([make_response(200, domain_sample1.to_dict())], sent_headers))
+        names = [domain_sample1.domainName, domain_sample2.domainName]
+
+        with correlation_id('job-42') as value:
+            self.assertEqual(value, 'job-42')
+            api.get_domains(names, max_workers=2)
+            api.get_domain(domain_sample1.domainName)
+            self.assertEqual(set(headers['X-Request-ID'] for headers in sent_headers), {'job-42'})
+
+        self.assertIsNone(current_correlation_id())
+        spans = tracer.sink.spans()
+        self.assertEqual(set(span.correlation_id for span in spans), {'job-42'})
+        self.assertEqual(sorted(span.attempt for span in spans), [1, 1, 2])
+
+    def test_jsonl_sink(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'spans.jsonl')
+            sink = JsonlFileSink(path)
+            api = DnsApi(record_sample1.domainName, correct_auth, use_test_env=True, tracer=Tracer(sink),
+                         transport=answering([make_response(200, {'records': []})]))
+            api.list_records()
+            api.list_records()
+            sink.close()
+
+            with open(path) as f:
+                lines = [json.loads(line) for line in f]
+            self.assertEqual(len(lines), 2)
+            self.assertEqual(lines[0]['endpoint'], '/v4/domains/{domainName}/records')
+            self.assertEqual(lines[0]['status'], 200)
+        finally:
+            shutil.rmtree(tmpdir)
@@ -0,0 +1,137 @@
+import json
+import socket
+import threading
+import unittest
+
+import requests
+
+from namecom import DnsApi, MemoryTransport, RequestsTransport, make_session
+from .sample import correct_auth, record_sample1
+from .transport_contract import TransportContract, split_url
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def start_server(handler):
+    """Starts a local http server answering with handler, returns it and its base url."""
+
+    class RequestHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def handle_one(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length) if length else None
+            path, query = split_url(self.path)
+            try:
+                status_code, headers, content = handler(self.command, path, query, self.headers, body)
+                self.send_response(status_code)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+            except socket.error:
+                pass
+
+        do_GET = do_POST = do_PUT = do_DELETE = handle_one
+
+        def log_message(self, *args):
+            pass
+
+    server = _Server(('127.0.0.1', 0), RequestHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server, 'http://127.0.0.1:{}'.format(server.server_address[1])
+
+
+def free_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class RequestsTransportTestCase(TransportContract, unittest.TestCase):
+
+    def serve(self, handler):
+        server, base_url = start_server(handler)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        transport = RequestsTransport(make_session(4))
+        self.addCleanup(transport.close)
+        return transport, base_url
+
+    def unreachable(self):
+        return RequestsTransport(), 'http://127.0.0.1:{}/v4/hello'.format(free_port())
+
+
+class MemoryTransportTestCase(TransportContract, unittest.TestCase):
+
+    def serve(self, handler):
+        def call(request):
+            path, query = split_url(request.url)
+            body = request.body.encode('utf-8') if hasattr(request.body, 'encode') and \
+                not isinstance(request.body, bytes) else request.body
+            return handler(request.method, path, query, request.headers, body)
+
+        transport = MemoryTransport(call)
+        self.addCleanup(transport.close)
+        return transport, 'https://api.dev.name.com'
+
+    def unreachable(self):
+        def refuse(request):
+            raise requests.ConnectionError('connection refused')
+        return MemoryTransport(refuse), 'https://api.dev.name.com/v4/hello'
+
+
+class ApiTransportTestCase(unittest.TestCase):
+
+    def test_api_sends_through_transport(self):
+        requests_seen = []
+
+        def handler(request):
+            requests_seen.append(request)
+            content = json.dumps({'records': [record_sample1.to_dict()]}).encode('utf-8')
+            return 200, {'Content-Type': 'application/json'}, content
+
+        api = DnsApi(record_sample1.domainName, correct_auth, use_test_env=True, transport=MemoryTransport(handler))
+        with mock.patch('namecom.api.requests.request') as plain_request:
+            result = api.list_records()
+
+        self.assertFalse(plain_request.called)
+        self.assertEqual(result.records, [record_sample1])
+        request, = requests_seen
+        self.assertTrue(request.url.startswith('https://api.dev.name.com/v4/domains/cthesky.band/records?'))
+
+    def test_session_setting(self):
+        api = DnsApi(record_sample1.domainName, correct_auth, use_test_env=True)
+        self.assertIs(type(api.transport), RequestsTransport)
+        self.assertIsNone(api.session)
+
+        session = make_session(2)
+        pooled = api.with_options(session=session)
+        self.assertIs(pooled.session, session)
+        self.assertIsNone(api.session)
+
+        with self.assertRaises(TypeError):
+            DnsApi(record_sample1.domainName, correct_auth, session=session, transport=MemoryTransport(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
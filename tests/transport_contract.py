@@ -0,0 +1,148 @@
+"""
+Contract tests every transport must pass, see :class:`namecom.Transport`.
+
+A test case of a transport mixes TransportContract into unittest.TestCase and implements
+serve(handler) and unreachable(). The handler stands for the server: it is called with
+(method, path, query, headers, body) of each request and returns (status_code, headers, content).
+"""
+
+import base64
+import json
+import threading
+import time
+
+import requests
+
+try:
+    from urllib.parse import parse_qs, urlsplit
+except ImportError:
+    from urlparse import parse_qs, urlsplit
+
+AUTH = ('cthesky-test', 'token')
+
+
+def basic_auth(auth):
+    return 'Basic ' + base64.b64encode('{}:{}'.format(*auth).encode('utf-8')).decode('ascii')
+
+
+def split_url(url):
+    """Returns the path and the query as a dict of single values of a url."""
+    parts = urlsplit(url)
+    return parts.path, dict((k, v[0]) for k, v in parse_qs(parts.query).items())
+
+
+class TransportContract(object):
+
+    def serve(self, handler):
+        """Returns (transport, base_url) of a transport whose requests to base_url are answered by handler."""
+        raise NotImplementedError
+
+    def unreachable(self):
+        """Returns (transport, url) of a transport failing to connect to url."""
+        raise NotImplementedError
+
+    def test_get(self):
+        seen = []
+
+        def handler(method, path, query, headers, body):
+            seen.append((method, path, query, headers.get('Authorization'), headers.get('X-Correlation-ID')))
+            return 200, {'Content-Type': 'application/json', 'ETag': '"v1"'}, b'{"records": []}'
+
+        transport, base_url = self.serve(handler)
+        resp = transport.request('GET', base_url + '/v4/domains/example.org/records', auth=AUTH, timeout=5,
+                                 params={'page': 2, 'perPage': 1000}, headers={'X-Correlation-ID': 'job-1'})
+
+        self.assertEqual(seen, [('GET', '/v4/domains/example.org/records', {'page': '2', 'perPage': '1000'},
+                                 basic_auth(AUTH), 'job-1')])
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.headers['etag'], '"v1"')
+        self.assertEqual(resp.content, b'{"records": []}')
+        self.assertEqual(resp.json(), {'records': []})
+        self.assertEqual(resp.request.method, 'GET')
+        self.assertEqual(split_url(resp.url), ('/v4/domains/example.org/records', {'page': '2', 'perPage': '1000'}))
+
+    def test_post_body_is_sent_as_is(self):
+        bodies = []
+
+        def handler(method, path, query, headers, body):
+            bodies.append((method, body))
+            return 200, {}, body
+
+        transport, base_url = self.serve(handler)
+        data = json.dumps({'host': 'www', 'type': 'A', 'answer': '10.0.0.1'}).encode('utf-8')
+        resp = transport.request('POST', base_url + '/v4/domains/example.org/records', auth=AUTH, timeout=5,
+                                 data=data)
+
+        self.assertEqual(bodies, [('POST', data)])
+        self.assertEqual(resp.content, data)
+        self.assertEqual(resp.request.method, 'POST')
+
+    def test_error_status_is_returned(self):
+        def handler(method, path, query, headers, body):
+            return 404, {'Content-Type': 'application/json'}, b'{"message": "Not Found"}'
+
+        transport, base_url = self.serve(handler)
+        resp = transport.request('DELETE', base_url + '/v4/domains/example.org/records/1', auth=AUTH, timeout=5)
+
+        self.assertEqual(resp.status_code, 404)
+        self.assertEqual(resp.json(), {'message': 'Not Found'})
+
+    def test_stream(self):
+        lines = [json.dumps({'domainName': 'example{}.org'.format(i), 'purchasable': True}) for i in range(50)]
+
+        def handler(method, path, query, headers, body):
+            return 200, {'Content-Type': 'application/x-ndjson'}, '\n'.join(lines).encode('utf-8')
+
+        transport, base_url = self.serve(handler)
+        resp = transport.request('POST', base_url + '/v4/domains:searchStream', auth=AUTH, timeout=5,
+                                 data=b'{"keyword": "example"}', stream=True)
+
+        self.assertEqual([line.decode('utf-8') for line in resp.iter_lines() if line], lines)
+
+    def test_timeout(self):
+        def handler(method, path, query, headers, body):
+            time.sleep(0.5)
+            return 200, {}, b'{}'
+
+        transport, base_url = self.serve(handler)
+        with self.assertRaises(requests.Timeout):
+            transport.request('GET', base_url + '/v4/hello', auth=AUTH, timeout=(5, 0.1))
+
+    def test_connection_error(self):
+        transport, url = self.unreachable()
+        with self.assertRaises(requests.ConnectionError):
+            transport.request('GET', url, auth=AUTH, timeout=1)
+
+    def test_request_async(self):
+        def handler(method, path, query, headers, body):
+            if path == '/v4/missing':
+                time.sleep(0.5)
+            return 200, {}, json.dumps({'path': path}).encode('utf-8')
+
+        transport, base_url = self.serve(handler)
+        handles = [transport.request_async('GET', base_url + '/v4/{}'.format(i), auth=AUTH, timeout=5)
+                   for i in range(4)]
+        failing = transport.request_async('GET', base_url + '/v4/missing', auth=AUTH, timeout=(5, 0.1))
+
+        self.assertEqual([handle.get(5).json() for handle in handles], [{'path': '/v4/{}'.format(i)} for i in range(4)])
+        with self.assertRaises(requests.Timeout):
+            failing.get(5)
+
+    def test_concurrent_requests(self):
+        def handler(method, path, query, headers, body):
+            time.sleep(0.01)
+            return 200, {}, query['i'].encode('utf-8')
+
+        transport, base_url = self.serve(handler)
+        results = {}
+
+        def call(i):
+            results[i] = transport.request('GET', base_url + '/v4/hello', auth=AUTH, timeout=5, params={'i': i}).content
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, dict((i, str(i).encode('utf-8')) for i in range(8)))